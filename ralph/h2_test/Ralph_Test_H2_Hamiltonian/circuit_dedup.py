@@ -0,0 +1,417 @@
+#!/usr/bin/env python
+"""
+Architecture deduplication for RLQAS: canonical circuit forms plus a persistent index.
+
+RL search over add_Rx/add_Ry/add_Rz/add_CNOT keeps producing circuits that
+differ only by the order of commuting gates, by gate pairs that cancel, or by
+a relabeling of qubits that leaves the Hamiltonian unchanged. All of them
+have the same optimal VQE energy. canonical_form() reduces a circuit
+architecture (gate kinds and qubits; the angles are free) to a normal form:
+
+  * gates form a trace: two gates commute on disjoint qubits, Rz with a CNOT
+    control, Rx with a CNOT target, CNOTs sharing only a control or only a
+    target, and same-axis rotations on one qubit. The normal form is the
+    lexicographically smallest ordering of the commutation DAG.
+  * adjacent gates (up to commutation) simplify: two identical CNOTs cancel,
+    and two same-axis rotations on one qubit merge into one parameter.
+  * gates at the front act on the initial basis state: an Rz there is a global
+    phase, and a CNOT just flips bits. Both are folded into the initial bits.
+  * qubit permutations that map the Hamiltonian onto itself (qubit_symmetries)
+    relabel the circuit, and the smallest relabeled form is kept.
+
+Each form records how the original parameters map onto the canonical ones. So
+stored optimal angles can be mapped back onto any equivalent circuit.
+
+ArchitectureIndex is an append-only JSON-lines file per Hamiltonian (under the
+integral cache directory). It maps canonical keys to the best energy, the
+canonical parameters and the optimization time. DedupOptimizer answers
+equivalent circuits from the index. On a miss it warm-starts from the optimum
+of a neighbour: the same circuit with one gate removed, which is usually the
+architecture one RL step earlier.
+
+Usage:
+    optimizer = DedupOptimizer(ham, initial_bits=hf_state)
+    result = optimizer.optimize(circuit, x0)      # result["energy"], result["params"], result["source"]
+    optimizer.stats()                              # hit rate, warm starts, time saved
+
+Run this file directly for hit rate and wall time saved on random RL training runs:
+    python circuit_dedup.py
+"""
+
+import hashlib
+import heapq
+import itertools
+import json
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+from scipy.optimize import minimize
+from adjoint import AdjointGradient
+from integral_cache import DEFAULT_CACHE_DIR
+from qubit_hamiltonian import unpack_bits
+from statevector import ROTATIONS, StatevectorEvaluator, count_parameters
+
+GATE_ORDER = {"rx": 0, "ry": 1, "rz": 2, "cnot": 3}
+
+def commute(a, b):
+    """Whether two gates ("rx"|"ry"|"rz", q, ...) / ("cnot", c, t) commute for every angle."""
+    if a[0] == "cnot" and b[0] == "cnot":
+        if a[1:3] == b[1:3]:
+            return True
+        return a[1] != b[2] and a[2] != b[1]             # shared control or shared target only
+    if a[0] == "cnot":
+        a, b = b, a
+    if b[0] != "cnot":
+        return a[1] != b[1] or a[0] == b[0]
+    if a[1] == b[1]:
+        return a[0] == "rz"                              # on the control
+    if a[1] == b[2]:
+        return a[0] == "rx"                              # on the target
+    return True
+
+def _sort_key(gate):
+    return (GATE_ORDER[gate[0]], gate[1], gate[2] if gate[0] == "cnot" else -1)
+
+def lexicographic_normal_form(gates):
+    """Positions of gates in their smallest ordering (by _sort_key) reachable by swapping commuting neighbours."""
+    n = len(gates)
+    successors = [[] for _ in range(n)]
+    indegree = [0] * n
+    for j in range(n):
+        for i in range(j):
+            if not commute(gates[i], gates[j]):
+                successors[i].append(j)
+                indegree[j] += 1
+    ready = [(_sort_key(gates[i]), i) for i in range(n) if indegree[i] == 0]
+    heapq.heapify(ready)
+    order = []
+    while ready:
+        _, i = heapq.heappop(ready)
+        order.append(i)
+        for j in successors[i]:
+            indegree[j] -= 1
+            if indegree[j] == 0:
+                heapq.heappush(ready, (_sort_key(gates[j]), j))
+    return order
+
+def _simplify_once(gates, bits, groups):
+    """Apply one cancellation, merge or front-of-circuit fold; False once gates are irreducible."""
+    for i, gate in enumerate(gates):
+        at_front = all(commute(gates[k], gate) for k in range(i))
+        if at_front and gate[0] == "rz":
+            del gates[i], groups[i]                      # phase on a basis state
+            return bits, True
+        if at_front and gate[0] == "cnot":
+            if bits >> gate[1] & 1:
+                bits ^= 1 << gate[2]
+            del gates[i], groups[i]
+            return bits, True
+        for j in range(i + 1, len(gates)):
+            other = gates[j]
+            if other[0] == gate[0] and other[1] == gate[1] and (gate[0] != "cnot" or other[2] == gate[2]):
+                if gate[0] == "cnot":
+                    del gates[j], groups[j], gates[i], groups[i]
+                else:
+                    groups[i] = groups[i] + groups[j]    # R(a) R(b) = R(a + b)
+                    del gates[j], groups[j]
+                return bits, True
+            if not commute(gate, other):
+                break
+    return bits, False
+
+class CanonicalForm:
+    """Normal form of one circuit architecture and the map from its parameters to the canonical ones."""
+
+    def __init__(self, gates, bits, param_groups, permutation):
+        self.gates = gates                               # canonical gates, parameter slots numbered in order
+        self.initial_bits = bits
+        self.param_groups = param_groups                 # original parameter indices summed into each slot
+        self.permutation = permutation
+        self.serialized = json.dumps([bits, gates], separators=(",", ":"))
+        self.key = hashlib.sha1(self.serialized.encode()).hexdigest()
+
+    @property
+    def n_params(self):
+        return len(self.param_groups)
+
+    def canonical_params(self, params):
+        """Canonical angles giving the same state as params on the original circuit."""
+        return np.array([sum(params[k] for k in group) for group in self.param_groups])
+
+    def original_params(self, canonical, x0):
+        """Parameters for the original circuit reproducing the canonical angles (others from x0)."""
+        params = np.array(x0, dtype=np.float64)
+        for group, theta in zip(self.param_groups, canonical):
+            params[list(group)] = 0.0
+            params[group[0]] = theta
+        return params
+
+def _reduce(circuit, bits, permutation):
+    gates = []
+    groups = []
+    for gate in circuit:
+        if gate[0] == "cnot":
+            gates.append(("cnot", int(permutation[gate[1]]), int(permutation[gate[2]])))
+            groups.append(())
+        else:
+            gates.append((gate[0], int(permutation[gate[1]])))
+            groups.append((int(gate[2]),))
+    bits = sum(1 << int(permutation[q]) for q in range(len(permutation)) if bits >> q & 1)
+
+    changed = True
+    while changed:
+        order = lexicographic_normal_form(gates)
+        gates = [gates[i] for i in order]
+        groups = [groups[i] for i in order]
+        bits, changed = _simplify_once(gates, bits, groups)
+
+    param_groups = [group for gate, group in zip(gates, groups) if gate[0] != "cnot"]
+    slots = itertools.count()
+    numbered = [list(g) if g[0] == "cnot" else [g[0], g[1], next(slots)] for g in gates]
+    return CanonicalForm(numbered, bits, param_groups, list(permutation))
+
+def canonical_form(circuit, initial_bits, n_qubits, symmetries=None):
+    """Smallest normal form of circuit over the given qubit permutations (identity if None)."""
+    best = None
+    for permutation in symmetries or [list(range(n_qubits))]:
+        form = _reduce(circuit, initial_bits, permutation)
+        if best is None or form.serialized < best.serialized:
+            best = form
+    return best
+
+def qubit_symmetries(ham, max_candidates=20000):
+    """Qubit permutations p (qubit q -> p[q]) that map every Pauli term onto a term with the same coefficient.
+
+    Candidates are restricted to permutations within classes of qubits with the
+    same per-qubit term statistics. If more than max_candidates remain, only
+    the identity is returned.
+    """
+    n = ham.n_qubits
+    letters = unpack_bits(ham.x, n).astype(np.int8) + 2 * unpack_bits(ham.z, n).astype(np.int8)
+    coeffs = np.round(ham.coeffs.real, 10)
+    terms = {row.tobytes(): c for row, c in zip(letters, coeffs)}
+
+    signature = [tuple(sorted(zip(letters[:, q][letters[:, q] > 0].tolist(), coeffs[letters[:, q] > 0].tolist())))
+                 for q in range(n)]
+    classes = {}
+    for q, sig in enumerate(signature):
+        classes.setdefault(sig, []).append(q)
+    classes = list(classes.values())
+    n_candidates = 1
+    for members in classes:
+        for size in range(2, len(members) + 1):
+            n_candidates *= size
+    if n_candidates > max_candidates:
+        return [list(range(n))]
+
+    symmetries = []
+    for images in itertools.product(*(itertools.permutations(members) for members in classes)):
+        permutation = np.empty(n, dtype=np.int64)
+        for members, image in zip(classes, images):
+            permutation[members] = image
+        moved = np.empty_like(letters)
+        moved[:, permutation] = letters
+        if all(abs(terms.get(row.tobytes(), np.inf) - c) < 1e-9 for row, c in zip(moved, coeffs)):
+            symmetries.append(permutation.tolist())
+    return symmetries
+
+def hamiltonian_key(ham):
+    """Hash of the Pauli terms of ham, naming its architecture index."""
+    digest = hashlib.sha256()
+    order = np.lexsort(np.concatenate([ham.x, ham.z], axis=1).T)
+    for array in (ham.x[order], ham.z[order], np.round(ham.coeffs.real[order], 12)):
+        digest.update(np.ascontiguousarray(array).tobytes())
+    digest.update(str(ham.n_qubits).encode())
+    return digest.hexdigest()
+
+class ArchitectureIndex:
+    """Append-only JSON-lines map from canonical circuit key to the best optimization found."""
+
+    def __init__(self, path):
+        self.path = path
+        self._records = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    try:
+                        self._keep_best(json.loads(line))
+                    except json.JSONDecodeError:
+                        continue                         # torn last line of an interrupted writer
+
+    @classmethod
+    def for_hamiltonian(cls, ham, directory=None):
+        directory = directory or os.path.join(DEFAULT_CACHE_DIR, "architectures")
+        os.makedirs(directory, exist_ok=True)
+        return cls(os.path.join(directory, f"{hamiltonian_key(ham)[:32]}.jsonl"))
+
+    def __len__(self):
+        return len(self._records)
+
+    def _keep_best(self, record):
+        old = self._records.get(record["key"])
+        if old is None or record["energy"] < old["energy"]:
+            self._records[record["key"]] = record
+            return True
+        return False
+
+    def get(self, key):
+        return self._records.get(key)
+
+    def put(self, record):
+        """Add a record; it is written only if it improves on the stored energy."""
+        if self._keep_best(record):
+            # One append per line keeps concurrent writers from interleaving
+            with open(self.path, "a") as f:
+                f.write(json.dumps(record) + "\n")
+
+def optimize_parameters(gradient, circuit, x0, method="L-BFGS-B", options=None):
+    """(energy, params, iterations) of a SciPy run with adjoint gradients; parameter-free circuits just evaluate."""
+    if len(x0) == 0:
+        return gradient.energy_and_gradient(circuit, x0)[0], x0, 0
+    result = minimize(lambda x: gradient.energy_and_gradient(circuit, x), x0, jac=True, method=method,
+                      options=options)
+    return float(result.fun), result.x, int(result.nit)
+
+class DedupOptimizer:
+    """VQE parameter optimization with results shared between equivalent architectures."""
+
+    def __init__(self, ham, initial_bits=0, index=None, symmetries=None, method="L-BFGS-B", **options):
+        self.n_qubits = ham.n_qubits
+        self.initial_bits = initial_bits
+        self.symmetries = qubit_symmetries(ham) if symmetries is None else symmetries
+        self.index = index if index is not None else ArchitectureIndex.for_hamiltonian(ham)
+        self.gradient = AdjointGradient(ham, initial_bits)
+        self.method = method
+        self.options = options or None
+        self.counts = {"hit": 0, "warm": 0, "cold": 0}
+        self.time_saved = 0.0
+        self.optimize_time = 0.0
+        self.canonical_time = 0.0
+
+    def canonical(self, circuit):
+        start = time.perf_counter()
+        form = canonical_form(circuit, self.initial_bits, self.n_qubits, self.symmetries)
+        self.canonical_time += time.perf_counter() - start
+        return form
+
+    def _warm_start(self, circuit, x0):
+        """Stored optimum of the first indexed neighbour (one gate removed, last first), offset by x0.
+
+        The offset keeps the start off the exact stationary points (angles 0 or pi)
+        that optima of these circuits often sit on; the new gate's angle is x0's.
+        """
+        for i in range(len(circuit) - 1, -1, -1):
+            form = self.canonical(circuit[:i] + circuit[i + 1:])
+            record = self.index.get(form.key)
+            if record is not None:
+                return form.original_params(record["params"], np.zeros_like(x0)) + x0
+        return None
+
+    def optimize(self, circuit, x0=None):
+        """Optimized energy and parameters of circuit, from the index when an equivalent is stored."""
+        x0 = np.zeros(count_parameters(circuit)) if x0 is None else np.asarray(x0, dtype=np.float64)
+        form = self.canonical(circuit)
+        record = self.index.get(form.key)
+        if record is not None:
+            self.counts["hit"] += 1
+            self.time_saved += record["optimize_s"]
+            return {"energy": record["energy"], "params": form.original_params(record["params"], x0),
+                    "source": "hit", "key": form.key}
+
+        warm = self._warm_start(circuit, x0)
+        source = "cold" if warm is None else "warm"
+        start = time.perf_counter()
+        energy, params, iterations = optimize_parameters(self.gradient, circuit, x0 if warm is None else warm,
+                                                         self.method, self.options)
+        elapsed = time.perf_counter() - start
+        self.optimize_time += elapsed
+        self.counts[source] += 1
+        self.index.put({"key": form.key, "gates": form.gates, "initial_bits": form.initial_bits,
+                        "energy": energy, "params": form.canonical_params(params).tolist(),
+                        "optimize_s": elapsed, "iterations": iterations})
+        return {"energy": energy, "params": params, "source": source, "key": form.key}
+
+    def stats(self):
+        """Hit rate, warm starts and wall time spent/saved since construction."""
+        lookups = sum(self.counts.values())
+        return {"lookups": lookups, **self.counts, "hit_rate": self.counts["hit"] / lookups if lookups else 0.0,
+                "indexed": len(self.index), "optimize_s": self.optimize_time,
+                "canonical_s": self.canonical_time, "time_saved_s": self.time_saved}
+
+def random_training_run(n_qubits, n_episodes, max_gates, seed=0):
+    """RL-like episodes over the add_Rx/Ry/Rz/CNOT action set; yields every intermediate circuit."""
+    rng = np.random.default_rng(seed)
+    coupling = [(q, q + 1) for q in range(n_qubits - 1)] + [(q + 1, q) for q in range(n_qubits - 1)]
+    actions = [(kind, q) for kind in ROTATIONS for q in range(n_qubits)] + [("cnot",) + pair for pair in coupling]
+    for _ in range(n_episodes):
+        circuit = []
+        n_params = 0
+        for _ in range(rng.integers(1, max_gates + 1)):
+            action = actions[rng.integers(len(actions))]
+            if action[0] == "cnot":
+                circuit.append(action)
+            else:
+                circuit.append((action[0], action[1], n_params))
+                n_params += 1
+            yield list(circuit), rng.normal(scale=0.1, size=n_params)
+
+def benchmark(n_episodes=150, max_gates=8, n_runs=2):
+    """Per training run: hit rate and wall time with the dedup index vs optimizing every circuit."""
+    from statevector import _benchmark_hamiltonians
+    from tapering import hartree_fock_bits
+
+    rows = []
+    for n_qubits, (name, ham) in _benchmark_hamiltonians().items():
+        if n_qubits > 8 or "tapered" in name:
+            continue
+        hf = int(sum(int(b) << q for q, b in enumerate(hartree_fock_bits("jordan_wigner", n_qubits, n_qubits // 2))))
+        symmetries = qubit_symmetries(ham)
+        reference = AdjointGradient(ham, hf)
+        check = StatevectorEvaluator(ham, initial_bits=hf)
+        with tempfile.TemporaryDirectory() as directory:
+            index = ArchitectureIndex(os.path.join(directory, "index.jsonl"))
+            for run in range(n_runs):
+                steps = list(random_training_run(n_qubits, n_episodes, max_gates, seed=run))
+                start = time.perf_counter()
+                baseline = [optimize_parameters(reference, c, x0)[0] for c, x0 in steps]
+                baseline_time = time.perf_counter() - start
+
+                optimizer = DedupOptimizer(ham, hf, index=index, symmetries=symmetries)
+                start = time.perf_counter()
+                results = [optimizer.optimize(c, x0) for c, x0 in steps]
+                dedup_time = time.perf_counter() - start
+                for (circuit, _), result in zip(steps, results):
+                    if result["source"] == "hit":
+                        energy = check.energy(circuit, result["params"])
+                        assert abs(energy - result["energy"]) < 1e-8, "Cached parameters do not reproduce energy"
+                # Repeats a plain (uncanonicalized) architecture string would already catch
+                raw_seen = set()
+                raw_repeats = 0
+                for circuit, _ in steps:
+                    raw = tuple(g if g[0] == "cnot" else g[:2] for g in circuit)
+                    raw_repeats += raw in raw_seen
+                    raw_seen.add(raw)
+
+                stats = optimizer.stats()
+                rows.append({"hamiltonian": name, "n_qubits": n_qubits, "n_symmetries": len(symmetries),
+                             "run": run + 1, "steps": len(steps), "exact_repeat_rate": raw_repeats / len(steps),
+                             **stats, "baseline_s": baseline_time, "dedup_s": dedup_time,
+                             "energy_gap": float(np.mean([r["energy"] for r in results]) - np.mean(baseline))})
+    return rows
+
+def main():
+    print("Architecture dedup on random RL training runs (150 episodes, <= 8 gates, every step optimized)")
+    print("=" * 120)
+    print(f"{'hamiltonian':>12} {'qubits':>6} {'syms':>4} {'run':>3} {'steps':>5} {'repeat':>7} {'hit rate':>8} "
+          f"{'warm':>5} {'cold':>5} {'indexed':>7} {'baseline s':>10} {'dedup s':>8} {'saved s':>8} {'<dE>':>10}")
+    for row in benchmark():
+        print(f"{row['hamiltonian']:>12} {row['n_qubits']:>6} {row['n_symmetries']:>4} {row['run']:>3} "
+              f"{row['steps']:>5} {row['exact_repeat_rate']:7.1%} {row['hit_rate']:8.1%} {row['warm']:>5} "
+              f"{row['cold']:>5} {row['indexed']:>7} {row['baseline_s']:10.2f} {row['dedup_s']:8.2f} "
+              f"{row['baseline_s'] - row['dedup_s']:8.2f} {row['energy_gap']:10.2e}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
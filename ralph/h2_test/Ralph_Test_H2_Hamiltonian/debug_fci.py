@@ -2,6 +2,7 @@
 import numpy as np
 import pyscf
 from pyscf import gto, scf, fci, ci
+from integral_cache import IntegralCache
 
 # Define molecule
 mol = gto.M(
@@ -25,14 +26,14 @@ fci_energy1, fci_vec1 = fci_solver.kernel()
 print(f"FCI energy: {fci_energy1:.10f}")
 
 # Method 2: fci.FCI(mol) with integrals
+# MO integrals come from the shared on-disk cache (same key as generate_h2_hamiltonian.py),
+# so they are transformed once and reused by methods 2 and 4.
 print("\nMethod 2: fci.FCI(mol) with integrals")
-h1_ao = mol.intor("int1e_kin") + mol.intor("int1e_nuc")
-h2_ao = mol.intor("int2e", aosym="s8")
-mo_coeff = mf.mo_coeff
-h1_mo = np.einsum("pi,pq,qj->ij", mo_coeff, h1_ao, mo_coeff)
-from pyscf import ao2mo
-h2_mo = ao2mo.full(mol, mo_coeff)
-norb = mo_coeff.shape[1]
+cached = IntegralCache().load_or_compute(mol, conv_tol=1e-12)
+print(f"Integral cache: {'hit' if cached['cache_hit'] else 'miss'}")
+h1_mo = np.asarray(cached["h1_mo"])
+h2_mo = np.asarray(cached["eri_mo"])
+norb = cached["n_spatial_orbitals"]
 nelec = mol.nelectron
 fci_solver2 = fci.FCI(mol)
 fci_energy2, fci_vec2 = fci_solver2.kernel(h1_mo, h2_mo, norb, nelec)
@@ -51,9 +52,19 @@ print("\nMethod 4: FCI with nelec=(1,1)")
 fci_energy4, fci_vec4 = fci.FCI(mol).kernel(h1_mo, h2_mo, norb, (1,1))
 print(f"FCI energy (nelec=(1,1)): {fci_energy4:.10f}")
 
+# Method 5: sparse Lanczos on the Jordan-Wigner qubit Hamiltonian, restricted to
+# the (N_alpha, N_beta) sector; one cheap solve on the cached integrals
+print("\nMethod 5: sparse sector Lanczos on the qubit Hamiltonian")
+from qubit_hamiltonian import build_qubit_hamiltonian
+from exact_diag import ground_state
+qubit_ham = build_qubit_hamiltonian(h1_mo, cached["eri_mo"], cached["nuclear_repulsion"])
+ed_energy, _ = ground_state(qubit_ham, *mol.nelec)
+print(f"Sector ED energy: {ed_energy:.10f}")
+
 # Compare with benchmark
 print("\nBenchmark FCI energy: -1.0551597944706257")
 print(f"Difference method1: {fci_energy1 - (-1.0551597944706257):.2e}")
 print(f"Difference method2: {fci_energy2 - (-1.0551597944706257):.2e}")
 print(f"Difference method3: {cisd_energy - (-1.0551597944706257):.2e}")
-print(f"Difference method4: {fci_energy4 - (-1.0551597944706257):.2e}")
\ No newline at end of file
+print(f"Difference method4: {fci_energy4 - (-1.0551597944706257):.2e}")
+print(f"Difference method5: {ed_energy - (-1.0551597944706257):.2e}")
\ No newline at end of file
@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+"""
+Sparse exact diagonalization of the qubit Hamiltonian in one particle-number sector.
+
+Only determinants with the right (N_alpha, N_beta) are kept: their qubit
+bitstrings are beta @ f (mod 2) for the chosen fermion-to-qubit encoding, and
+the Hamiltonian block between them is built directly from the packed Pauli
+terms (PauliSum.to_sparse). A single Lanczos solve (scipy eigsh) on that block
+gives the ground-state energy used as the RL reward reference, instead of
+re-running fci.FCI for every cross-check.
+
+Run this file directly to compare time and memory with fci.FCI(mf).kernel():
+    python exact_diag.py
+"""
+
+import itertools
+import sys
+import time
+import tracemalloc
+import numpy as np
+from scipy.sparse.linalg import eigsh
+from qubit_hamiltonian import encoding_matrix
+
+def sector_basis_states(mapping, n_qubits, n_alpha, n_beta):
+    """Qubit bitstrings (as integers) of all determinants with n_alpha/n_beta electrons.
+
+    Spin orbitals are interleaved: even qubits alpha, odd qubits beta.
+    """
+    norb = n_qubits // 2
+    alpha = [sum(1 << (2 * i) for i in occ) for occ in itertools.combinations(range(norb), n_alpha)]
+    beta = [sum(1 << (2 * i + 1) for i in occ) for occ in itertools.combinations(range(norb), n_beta)]
+    occupations = (np.array(alpha, dtype=np.uint64)[:, None] | np.array(beta, dtype=np.uint64)[None, :]).ravel()
+
+    if mapping == "jordan_wigner":
+        return np.sort(occupations)
+    bits = ((occupations[:, None] >> np.arange(n_qubits, dtype=np.uint64)) & np.uint64(1)).astype(np.int64)
+    qubits = (bits @ encoding_matrix(mapping, n_qubits).T.astype(np.int64)) % 2
+    return np.sort((qubits.astype(np.uint64) << np.arange(n_qubits, dtype=np.uint64)).sum(axis=1))
+
+def sector_hamiltonian(ham, n_alpha, n_beta, mapping="jordan_wigner"):
+    """Sparse Hamiltonian block of the (n_alpha, n_beta) sector."""
+    states = sector_basis_states(mapping, ham.n_qubits, n_alpha, n_beta)
+    return ham.to_sparse(states)
+
+def ground_state(ham, n_alpha, n_beta, mapping="jordan_wigner", tol=1e-10):
+    """Lowest eigenpair of ham in the (n_alpha, n_beta) sector via Lanczos (dense below 64 states)."""
+    matrix = sector_hamiltonian(ham, n_alpha, n_beta, mapping)
+    if matrix.shape[0] <= 64:
+        values, vectors = np.linalg.eigh(matrix.toarray())
+        return float(values[0]), vectors[:, 0]
+    values, vectors = eigsh(matrix, k=1, which="SA", tol=tol)
+    return float(values[0]), vectors[:, 0]
+
+def _peak(func):
+    """Run func() and return (result, seconds, peak traced bytes)."""
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+def benchmark_against_fci(chain_lengths=(2, 4, 6, 8), mapping="jordan_wigner"):
+    """Time/memory of the sparse sector solve vs fci.FCI(mf).kernel() on H_n/STO-3G chains."""
+    from pyscf import gto, scf, fci, ao2mo
+    from packed_eri import PackedERI
+    from qubit_hamiltonian import build_qubit_hamiltonian, hydrogen_chain
+
+    # Warm up PySCF's FCI module so its one-off import/setup cost is not timed
+    warmup = scf.RHF(gto.M(atom=hydrogen_chain(2), basis="sto-3g", verbose=0)).run()
+    fci.FCI(warmup).kernel()
+
+    rows = []
+    for n_atoms in chain_lengths:
+        mol = gto.M(atom=hydrogen_chain(n_atoms), basis="sto-3g", unit="angstrom", verbose=0)
+        mf = scf.RHF(mol)
+        mf.kernel()
+        mo = mf.mo_coeff
+        h1_mo = mo.T @ mf.get_hcore() @ mo
+        eri = PackedERI.from_any(ao2mo.full(mol, mo), mo.shape[1])
+        ham = build_qubit_hamiltonian(h1_mo, eri, mol.energy_nuc(), mapping)
+        n_alpha, n_beta = mol.nelec
+
+        (e_fci, _), fci_time, fci_peak = _peak(lambda: fci.FCI(mf).kernel())
+        (e_ed, _), ed_time, ed_peak = _peak(lambda: ground_state(ham, n_alpha, n_beta, mapping))
+        rows.append({
+            "molecule": f"H{n_atoms}",
+            "n_orbitals": mo.shape[1],
+            "sector_dim": len(sector_basis_states(mapping, ham.n_qubits, n_alpha, n_beta)),
+            "fci_energy": float(e_fci),
+            "ed_energy": e_ed,
+            "fci_time_s": fci_time,
+            "ed_time_s": ed_time,
+            "fci_peak_bytes": fci_peak,
+            "ed_peak_bytes": ed_peak,
+        })
+    return rows
+
+def main():
+    print("Sparse sector Lanczos vs fci.FCI(mf).kernel() (H_n chains, STO-3G, Jordan-Wigner)")
+    print("=" * 86)
+    print(f"{'molecule':>8} {'norb':>5} {'dim':>6} {'|dE|':>9} {'FCI s':>8} {'ED s':>8} "
+          f"{'FCI MB':>8} {'ED MB':>8}")
+    for row in benchmark_against_fci():
+        print(f"{row['molecule']:>8} {row['n_orbitals']:>5} {row['sector_dim']:>6} "
+              f"{abs(row['fci_energy'] - row['ed_energy']):9.1e} {row['fci_time_s']:8.3f} {row['ed_time_s']:8.3f} "
+              f"{row['fci_peak_bytes'] / 1e6:8.2f} {row['ed_peak_bytes'] / 1e6:8.2f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,15 +5,41 @@ Compute Hartree-Fock and Full Configuration Interaction energies.
 Extract Hamiltonian information for quantum simulation.
 
 This script implements the H2 Hamiltonian generation objective for the RLQAS project.
+Integrals and energies are cached on disk (see integral_cache.py), so repeated
+runs on the same molecule skip SCF, FCI and integral generation.
+
+Results are written twice: h2_results.h5 (results_io.py HDF5 format, including
+the AO/MO integrals) and the h2_results.json export read by the Ralph workflow.
+
+PySCF is imported inside main(); worker_daemon.py (one directory up) runs this
+script in a warm process that has already paid for it.
+
+Set RLQAS_TELEMETRY=<file>|stderr for per-stage JSON-lines timings, iteration
+counts, array sizes and memory peaks (see telemetry.py).
 """
 
-import json
+import os
 import sys
 import numpy as np
-import pyscf
-from pyscf import gto, scf, fci
+from integral_cache import IntegralCache, compute_integrals
+from packed_eri import PackedERI
+from qubit_hamiltonian import build_qubit_hamiltonian
+from tapering import reduce_hamiltonian, ground_energy, active_space_fci_energy
+
+# results_io lives with the validation harness one directory up
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from results_io import save_results
+from telemetry import Telemetry
+
+def main(use_cache=True, mapping="jordan_wigner", n_frozen=0, n_active=None, symmetries="parity"):
+    # PySCF is imported here rather than at module level so importers (the
+    # worker daemon, job_array.py tasks) only pay for it when a molecule is built
+    import pyscf
+    from pyscf import gto
+
+    # Opt-in stage timings/memory as JSON lines (RLQAS_TELEMETRY, RLQAS_PROFILE_DIR)
+    telemetry = Telemetry.from_env("generate_h2_hamiltonian")
 
-def main():
     print("H2 Hamiltonian Generation with PySCF")
     print("====================================\n")
 
@@ -22,13 +48,15 @@ def main():
     print(f"Defining H2 molecule with bond length {bond_length} Å")
     print("Basis set: STO-3G")
 
-    mol = gto.M(
-        atom=[["H", 0, 0, 0], ["H", bond_length, 0, 0]],
-        basis="sto-3g",
-        unit="angstrom",
-        symmetry=False,
-        verbose=0
-    )
+    with telemetry.stage("molecule") as stage:
+        mol = gto.M(
+            atom=[["H", 0, 0, 0], ["H", bond_length, 0, 0]],
+            basis="sto-3g",
+            unit="angstrom",
+            symmetry=False,
+            verbose=0
+        )
+        stage.record(n_electrons=mol.nelectron, n_ao=mol.nao_nr(), basis="sto-3g")
 
     # Basic molecular information
     n_elec = mol.nelectron  # Should be 2 for H2
@@ -36,49 +64,85 @@ def main():
     print(f"Number of electrons: {n_elec}")
     print(f"Number of atomic orbitals: {n_orbs}")
 
-    # 2. Hartree-Fock calculation (Restricted HF)
-    print("\nPerforming Hartree-Fock calculation...")
-    mf = scf.RHF(mol)
-    mf.conv_tol = 1e-12
-    mf.conv_tol_grad = 1e-12
-    hf_energy = mf.kernel()
-
-    if not mf.converged:
+    # 2-4. Hartree-Fock, FCI and AO/MO integrals, served from the on-disk cache
+    # when this molecule has been computed before. On a miss the cache runs
+    # RHF (conv_tol 1e-12), fci.FCI(mf) and the AO->MO transform, then stores them.
+    print("\nPerforming Hartree-Fock and FCI calculations (cached)...")
+    with telemetry.stage("integrals") as stage:
+        if use_cache:
+            cache = IntegralCache()
+            data = cache.load_or_compute(mol, conv_tol=1e-12)
+        else:
+            arrays, meta = compute_integrals(mol, conv_tol=1e-12)
+            data = {**arrays, **meta, "cache_hit": False}
+        # Iteration counts are those of the run that filled the cache entry
+        stage.record(cache_hit=data["cache_hit"], converged=data["converged"],
+                     scf_cycles=data.get("scf_cycles"), fci_iterations=data.get("fci_iterations"))
+        stage.arrays(**{name: data[name] for name in ("h1_ao", "eri_ao", "mo_coeff", "h1_mo", "eri_mo")})
+    print(f"Integral cache: {'hit' if data['cache_hit'] else 'miss (computed and stored)'}")
+
+    hf_energy = data["hf_hartree"]
+    fci_energy = data["fci_hartree"]
+    converged = data["converged"]
+    if not converged:
         print("WARNING: Hartree-Fock calculation did not converge!")
         # Continue anyway for this small system
 
     print(f"Hartree-Fock energy: {hf_energy:.10f} Hartree")
-
-    # 3. Full Configuration Interaction using built-in FCI from RHF object
-    print("\nPerforming Full Configuration Interaction (FCI) calculation...")
-    fci_solver = fci.FCI(mf)  # Use RHF object to ensure correct Hamiltonian
-    fci_energy, fci_vec = fci_solver.kernel()
     print(f"FCI energy: {fci_energy:.10f} Hartree")
     print(f"Correlation energy (FCI - HF): {fci_energy - hf_energy:.10f} Hartree")
 
     # 4. Extract Hamiltonian information for quantum simulation
     print("\nExtracting Hamiltonian information...")
 
-    # Get core Hamiltonian in atomic orbital basis
-    h1_ao = mf.get_hcore()  # Core Hamiltonian (kinetic + nuclear attraction)
+    # Core Hamiltonian and 8-fold packed two-electron integrals in the AO basis
+    h1_ao = data["h1_ao"]
+    h2_ao = data["eri_ao"]
 
-    # Get two-electron integrals in atomic orbital basis
-    # Use pyscf's integral generation with 8-fold symmetry
-    h2_ao = mol.intor("int2e", aosym="s8")
-
-    # Transform to molecular orbital basis using HF coefficients
-    mo_coeff = mf.mo_coeff  # MO coefficients
+    # Molecular orbital basis from the HF coefficients
+    mo_coeff = data["mo_coeff"]  # MO coefficients
     n_spatial_orbs = mo_coeff.shape[1]  # Number of molecular orbitals
 
-    # Transform one-electron integrals
-    h1_mo = np.einsum("pi,pq,qj->ij", mo_coeff, h1_ao, mo_coeff)
-
-    # Transform two-electron integrals using pyscf's ao2mo module
-    from pyscf import ao2mo
-    # Get two-electron integrals in MO basis (full 4-index tensor)
-    h2_mo = ao2mo.full(mol, mo_coeff)
-    # Convert to numpy array with proper shape
-    h2_mo = ao2mo.restore(1, h2_mo, n_spatial_orbs)  # 1 = no symmetry
+    # One-electron integrals in the MO basis
+    h1_mo = np.asarray(data["h1_mo"])
+
+    # Two-electron integrals in the MO basis, kept 8-fold packed. PackedERI gives
+    # h2_mo[p, q, r, s] and slice access without expanding to the full N^4 tensor.
+    h2_mo = PackedERI(data["eri_mo"], n_spatial_orbs)
+    print(f"Two-electron integrals: {h2_mo.symmetry} packed, {h2_mo.nbytes} bytes "
+          f"(full tensor would be {h2_mo.full_nbytes} bytes)")
+
+    # Map the fermionic Hamiltonian to qubits (packed Pauli strings)
+    print(f"\nMapping to qubit Hamiltonian ({mapping})...")
+    with telemetry.stage("qubit_mapping") as stage:
+        qubit_ham = build_qubit_hamiltonian(h1_mo, h2_mo, data["nuclear_repulsion"], mapping)
+        qubit_ham_file = "h2_qubit_hamiltonian.npz"
+        qubit_ham.save(qubit_ham_file)
+        stage.record(mapping=mapping, n_qubits=qubit_ham.n_qubits, n_pauli_terms=qubit_ham.n_terms)
+        stage.arrays(pauli_x=qubit_ham.x, pauli_z=qubit_ham.z, pauli_coeffs=qubit_ham.coeffs)
+    print(f"Pauli terms: {qubit_ham.n_terms} on {qubit_ham.n_qubits} qubits ({qubit_ham.nbytes} bytes)")
+    print(f"Qubit Hamiltonian written to {qubit_ham_file}")
+
+    # Reduce the qubit count: frozen-core/active space, then Z2 tapering of the
+    # electron-number and spin parities (symmetries="all" adds point-group Z2s)
+    print("\nReducing qubit count (active space + Z2 tapering)...")
+    with telemetry.stage("reduction") as stage:
+        tapered_ham, reduction = reduce_hamiltonian(h1_mo, h2_mo, data["nuclear_repulsion"], n_elec,
+                                                    mapping, n_frozen, n_active, symmetries)
+        tapered_ham_file = "h2_qubit_hamiltonian_tapered.npz"
+        tapered_ham.save(tapered_ham_file)
+        stage.record(n_qubits_reduced=reduction["n_qubits_reduced"], n_pauli_terms_reduced=tapered_ham.n_terms)
+    with telemetry.stage("ground_energy") as stage:
+        tapered_energy = ground_energy(tapered_ham)
+        # With no frozen core the reference is the full FCI energy, otherwise CASCI
+        reference_energy = fci_energy if n_frozen == 0 and n_active is None else active_space_fci_energy(reduction)
+    tapering_ok = abs(tapered_energy - reference_energy) < 1e-8
+    print(f"Qubits: {reduction['n_qubits_original']} -> {reduction['n_qubits_reduced']} "
+          f"({reduction['n_symmetries_tapered']} symmetries tapered, sector {reduction['symmetry_sector']})")
+    print(f"Reduced Hamiltonian ground energy: {tapered_energy:.10f} Hartree "
+          f"(reference {reference_energy:.10f}, match: {tapering_ok})")
+    if not tapering_ok:
+        print("WARNING: Reduced Hamiltonian does not reproduce the reference energy!")
 
     # 5. Hamiltonian properties
     print("\nAnalyzing Hamiltonian properties...")
@@ -111,27 +175,46 @@ def main():
             "correlation_energy": float(fci_energy - hf_energy)
         },
         "hamiltonian": {
-            "n_qubits": n_spin_orbitals,  # Validation expects this field
+            "n_qubits": reduction["n_qubits_reduced"],  # Validation expects this field
             "h1_hermitian": bool(h1_hermitian),  # Validation expects this field
             "n_spin_orbitals": n_spin_orbitals,
             "n_spatial_orbitals": n_spatial_orbs,
             "one_electron_integrals_shape": list(h1_mo.shape),
-            "two_electron_integrals_shape": [n_spin_orbitals] * 4
+            "two_electron_integrals_shape": [n_spin_orbitals] * 4,
+            "two_electron_integrals_storage": h2_mo.symmetry,
+            "two_electron_integrals_packed_length": int(h2_mo.packed.size),
+            "qubit_mapping": mapping,
+            "n_pauli_terms": qubit_ham.n_terms,
+            "qubit_hamiltonian_file": qubit_ham_file,
+            "n_qubits_original": reduction["n_qubits_original"],
+            "n_qubits_reduced": reduction["n_qubits_reduced"],
+            "n_frozen_orbitals": reduction["n_frozen_orbitals"],
+            "n_active_orbitals": reduction["n_active_orbitals"],
+            "n_symmetries_tapered": reduction["n_symmetries_tapered"],
+            "n_pauli_terms_reduced": tapered_ham.n_terms,
+            "tapered_hamiltonian_file": tapered_ham_file,
+            "tapered_ground_energy_hartree": tapered_energy,
+            "tapering_matches_reference": bool(tapering_ok)
         },
         "implementation_details": {
             "method": "PySCF RHF + FCI",
             "pyscf_version": pyscf.__version__,
             "script_path": __file__,
-            "converged": bool(mf.converged)
+            "converged": bool(converged)
         }
     }
 
-    # 7. Write results to JSON file
-    output_file = "h2_results.json"
-    with open(output_file, "w") as f:
-        json.dump(results, f, indent=2, default=str)
+    # 7. Write results: HDF5 with the integrals, plus the JSON export
+    with telemetry.stage("write_results") as stage:
+        output_file = "h2_results.json"
+        save_results(output_file, results)
+        binary_file = "h2_results.h5"
+        save_results(binary_file, {**results, "integrals": {
+            "h1_ao": np.asarray(h1_ao), "eri_ao": np.asarray(h2_ao), "mo_coeff": np.asarray(mo_coeff),
+            "h1_mo": h1_mo, "eri_mo": h2_mo.packed}})
+        stage.record(json_bytes=os.path.getsize(output_file), h5_bytes=os.path.getsize(binary_file))
 
-    print(f"\nResults written to {output_file}")
+    print(f"\nResults written to {output_file} and {binary_file} (with integrals)")
 
     # 8. Print summary
     print("\n" + "="*50)
@@ -141,11 +224,12 @@ def main():
     print(f"HF energy: {hf_energy:.8f} Hartree")
     print(f"FCI energy: {fci_energy:.8f} Hartree")
     print(f"Correlation energy: {fci_energy - hf_energy:.8f} Hartree")
-    print(f"Number of qubits: {n_spin_orbitals}")
+    print(f"Number of qubits: {reduction['n_qubits_reduced']} (from {n_spin_orbitals} spin orbitals)")
     print(f"Hamiltonian Hermitian: {h1_hermitian}")
     print(f"Output file: {output_file}")
     print("="*50)
 
+    telemetry.close(status=0)
     return 0
 
 if __name__ == "__main__":
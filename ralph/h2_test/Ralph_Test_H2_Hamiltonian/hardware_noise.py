@@ -0,0 +1,318 @@
+#!/usr/bin/env python
+"""
+Noise-aware fidelity estimate and hardware penalty for RLQAS circuits.
+
+The reward in ideas_pool/RLQAS_20260127.md has Fidelity_Estimate and
+Hardware_Penalty terms computed from device calibration data. A calibration
+file (JSON) gives per-qubit single-qubit gate errors, per-edge CNOT errors on
+the coupling map, readout errors, and a crosstalk graph of CNOT edge pairs that
+pick up extra error when driven in the same layer:
+
+    {"n_qubits": 5,
+     "single_qubit_gate_error": {"rx": [...], "ry": [...], "rz": [...]},
+     "two_qubit_gate_error": [[0, 1, 0.012], [1, 2, 0.009], ...],
+     "readout_error": [...],
+     "crosstalk": [[[0, 1], [2, 3], 0.002], ...]}
+
+HardwareModel precomputes everything that needs a graph search once: all-pairs
+best routes (Floyd-Warshall on -log CNOT fidelities, a CNOT between uncoupled
+qubits being routed by SWAPs to a neighbour of the target and back), their SWAP
+counts and log-fidelities, plus per-qubit and per-edge log-fidelity tables.
+Scoring a circuit is then one pass of table lookups, O(gates), and
+FidelityTracker updates the score incrementally as an RL episode appends gates.
+
+The estimate is the product of (1 - error) over every physical operation; the
+penalty is the part of -log(fidelity) caused by routing SWAPs and crosstalk.
+
+Run this file directly to compare the estimate with a density-matrix
+simulation of the same depolarizing noise model on small circuits:
+    python hardware_noise.py
+"""
+
+import json
+import sys
+import time
+import numpy as np
+
+GATES_1Q = ("rx", "ry", "rz")
+
+def synthetic_calibration(n_qubits, topology="line", seed=0):
+    """Random but plausible calibration data for a line or square-grid device."""
+    rng = np.random.default_rng(seed)
+    if topology == "line":
+        edges = [(q, q + 1) for q in range(n_qubits - 1)]
+    elif topology == "grid":
+        width = int(np.ceil(np.sqrt(n_qubits)))
+        edges = [(q, q + 1) for q in range(n_qubits - 1) if (q + 1) % width]
+        edges += [(q, q + width) for q in range(n_qubits - width)]
+    else:
+        raise ValueError(f"Unknown topology '{topology}', expected 'line' or 'grid'")
+    # Crosstalk between disjoint edges joined by another edge (spectator couplings)
+    crosstalk = [[list(a), list(b), float(rng.uniform(1e-3, 5e-3))]
+                 for i, a in enumerate(edges) for b in edges[i + 1:]
+                 if not set(a) & set(b) and any({u, v} & set(a) and {u, v} & set(b) for u, v in edges)]
+    return {
+        "n_qubits": n_qubits,
+        "single_qubit_gate_error": {g: rng.uniform(1e-4, 1e-3, n_qubits).tolist() for g in GATES_1Q},
+        "two_qubit_gate_error": [[a, b, float(rng.uniform(5e-3, 2e-2))] for a, b in edges],
+        "readout_error": rng.uniform(1e-2, 3e-2, n_qubits).tolist(),
+        "crosstalk": crosstalk,
+    }
+
+def load_calibration(path):
+    with open(path, "r") as f:
+        return json.load(f)
+
+class HardwareModel:
+    """Calibration tables and precomputed routes for O(gates) circuit scoring."""
+
+    def __init__(self, calibration):
+        n = calibration["n_qubits"]
+        self.n_qubits = n
+        errors_1q = calibration["single_qubit_gate_error"]
+        if not isinstance(errors_1q, dict):
+            errors_1q = {g: errors_1q for g in GATES_1Q}
+        self.error_1q = np.array([errors_1q[g] for g in GATES_1Q], dtype=np.float64)
+        self.logf_1q = np.log1p(-self.error_1q)
+        self.readout_error = np.asarray(calibration.get("readout_error", np.zeros(n)), dtype=np.float64)
+        self.logf_readout = np.log1p(-self.readout_error)
+
+        self.error_cx = np.full((n, n), np.nan)
+        self.edge_id = np.full((n, n), -1, dtype=np.int64)
+        for i, (a, b, e) in enumerate(calibration["two_qubit_gate_error"]):
+            self.error_cx[a, b] = self.error_cx[b, a] = e
+            self.edge_id[a, b] = self.edge_id[b, a] = i
+        n_edges = len(calibration["two_qubit_gate_error"])
+        self.crosstalk = np.zeros((n_edges, n_edges))
+        for (a, b), (c, d), extra in calibration.get("crosstalk", []):
+            e1, e2 = self.edge_id[a, b], self.edge_id[c, d]
+            self.crosstalk[e1, e2] = self.crosstalk[e2, e1] = extra
+        self._precompute_routes()
+
+    @classmethod
+    def from_file(cls, path):
+        return cls(load_calibration(path))
+
+    def _precompute_routes(self):
+        """All-pairs best SWAP paths, then the best neighbour of each target to meet it at."""
+        n = self.n_qubits
+        cx_cost = np.full((n, n), np.inf)
+        coupled = ~np.isnan(self.error_cx)
+        cx_cost[coupled] = -np.log1p(-self.error_cx[coupled])
+        swap_cost = np.where(np.isfinite(cx_cost), 3 * cx_cost, np.inf)
+        np.fill_diagonal(swap_cost, 0.0)
+        hops = np.where(np.isfinite(swap_cost), 1, 0)
+        np.fill_diagonal(hops, 0)
+        next_hop = np.where(np.isfinite(swap_cost), np.arange(n)[None, :], -1)
+        for k in range(n):
+            through = swap_cost[:, k, None] + swap_cost[None, k, :]
+            better = through < swap_cost
+            swap_cost = np.where(better, through, swap_cost)
+            hops = np.where(better, hops[:, k, None] + hops[None, k, :], hops)
+            next_hop = np.where(better, next_hop[:, k, None], next_hop)
+        if not np.isfinite(swap_cost).all():
+            raise ValueError("Coupling map is not connected")
+        self.swap_distance = hops
+        self.next_hop = next_hop
+
+        # Route control c to neighbour k of target t, CNOT(k, t), and swap back
+        total = 2 * swap_cost[:, :, None] + cx_cost.T[None, :, :]     # [c, k, t]
+        self.meet = np.argmin(total, axis=1)
+        self.route_logf = -np.take_along_axis(total, self.meet[:, None, :], axis=1)[:, 0, :]
+        self.route_swaps = 2 * np.take_along_axis(hops, self.meet, axis=1)
+        self.route_swap_logf = -2 * np.take_along_axis(swap_cost, self.meet, axis=1)
+        np.fill_diagonal(self.route_logf, 0.0)
+
+    def route(self, control, target):
+        """Physical CNOT sequence for CNOT(control, target): SWAPs in, the CNOT, SWAPs back."""
+        meet = self.meet[control, target]
+        path = [control]
+        while path[-1] != meet:
+            path.append(int(self.next_hop[path[-1], meet]))
+        swaps = list(zip(path[:-1], path[1:]))
+        return swaps, (meet, target), swaps[::-1]
+
+    def tracker(self):
+        return FidelityTracker(self)
+
+    def estimate(self, circuit):
+        """Fidelity estimate and hardware penalty of a whole circuit (identity layout)."""
+        tracker = FidelityTracker(self)
+        for gate in circuit:
+            tracker.add(gate)
+        return tracker.summary()
+
+class FidelityTracker:
+    """Running log-fidelity of a circuit that grows one gate at a time."""
+
+    def __init__(self, model):
+        self.model = model
+        self.logf_gates = 0.0
+        self.logf_routing = 0.0
+        self.logf_crosstalk = 0.0
+        self.n_swaps = 0
+        self.level = np.zeros(model.n_qubits, dtype=np.int64)
+        self.layers = {}                 # ASAP level -> edge ids of the CNOTs in it
+        self.used = np.zeros(model.n_qubits, dtype=bool)
+        self.conflicts = []              # (level, edge, other edge, extra error) for reference sims
+
+    def add(self, gate):
+        m = self.model
+        if gate[0] != "cnot":
+            q = gate[1]
+            self.logf_gates += m.logf_1q[GATES_1Q.index(gate[0]), q]
+            self.level[q] += 1
+            self.used[q] = True
+            return self
+
+        c, t = gate[1], gate[2]
+        self.used[c] = self.used[t] = True
+        level = max(self.level[c], self.level[t]) + 1
+        self.level[c] = self.level[t] = level
+        edge = m.edge_id[c, t]
+        if edge < 0:
+            # Uncoupled pair: routed CNOT (its crosstalk is not tracked)
+            self.logf_gates += m.route_logf[c, t] - m.route_swap_logf[c, t]
+            self.logf_routing += m.route_swap_logf[c, t]
+            self.n_swaps += m.route_swaps[c, t]
+            return self
+
+        self.logf_gates += m.route_logf[c, t]
+        layer = self.layers.setdefault(level, [])
+        for other in layer:
+            extra = m.crosstalk[edge, other]
+            if extra:
+                # Both simultaneous CNOTs pick up the extra error
+                self.logf_crosstalk += 2 * np.log1p(-extra)
+                self.conflicts.append((level, edge, other, extra))
+        layer.append(edge)
+        return self
+
+    def summary(self):
+        m = self.model
+        logf_readout = float(m.logf_readout[self.used].sum())
+        logf_gates = self.logf_gates + self.logf_routing + self.logf_crosstalk
+        return {
+            "gate_fidelity": float(np.exp(logf_gates)),
+            "fidelity": float(np.exp(logf_gates + logf_readout)),
+            "hardware_penalty": float(-(self.logf_routing + self.logf_crosstalk)),
+            "n_swaps": int(self.n_swaps),
+            "n_crosstalk_conflicts": len(self.conflicts),
+            "depth": int(self.level.max(initial=0)),
+        }
+
+# Reference: exact density-matrix simulation of the same depolarizing noise model
+
+_PAULIS = (np.eye(2), np.array([[0, 1], [1, 0]]), np.array([[0, -1j], [1j, 0]]), np.diag([1.0, -1.0]))
+
+def _embed(ops, n):
+    """Full 2^n operator from {qubit: 2x2 matrix} (qubit k is bit k of the index)."""
+    full = np.array([[1.0]])
+    for q in reversed(range(n)):
+        full = np.kron(full, ops.get(q, _PAULIS[0]))
+    return full
+
+def _rotation(kind, theta):
+    c, s = np.cos(theta / 2), np.sin(theta / 2)
+    if kind == "rx":
+        return np.array([[c, -1j * s], [-1j * s, c]])
+    if kind == "ry":
+        return np.array([[c, -s], [s, c]])
+    return np.diag([np.exp(-1j * theta / 2), np.exp(1j * theta / 2)])
+
+def _cnot(control, target, n):
+    dim = 1 << n
+    index = np.arange(dim)
+    flipped = np.where((index >> control) & 1, index ^ (1 << target), index)
+    matrix = np.zeros((dim, dim))
+    matrix[flipped, index] = 1
+    return matrix
+
+def _depolarize(rho, qubits, p, n):
+    """(1 - p) rho + p / (4^k - 1) sum over non-identity Paulis on qubits."""
+    if p <= 0:
+        return rho
+    terms = [{}]
+    for q in qubits:
+        terms = [{**t, q: P} for t in terms for P in _PAULIS]
+    noisy = sum(_embed(t, n) @ rho @ _embed(t, n).conj().T for t in terms[1:])
+    return (1 - p) * rho + p / (len(terms) - 1) * noisy
+
+def density_matrix_fidelity(model, circuit, params, n_qubits):
+    """<psi_ideal| rho_noisy |psi_ideal> with depolarizing gate, SWAP and crosstalk noise."""
+    dim = 1 << n_qubits
+    psi = np.zeros(dim, dtype=complex)
+    psi[0] = 1
+    rho = np.outer(psi, psi.conj())
+    conflicts = {}
+    tracker = model.tracker()
+    for gate in circuit:
+        n_before = len(tracker.conflicts)
+        tracker.add(gate)
+        if gate[0] != "cnot":
+            unitary = _embed({gate[1]: _rotation(gate[0], params[gate[2]])}, n_qubits)
+            psi = unitary @ psi
+            rho = unitary @ rho @ unitary.conj().T
+            rho = _depolarize(rho, [gate[1]], model.error_1q[GATES_1Q.index(gate[0]), gate[1]], n_qubits)
+            continue
+
+        c, t = gate[1], gate[2]
+        psi = _cnot(c, t, n_qubits) @ psi
+        swaps_in, (a, b), swaps_out = model.route(c, t) if model.edge_id[c, t] < 0 else ([], (c, t), [])
+        physical = [(u, v) for u, v in swaps_in for u, v in ((u, v), (v, u), (u, v))]
+        physical.append((a, b))
+        physical += [(u, v) for u, v in swaps_out for u, v in ((u, v), (v, u), (u, v))]
+        for u, v in physical:
+            cx = _cnot(u, v, n_qubits)
+            rho = _depolarize(cx @ rho @ cx.T, [u, v], model.error_cx[u, v], n_qubits)
+        for level, edge, other, extra in tracker.conflicts[n_before:]:
+            for e in (edge, other):
+                u, v = np.argwhere(model.edge_id == e)[0]
+                rho = _depolarize(rho, [u, v], extra, n_qubits)
+    return float(np.real(psi.conj() @ rho @ psi))
+
+def random_circuit(n_qubits, n_gates, rng):
+    """Random Rx/Ry/Rz/CNOT circuit (any qubit pair, so routing is exercised) and its angles."""
+    circuit = []
+    for k in range(n_gates):
+        if rng.random() < 0.4:
+            c, t = rng.choice(n_qubits, 2, replace=False)
+            circuit.append(("cnot", int(c), int(t)))
+        else:
+            circuit.append((GATES_1Q[rng.integers(3)], int(rng.integers(n_qubits)), k))
+    return circuit, rng.uniform(-np.pi, np.pi, n_gates)
+
+def benchmark(qubit_counts=(3, 4, 5), gate_counts=(10, 20, 40), n_circuits=10, seed=0):
+    """Estimate vs density-matrix fidelity, and time per score, on line-topology devices."""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for n_qubits in qubit_counts:
+        model = HardwareModel(synthetic_calibration(n_qubits, "line", seed))
+        for n_gates in gate_counts:
+            circuits = [random_circuit(n_qubits, n_gates, rng) for _ in range(n_circuits)]
+            start = time.perf_counter()
+            estimates = [model.estimate(c)["gate_fidelity"] for c, _ in circuits]
+            estimate_time = (time.perf_counter() - start) / n_circuits
+            start = time.perf_counter()
+            exact = [density_matrix_fidelity(model, c, p, n_qubits) for c, p in circuits]
+            exact_time = (time.perf_counter() - start) / n_circuits
+            errors = np.abs(np.array(estimates) - np.array(exact))
+            rows.append({"n_qubits": n_qubits, "n_gates": n_gates, "mean_estimate": float(np.mean(estimates)),
+                         "mean_exact": float(np.mean(exact)), "max_abs_error": float(errors.max()),
+                         "estimate_time_s": estimate_time, "density_matrix_time_s": exact_time})
+    return rows
+
+def main():
+    print("Fidelity estimate vs density-matrix simulation (line topology, depolarizing noise)")
+    print("=" * 86)
+    print(f"{'qubits':>6} {'gates':>6} {'estimate':>9} {'exact':>9} {'max |err|':>10} "
+          f"{'estimate us':>12} {'density ms':>11} {'speedup':>9}")
+    for row in benchmark():
+        print(f"{row['n_qubits']:>6} {row['n_gates']:>6} {row['mean_estimate']:9.4f} {row['mean_exact']:9.4f} "
+              f"{row['max_abs_error']:10.4f} {row['estimate_time_s'] * 1e6:12.1f} "
+              f"{row['density_matrix_time_s'] * 1e3:11.2f} "
+              f"{row['density_matrix_time_s'] / row['estimate_time_s']:8.0f}x")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,177 @@
+#!/usr/bin/env python
+"""
+Content-addressed on-disk cache for molecular integrals and reference energies.
+
+Each molecule is keyed by a SHA-256 hash of (atoms, basis, unit, charge, spin,
+pyscf version, SCF settings). An entry is a directory holding one .npy file per
+array (h1/eri in the AO and MO bases, MO coefficients) plus a meta.json with the
+HF/FCI energies. Arrays are returned memory-mapped, so a hit costs a few file
+opens instead of integral generation, RHF and FCI.
+
+The cache is bounded in size: after every insert the least recently used entries
+are evicted until the total size is under the limit.
+
+Usage:
+    cache = IntegralCache()
+    data = cache.load_or_compute(mol, conv_tol=1e-12)
+    h1_mo, eri_mo = data["h1_mo"], data["eri_mo"]
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+from packed_eri import PackedERI
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    "RLQAS_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".integral_cache"))
+DEFAULT_MAX_BYTES = int(os.environ.get("RLQAS_CACHE_MAX_BYTES", 2 * 1024**3))
+
+ARRAY_NAMES = ("h1_ao", "eri_ao", "mo_coeff", "h1_mo", "eri_mo")
+META_FILE = "meta.json"
+# Bump when the stored layout changes so stale entries are never read back
+CACHE_FORMAT = 2
+
+def molecule_key(mol, **settings):
+    """Hash of everything that determines the integrals and energies of mol."""
+    import pyscf
+    atoms = [(symbol, [round(float(x), 10) for x in coords]) for symbol, coords in mol._atom]
+    payload = {
+        "atoms": atoms,
+        "basis": mol.basis,
+        "unit": mol.unit,
+        "charge": mol.charge,
+        "spin": mol.spin,
+        "pyscf_version": pyscf.__version__,
+        "cache_format": CACHE_FORMAT,
+        "settings": settings
+    }
+    blob = json.dumps(payload, sort_keys=True, default=str).encode()
+    return hashlib.sha256(blob).hexdigest()
+
+def compute_integrals(mol, conv_tol=1e-9):
+    """Run RHF + FCI and build AO/MO integrals for mol (the uncached path)."""
+    from pyscf import scf, fci, ao2mo
+    mf = scf.RHF(mol)
+    mf.conv_tol = conv_tol
+    mf.conv_tol_grad = conv_tol
+    hf_energy = mf.kernel()
+    davidson_steps = []
+    fci_energy, _ = fci.FCI(mf).kernel(callback=lambda env: davidson_steps.append(1))
+
+    mo_coeff = mf.mo_coeff
+    norb = mo_coeff.shape[1]
+    h1_ao = mf.get_hcore()
+    eri_ao = mol.intor("int2e", aosym="s8")
+    arrays = {
+        "h1_ao": h1_ao,
+        "eri_ao": eri_ao,                                     # 8-fold packed
+        "mo_coeff": mo_coeff,
+        "h1_mo": np.einsum("pi,pq,qj->ij", mo_coeff, h1_ao, mo_coeff),
+        # In-core transform of the packed AO integrals, repacked to 8-fold
+        "eri_mo": PackedERI.from_any(ao2mo.full(eri_ao, mo_coeff), norb).packed,
+    }
+    meta = {
+        "hf_hartree": float(hf_energy),
+        "fci_hartree": float(fci_energy),
+        "converged": bool(mf.converged),
+        "scf_cycles": int(mf.cycles),
+        # 0 when the FCI space was small enough to be diagonalized directly
+        "fci_iterations": len(davidson_steps),
+        "n_spatial_orbitals": int(norb),
+        "n_electrons": int(mol.nelectron),
+        "nuclear_repulsion": float(mol.energy_nuc())
+    }
+    return arrays, meta
+
+class IntegralCache:
+    """Size-bounded LRU cache of integral/energy entries under cache_dir."""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _entry_dir(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    def get(self, key):
+        """Return the cached entry (memory-mapped arrays + meta) or None."""
+        entry_dir = self._entry_dir(key)
+        meta_path = os.path.join(entry_dir, META_FILE)
+        if not os.path.exists(meta_path):
+            self.misses += 1
+            return None
+
+        with open(meta_path, "r") as f:
+            data = json.load(f)
+        for name in data.pop("arrays", ARRAY_NAMES):
+            data[name] = np.load(os.path.join(entry_dir, f"{name}.npy"), mmap_mode="r")
+
+        # Touch the entry so eviction sees it as recently used
+        os.utime(meta_path)
+        self.hits += 1
+        return data
+
+    def put(self, key, arrays, meta):
+        """Store an entry atomically, then evict old entries if over the size limit.
+
+        Integral entries hold ARRAY_NAMES; other users (e.g. adapt_vqe.py) may
+        store any set of named arrays, listed in the entry's meta.
+        """
+        tmp_dir = tempfile.mkdtemp(dir=self.cache_dir, prefix=".tmp-")
+        for name, array in arrays.items():
+            np.save(os.path.join(tmp_dir, f"{name}.npy"), np.ascontiguousarray(array))
+        with open(os.path.join(tmp_dir, META_FILE), "w") as f:
+            json.dump({**meta, "arrays": list(arrays)}, f, indent=2)
+
+        try:
+            os.rename(tmp_dir, self._entry_dir(key))
+        except OSError:
+            # Another process stored the same entry first; its content is identical
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        self.evict()
+
+    def entries(self):
+        """List (last_access, size_bytes, key) for every complete entry."""
+        result = []
+        for key in os.listdir(self.cache_dir):
+            entry_dir = self._entry_dir(key)
+            meta_path = os.path.join(entry_dir, META_FILE)
+            if key.startswith(".") or not os.path.exists(meta_path):
+                continue
+            size = sum(os.path.getsize(os.path.join(entry_dir, name)) for name in os.listdir(entry_dir))
+            result.append((os.path.getmtime(meta_path), size, key))
+        return result
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits in max_bytes."""
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        evicted = []
+        for _, size, key in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+            total -= size
+            evicted.append(key)
+        return evicted
+
+    def load_or_compute(self, mol, conv_tol=1e-9):
+        """Return cached integrals/energies for mol, computing and storing them on a miss."""
+        key = molecule_key(mol, conv_tol=conv_tol)
+        data = self.get(key)
+        if data is not None:
+            data["cache_hit"] = True
+            return data
+
+        arrays, meta = compute_integrals(mol, conv_tol)
+        meta["created"] = time.time()
+        self.put(key, arrays, meta)
+        return {**arrays, **meta, "cache_hit": False}
@@ -0,0 +1,336 @@
+#!/usr/bin/env python
+"""
+Measurement grouping of qubit Hamiltonian terms into jointly measurable sets.
+
+Terms that qubit-wise commute (QWC: on every qubit both act with the same
+Pauli or one acts trivially) share a measurement basis of single-qubit
+rotations; terms that merely commute share a basis reached by a Clifford
+circuit. Both relations are evaluated on the packed X/Z masks for all pairs at
+once, and groups are a greedy largest-degree-first colouring of the conflict
+graph (pairs that cannot share a group).
+
+Each MeasurementGroup carries its diagonalizing circuit in the RLQAS gate
+format (fixed angles +-pi/2, so statevector.apply_gate runs it) and, for every
+term, the Z mask and sign it becomes after the circuit: measuring the rotated
+state in the computational basis then yields all of the group's terms at once.
+For simulation the group's terms are also folded into one diagonal, so an
+energy costs the groups' circuits (shared prefixes applied once) plus one dot
+product per group.
+
+Usage:
+    grouped = group_measurements(ham, "qwc")      # or "commuting"
+    grouped.n_groups, grouped.groups[0].circuit
+    grouped.energy(state)
+
+Run this file directly for group counts and energy-evaluation speedups:
+    python measurement_grouping.py
+"""
+
+import sys
+import time
+import numpy as np
+from qubit_hamiltonian import PauliSum, pack_bits, unpack_bits
+from statevector import apply_gate
+
+# "term" puts every term in its own group: the per-term baseline
+GROUPINGS = ("term", "qwc", "commuting")
+CHUNK_ROWS = 512
+# Parameter table for diagonalizing circuits: index 0 is +pi/2, index 1 is -pi/2
+ANGLES = np.array([np.pi / 2, -np.pi / 2])
+
+def conflict_matrix(ham, kind="qwc"):
+    """(n_terms, n_terms) boolean matrix, True where two terms cannot be measured together."""
+    if kind not in GROUPINGS:
+        raise ValueError(f"Unknown grouping '{kind}', expected one of {GROUPINGS}")
+    n = ham.n_terms
+    if kind == "term":
+        return ~np.eye(n, dtype=bool)
+    conflict = np.empty((n, n), dtype=bool)
+    for start in range(0, n, CHUNK_ROWS):
+        rows = slice(start, start + CHUNK_ROWS)
+        # Bit k set where the two strings anticommute on qubit k
+        anti = (ham.x[rows, None, :] & ham.z[None, :, :]) ^ (ham.z[rows, None, :] & ham.x[None, :, :])
+        if kind == "qwc":
+            conflict[rows] = anti.any(axis=-1)
+        else:
+            conflict[rows] = np.bitwise_count(anti).sum(axis=-1) & 1
+    return conflict
+
+def color_graph(conflict):
+    """Greedy largest-degree-first colouring; returns one colour per vertex."""
+    n = len(conflict)
+    colors = np.full(n, -1, dtype=np.int64)
+    free = np.ones(n + 1, dtype=bool)
+    for v in np.argsort(-conflict.sum(axis=1), kind="stable"):
+        used = colors[conflict[v]]
+        used = used[used >= 0]
+        free[used] = False
+        colors[v] = np.argmax(free)
+        free[used] = True
+    return colors
+
+class _Tableau:
+    """Pauli strings as unpacked x/z bits and signs, conjugated gate by gate (P -> U P U^dagger)."""
+
+    def __init__(self, x, z):
+        self.x = x.copy()
+        self.z = z.copy()
+        self.sign = np.zeros(len(x), dtype=np.uint8)
+        self.circuit = []
+
+    def ry(self, q, angle=0):
+        # Ry(+pi/2): X -> -Z, Z -> X; Ry(-pi/2): X -> Z, Z -> -X
+        x, z = self.x[:, q].copy(), self.z[:, q].copy()
+        self.sign ^= (x & (1 - z)) if angle == 0 else (z & (1 - x))
+        self.x[:, q], self.z[:, q] = z, x
+        self.circuit.append(("ry", q, angle))
+
+    def rx(self, q):
+        # Rx(+pi/2): Y -> Z, Z -> -Y
+        self.sign ^= self.z[:, q] & (1 - self.x[:, q])
+        self.x[:, q] ^= self.z[:, q]
+        self.circuit.append(("rx", q, 0))
+
+    def rz(self, q):
+        # Rz(+pi/2): X -> Y, Y -> -X
+        self.sign ^= self.x[:, q] & self.z[:, q]
+        self.z[:, q] ^= self.x[:, q]
+        self.circuit.append(("rz", q, 0))
+
+    def cnot(self, c, t):
+        x, z = self.x, self.z
+        self.sign ^= x[:, c] & z[:, t] & (x[:, t] ^ z[:, c] ^ 1)
+        x[:, t] ^= x[:, c]
+        z[:, c] ^= z[:, t]
+        self.circuit.append(("cnot", c, t))
+
+def _diagonalize_qwc(tableau):
+    """One rotation per qubit: X measured via Ry(-pi/2), Y via Rx(+pi/2)."""
+    for q in range(tableau.x.shape[1]):
+        if not tableau.x[:, q].any():
+            continue
+        if tableau.z[:, q].any():
+            tableau.rx(q)
+        else:
+            tableau.ry(q, 1)
+
+def _diagonalize_commuting(tableau):
+    """Clifford circuit mapping commuting strings to Z strings, one generator at a time.
+
+    Each independent string is reduced to X or Y on a fresh pivot qubit by
+    CNOTs and Ry-CNOT-Ry (CZ-like) steps on the not-yet-pivoted qubits, then
+    rotated to Z there (a Z string only needs CNOTs onto its pivot). Earlier
+    generators are Z on their pivots only, so the later gates (all on free
+    qubits) leave them untouched.
+    """
+    n_qubits = tableau.x.shape[1]
+    free = np.ones(n_qubits, dtype=bool)
+    for term in range(len(tableau.x)):
+        x, z = tableau.x[term], tableau.z[term]
+        if not (x[free].any() or z[free].any()):
+            continue                                   # product of earlier generators
+        if not x[free].any():
+            # Z string: fold it onto one pivot with CNOTs, no rotation needed
+            pivot, *others = np.flatnonzero(free & (z == 1))
+            for q in others:
+                tableau.cnot(int(q), int(pivot))
+            free[pivot] = False
+            continue
+        pivot = int(np.flatnonzero(free & (x == 1))[0])
+        for q in np.flatnonzero(free & (x == 1)):
+            if q != pivot:
+                tableau.cnot(pivot, int(q))
+        for q in np.flatnonzero(free & (z == 1)):
+            if q != pivot:
+                tableau.ry(int(q))
+                tableau.cnot(pivot, int(q))
+                tableau.ry(int(q), 1)
+        if z[pivot]:
+            tableau.rz(pivot)
+        tableau.ry(pivot)
+        free[pivot] = False
+    assert not tableau.x.any(), "Group is not mutually commuting"
+
+class MeasurementGroup:
+    """Jointly measurable terms with their diagonalizing circuit and rotated Z masks."""
+
+    def __init__(self, n_qubits, terms, coeffs, x, z, kind):
+        tableau = _Tableau(unpack_bits(x, n_qubits), unpack_bits(z, n_qubits))
+        if kind != "commuting":
+            # Per-qubit measurement basis of a QWC group, e.g. "XZIY"
+            self.basis = "".join("IZXY"[2 * bx.any() + bz.any()] for bx, bz in zip(tableau.x.T, tableau.z.T))
+            _diagonalize_qwc(tableau)
+        else:
+            self.basis = None
+            _diagonalize_commuting(tableau)
+        self.terms = terms
+        self.circuit = tableau.circuit
+        self.z_masks = pack_bits(tableau.z)[:, 0] if n_qubits <= 64 else pack_bits(tableau.z)
+        self.signs = 1 - 2 * tableau.sign.astype(np.int8)
+        self.coeffs = coeffs
+
+    def diagonal(self, n_qubits):
+        """Group observable after the circuit, as a diagonal over the 2^n basis states."""
+        states = np.arange(1 << n_qubits, dtype=np.uint64)
+        parity = np.bitwise_count(states[None, :] & self.z_masks[:, None]) & 1
+        return (self.coeffs * self.signs) @ (1 - 2 * parity.astype(np.int8))
+
+    def term_values(self, bitstrings):
+        """Eigenvalue (+-1, sign included) of every term for measured basis states (shots)."""
+        parity = np.bitwise_count(np.asarray(bitstrings, dtype=np.uint64)[:, None] & self.z_masks[None, :]) & 1
+        return self.signs * (1 - 2 * parity.astype(np.int8))
+
+class GroupedHamiltonian:
+    """A PauliSum split into measurement groups plus the identity (constant) term."""
+
+    def __init__(self, ham, kind="qwc"):
+        self.ham = ham
+        self.kind = kind
+        self.n_qubits = ham.n_qubits
+        identity = ~(ham.x.any(axis=1) | ham.z.any(axis=1))
+        self.constant = float(ham.coeffs[identity].sum())
+        active = np.flatnonzero(~identity)
+        sub = PauliSum(ham.n_qubits, ham.x[active], ham.z[active], ham.coeffs[active])
+        colors = color_graph(conflict_matrix(sub, kind))
+        self.groups = []
+        for color in range(colors.max(initial=-1) + 1):
+            members = np.flatnonzero(colors == color)
+            self.groups.append(MeasurementGroup(ham.n_qubits, active[members], sub.coeffs[members],
+                                                sub.x[members], sub.z[members], kind))
+        self._diagonals = None
+
+    @property
+    def n_groups(self):
+        return len(self.groups)
+
+    def _trie(self):
+        """Group circuits merged on common gate prefixes: node = [children by gate, groups ending here]."""
+        root = [{}, []]
+        for index, group in enumerate(self.groups):
+            node = root
+            for gate in group.circuit:
+                node = node[0].setdefault(gate, [{}, []])
+            node[1].append(index)
+        return root
+
+    def _rotated_probabilities(self, state):
+        """Yield (group index, basis-state probabilities after its circuit) for a (batch, 2^n) state.
+
+        Group circuits are walked depth first over their shared gate prefixes,
+        so a prefix common to several groups is applied once.
+        """
+        if self._diagonals is None:
+            self._diagonals = [g.diagonal(self.n_qubits) for g in self.groups]
+            self._root = self._trie()
+        scratch = (np.empty(state.size // 2, dtype=np.complex128), np.empty(state.size // 2, dtype=np.complex128))
+        params = np.broadcast_to(ANGLES, (len(state), len(ANGLES)))
+        buffers = []
+
+        def visit(node, work, depth):
+            if node[1]:
+                probs = work.real**2 + work.imag**2
+                for index in node[1]:
+                    yield index, probs
+            children = list(node[0].items())
+            for k, (gate, child) in enumerate(children):
+                if k < len(children) - 1:
+                    # Siblings still need this state: branch into the buffer for this depth
+                    if len(buffers) <= depth:
+                        buffers.append(np.empty_like(state))
+                    work_child, child_depth = buffers[depth], depth + 1
+                    np.copyto(work_child, work)
+                else:
+                    work_child, child_depth = work, depth
+                apply_gate(work_child, gate, params, scratch)
+                yield from visit(child, work_child, child_depth)
+
+        yield from visit(self._root, state.copy(), 0)
+
+    def energy(self, state):
+        """Exact <H> of a (2^n,) or (batch, 2^n) state: one dot product per group."""
+        single = state.ndim == 1
+        state = np.atleast_2d(state)
+        energy = np.full(len(state), self.constant)
+        for index, probs in self._rotated_probabilities(state):
+            energy += probs @ self._diagonals[index]
+        return float(energy[0]) if single else energy
+
+    def sampled_energy(self, state, shots, rng=None):
+        """Shot-based <H> of a (2^n,) state: shots measurements per group, all its terms read from each."""
+        rng = np.random.default_rng(rng)
+        energy = self.constant
+        for index, probs in self._rotated_probabilities(np.atleast_2d(state)):
+            group = self.groups[index]
+            cumulative = np.cumsum(probs[0])
+            bitstrings = np.searchsorted(cumulative, rng.random(shots) * cumulative[-1])
+            energy += group.coeffs @ group.term_values(bitstrings).mean(axis=0)
+        return float(energy)
+
+def group_measurements(ham, kind="qwc"):
+    return GroupedHamiltonian(ham, kind)
+
+def per_term_energy(ham, state):
+    """Reference <H>: every Pauli term applied to the state separately."""
+    states = np.arange(len(state), dtype=np.uint64)
+    energy = 0.0
+    for x, z, c in zip(ham.x[:, 0], ham.z[:, 0], ham.coeffs):
+        phase = 1j ** (int(np.bitwise_count(x & z)) % 4)
+        signs = 1 - 2 * (np.bitwise_count(states & z) & 1).astype(np.int8)
+        energy += c * (phase * np.vdot(state[states ^ x], signs * state)).real
+    return energy
+
+def benchmark(shots=1000, n_repeats=3, seed=0):
+    """Group counts and <H> time (exact and shot-based) per grouping for STO-3G molecules."""
+    from pyscf import gto
+    from integral_cache import IntegralCache
+    from packed_eri import PackedERI
+    from qubit_hamiltonian import build_qubit_hamiltonian
+
+    molecules = [("H2", "H 0 0 0; H 0 0 0.74"), ("LiH", "Li 0 0 0; H 0 0 1.6"),
+                 ("BeH2", "Be 0 0 0; H 0 0 1.33; H 0 0 -1.33"),
+                 ("H2O", "O 0 0 0; H 0.757 0.586 0; H -0.757 0.586 0")]
+    rng = np.random.default_rng(seed)
+    rows = []
+    for name, atom in molecules:
+        data = IntegralCache().load_or_compute(gto.M(atom=atom, basis="sto-3g", verbose=0))
+        norb = data["mo_coeff"].shape[1]
+        ham = build_qubit_hamiltonian(np.asarray(data["h1_mo"]), PackedERI(np.asarray(data["eri_mo"]), norb),
+                                      data["nuclear_repulsion"])
+        state = rng.normal(size=1 << ham.n_qubits) + 1j * rng.normal(size=1 << ham.n_qubits)
+        state /= np.linalg.norm(state)
+        reference = per_term_energy(ham, state)
+        for kind in GROUPINGS:
+            start = time.perf_counter()
+            grouped = group_measurements(ham, kind)
+            grouped.energy(state)                     # builds the diagonals and prefix trie
+            setup_time = time.perf_counter() - start
+            start = time.perf_counter()
+            for _ in range(n_repeats):
+                energy = grouped.energy(state)
+            exact_time = (time.perf_counter() - start) / n_repeats
+            start = time.perf_counter()
+            sampled = grouped.sampled_energy(state, shots, rng)
+            sampled_time = time.perf_counter() - start
+            rows.append({"molecule": name, "n_qubits": ham.n_qubits, "n_terms": ham.n_terms, "grouping": kind,
+                         "n_groups": grouped.n_groups, "n_gates": sum(len(g.circuit) for g in grouped.groups),
+                         "setup_s": setup_time, "exact_s": exact_time, "sampled_s": sampled_time,
+                         "exact_error": abs(energy - reference), "sampled_error": abs(sampled - reference)})
+    return rows
+
+def main():
+    print("Measurement grouping (STO-3G, Jordan-Wigner; 'term' = one setting per Pauli term)")
+    print("=" * 110)
+    print(f"{'molecule':>8} {'qubits':>6} {'terms':>6} {'grouping':>10} {'groups':>7} {'gates':>6} "
+          f"{'setup s':>8} {'exact ms':>9} {'1000-shot ms':>13} {'speedup':>8} {'|dE| exact':>11} {'|dE| shots':>11}")
+    baseline = {}
+    for row in benchmark():
+        if row["grouping"] == "term":
+            baseline[row["molecule"]] = row["sampled_s"]
+        print(f"{row['molecule']:>8} {row['n_qubits']:>6} {row['n_terms']:>6} {row['grouping']:>10} "
+              f"{row['n_groups']:>7} {row['n_gates']:>6} {row['setup_s']:8.2f} {row['exact_s'] * 1e3:9.2f} "
+              f"{row['sampled_s'] * 1e3:13.2f} {baseline[row['molecule']] / row['sampled_s']:7.1f}x "
+              f"{row['exact_error']:11.1e} {row['sampled_error']:11.1e}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
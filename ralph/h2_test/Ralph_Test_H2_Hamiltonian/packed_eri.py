@@ -0,0 +1,172 @@
+#!/usr/bin/env python
+"""
+Symmetry-packed two-electron integrals with lazy element and slice access.
+
+Real MO integrals (pq|rs) have 8-fold permutational symmetry. PySCF stores them
+either 4-fold packed (a 2D [npair, npair] array, as returned by ao2mo.full) or
+8-fold packed (a 1D array of length npair*(npair+1)/2), with npair = n(n+1)/2.
+Expanding to the full n^4 tensor with ao2mo.restore(1, ...) costs ~8x the
+memory, which is negligible for H2 but dominates the LiH/BeH2/H2O active spaces.
+
+PackedERI keeps the packed array and maps 4-index requests onto it, so callers
+can write eri[p, q, r, s] or eri[p, :, r, :] and only the requested block is
+materialized. Index lists select orthogonally (like np.ix_), so
+eri[[0, 1], :, [2, 3], 0] has shape (2, n, 2).
+
+Run this file directly to report the peak memory saved on sample molecules:
+    python packed_eri.py
+"""
+
+import sys
+import tracemalloc
+import numpy as np
+
+def pair_index(i, j):
+    """Packed lower-triangle index of the unordered pair (i, j)."""
+    i, j = np.maximum(i, j), np.minimum(i, j)
+    return i * (i + 1) // 2 + j
+
+class PackedERI:
+    """Read-only 4-index view over s8 (1D) or s4 (2D) packed integrals."""
+
+    def __init__(self, packed, norb):
+        self.norb = norb
+        self.npair = norb * (norb + 1) // 2
+        packed = np.asarray(packed)
+        if packed.ndim == 1 and packed.size == self.npair * (self.npair + 1) // 2:
+            self.symmetry = "s8"
+        elif packed.shape == (self.npair, self.npair):
+            self.symmetry = "s4"
+        else:
+            raise ValueError(f"Packed ERI of shape {packed.shape} does not match s8 or s4 "
+                             f"storage for {norb} orbitals")
+        self.packed = packed
+
+    @classmethod
+    def from_any(cls, eri, norb, symmetry="s8"):
+        """Build from PySCF integrals in any storage (s1/s4/s8), repacked to symmetry."""
+        from pyscf import ao2mo
+        return cls(ao2mo.restore(symmetry, np.asarray(eri), norb), norb)
+
+    @property
+    def shape(self):
+        """Logical (unpacked) shape."""
+        return (self.norb,) * 4
+
+    @property
+    def nbytes(self):
+        return self.packed.nbytes
+
+    @property
+    def full_nbytes(self):
+        """Bytes the equivalent ao2mo.restore(1, ...) tensor would take."""
+        return self.norb**4 * self.packed.itemsize
+
+    def _lookup(self, p, q, r, s):
+        """Gather (pq|rs) for broadcastable integer index arrays."""
+        pq = pair_index(p, q)
+        rs = pair_index(r, s)
+        if self.symmetry == "s8":
+            return self.packed[pair_index(pq, rs)]
+        return self.packed[pq, rs]
+
+    def __getitem__(self, key):
+        if not isinstance(key, tuple) or len(key) != 4:
+            raise IndexError("PackedERI needs exactly four indices, e.g. eri[p, q, r, s]")
+
+        if all(isinstance(k, (int, np.integer)) for k in key):
+            return float(self._lookup(*(self._orbital(k) for k in key)))
+
+        # Every key goes through arange(norb) so negative indices wrap and
+        # out-of-range ones raise, as they would on the full tensor
+        orbitals = np.arange(self.norb)
+        axes = []
+        squeeze = []
+        for dim, k in enumerate(key):
+            if isinstance(k, (int, np.integer)):
+                axes.append(np.array([self._orbital(k)]))
+                squeeze.append(dim)
+            else:
+                axes.append(orbitals[k if isinstance(k, slice) else np.asarray(k)])
+        block = self._lookup(*np.ix_(*axes))
+        return block.squeeze(axis=tuple(squeeze)) if squeeze else block
+
+    def _orbital(self, k):
+        """Normalize one integer index (negative counts from the end)."""
+        k = int(k)
+        if not -self.norb <= k < self.norb:
+            raise IndexError(f"Orbital index {k} out of range for {self.norb} orbitals")
+        return k % self.norb
+
+    def to_full(self):
+        """Materialize the full n^4 tensor (only for small systems or debugging)."""
+        from pyscf import ao2mo
+        return ao2mo.restore(1, self.packed, self.norb)
+
+# Molecules from the RLQAS roadmap (equilibrium geometries, Å)
+SAMPLE_MOLECULES = {
+    "H2": "H 0 0 0; H 0 0 0.74",
+    "LiH": "Li 0 0 0; H 0 0 1.595",
+    "BeH2": "Be 0 0 0; H 0 0 1.326; H 0 0 -1.326",
+    "H2O": "O 0 0 0; H 0.757 0.586 0; H -0.757 0.586 0",
+}
+
+def _peak_bytes(func):
+    """Run func() and return (result, peak traced allocation in bytes)."""
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    result = func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, peak
+
+def memory_report(molecules=SAMPLE_MOLECULES, bases=("sto-3g", "6-31g", "cc-pvdz", "cc-pvtz")):
+    """Peak memory of the AO->MO transform with full restore vs s8-packed storage.
+
+    Both paths start from the 8-fold packed AO integrals (what the integral
+    cache holds), so the peak reflects the transform and the stored result.
+    """
+    from pyscf import gto, scf, ao2mo
+
+    rows = []
+    for name, atom in molecules.items():
+        for basis in bases:
+            mol = gto.M(atom=atom, basis=basis, unit="angstrom", verbose=0)
+            mf = scf.RHF(mol)
+            mf.kernel()
+            norb = mf.mo_coeff.shape[1]
+            eri_ao = mol.intor("int2e", aosym="s8")
+
+            full, full_peak = _peak_bytes(
+                lambda: ao2mo.restore(1, ao2mo.full(eri_ao, mf.mo_coeff), norb))
+            packed, packed_peak = _peak_bytes(
+                lambda: PackedERI.from_any(ao2mo.full(eri_ao, mf.mo_coeff), norb))
+
+            # Spot-check the lazy accessor against the full tensor
+            assert np.allclose(packed[:, 0, :, norb - 1], full[:, 0, :, norb - 1])
+            rows.append({
+                "molecule": name,
+                "basis": basis,
+                "n_orbitals": norb,
+                "full_bytes": full.nbytes,
+                "packed_bytes": packed.nbytes,
+                "full_peak_bytes": full_peak,
+                "packed_peak_bytes": packed_peak,
+            })
+            del full, packed
+    return rows
+
+def main():
+    print("Two-electron integral storage: full restore(1) vs s8-packed")
+    print("=" * 78)
+    print(f"{'molecule':>8} {'basis':>8} {'norb':>5} {'full MB':>9} {'s8 MB':>8} "
+          f"{'peak full MB':>13} {'peak s8 MB':>11} {'saved':>7}")
+    for row in memory_report():
+        saved = 1 - row["packed_peak_bytes"] / row["full_peak_bytes"]
+        print(f"{row['molecule']:>8} {row['basis']:>8} {row['n_orbitals']:>5} "
+              f"{row['full_bytes'] / 1e6:9.3f} {row['packed_bytes'] / 1e6:8.3f} "
+              f"{row['full_peak_bytes'] / 1e6:13.3f} {row['packed_peak_bytes'] / 1e6:11.3f} {saved:7.1%}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,190 @@
+#!/usr/bin/env python
+"""
+Prefix-state cache for sequential RLQAS gate additions.
+
+Each RL step appends one gate (add_Rx, add_Ry, add_Rz, add_CNOT) to the previous
+circuit. Instead of replaying the whole circuit from the initial state, the
+statevector after every evaluated circuit is kept in a bounded LRU cache keyed
+by the circuit prefix with its bound angles. An append then restarts from the
+cached parent state and costs one gate application; prefixes shared between
+episodes (same opening gates) are hits as well.
+
+Keys are chained 64-bit hashes computed in one pass over the circuit, and every
+hit is confirmed against the stored gate tuple, so a hash collision can only
+cost a miss.
+
+Usage:
+    evaluator = PrefixCachedEvaluator(ham, initial_bits=hf_state)
+    energy = evaluator.energy(circuit, params)   # circuit grows by one gate per step
+    evaluator.stats()
+
+Run this file directly to compare step latency with full replay:
+    python prefix_cache.py
+"""
+
+import sys
+import time
+from collections import OrderedDict
+import numpy as np
+from statevector import ROTATIONS, StatevectorEvaluator, apply_gate
+
+DEFAULT_MAX_BYTES = 256 * 1024**2
+
+def bind_gates(circuit, params):
+    """Circuit gates with their rotation angles substituted: ("ry", q, theta) / ("cnot", c, t)."""
+    return [(g[0], g[1], float(params[g[2]])) if g[0] in ROTATIONS else tuple(g) for g in circuit]
+
+def prefix_keys(bound):
+    """Chained hash of every prefix: keys[k] identifies bound[:k + 1]."""
+    keys = []
+    key = 0
+    for gate in bound:
+        key = hash((key, gate))
+        keys.append(key)
+    return keys
+
+class PrefixStateCache:
+    """LRU map from circuit prefix to (statevector, energy), bounded by total state bytes."""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def longest_prefix(self, bound, keys):
+        """(length, state, energy) of the longest cached prefix of bound, or (0, None, None)."""
+        for k in range(len(keys) - 1, -1, -1):
+            entry = self._entries.get(keys[k])
+            if entry is not None and entry[0] == tuple(bound[:k + 1]):
+                self._entries.move_to_end(keys[k])
+                self.hits += 1
+                return k + 1, entry[1], entry[2]
+        self.misses += 1
+        return 0, None, None
+
+    def put(self, key, gates, state, energy):
+        """Store a copy of state for the prefix gates, evicting least recently used entries."""
+        if state.nbytes > self.max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.nbytes -= old[1].nbytes
+        self._entries[key] = (tuple(gates), state.copy(), energy)
+        self.nbytes += state.nbytes
+        while self.nbytes > self.max_bytes:
+            _, (_, evicted, _) = self._entries.popitem(last=False)
+            self.nbytes -= evicted.nbytes
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+        self.nbytes = 0
+
+class PrefixCachedEvaluator:
+    """StatevectorEvaluator that resumes from the longest cached circuit prefix."""
+
+    def __init__(self, ham, initial_bits=0, max_bytes=DEFAULT_MAX_BYTES):
+        self.evaluator = StatevectorEvaluator(ham, initial_bits=initial_bits)
+        self.cache = PrefixStateCache(max_bytes)
+        self.gates_applied = 0
+        self.gates_skipped = 0
+        self.n_steps = 0
+        self.total_time = 0.0
+
+    def energy(self, circuit, params=()):
+        """Energy of circuit at params (one parameter vector)."""
+        start = time.perf_counter()
+        params = np.asarray(params, dtype=np.float64)
+        bound = bind_gates(circuit, params)
+        keys = prefix_keys(bound)
+        length, cached, energy = self.cache.longest_prefix(bound, keys)
+
+        if length < len(bound) or energy is None:
+            state = self.evaluator.reset(1)
+            if cached is not None:
+                state[0] = cached
+            for gate in circuit[length:]:
+                apply_gate(state, gate, params[None, :], self.evaluator._scratch)
+            energy = float(self.evaluator.expectation(state)[0])
+            if bound:
+                self.cache.put(keys[-1], bound, state[0], energy)
+
+        self.gates_skipped += length
+        self.gates_applied += len(bound) - length
+        self.n_steps += 1
+        self.total_time += time.perf_counter() - start
+        return energy
+
+    def stats(self):
+        """Hit rate, gate savings and mean step latency since construction."""
+        lookups = self.cache.hits + self.cache.misses
+        total_gates = self.gates_applied + self.gates_skipped
+        return {
+            "steps": self.n_steps,
+            "hit_rate": self.cache.hits / lookups if lookups else 0.0,
+            "gates_applied": self.gates_applied,
+            "gates_skipped": self.gates_skipped,
+            "gate_reuse_fraction": self.gates_skipped / total_gates if total_gates else 0.0,
+            "cached_prefixes": len(self.cache),
+            "cache_bytes": self.cache.nbytes,
+            "evictions": self.cache.evictions,
+            "mean_step_latency_s": self.total_time / self.n_steps if self.n_steps else 0.0,
+        }
+
+def random_episodes(n_qubits, n_episodes, max_gates, seed=0, n_angles=8):
+    """RL-like episodes: each step appends a random Rx/Ry/Rz/CNOT from a discretized action set."""
+    rng = np.random.default_rng(seed)
+    angles = np.linspace(-np.pi, np.pi, n_angles, endpoint=False)
+    for _ in range(n_episodes):
+        circuit, params = [], []
+        for _ in range(rng.integers(1, max_gates + 1)):
+            action = rng.integers(4)
+            if action == 3:
+                c, t = rng.choice(n_qubits, 2, replace=False)
+                circuit.append(("cnot", int(c), int(t)))
+            else:
+                circuit.append((ROTATIONS[action], int(rng.integers(n_qubits)), len(params)))
+                params.append(angles[rng.integers(n_angles)])
+            yield list(circuit), np.array(params)
+
+def benchmark(n_episodes=300, max_gates=20, max_bytes=DEFAULT_MAX_BYTES):
+    """Step latency of full replay vs prefix-cached evaluation on random RL episodes."""
+    from statevector import _benchmark_hamiltonians
+
+    rows = []
+    for n_qubits, (name, ham) in _benchmark_hamiltonians().items():
+        replay = StatevectorEvaluator(ham)
+        cached = PrefixCachedEvaluator(ham, max_bytes=max_bytes)
+        steps = list(random_episodes(n_qubits, n_episodes, max_gates))
+
+        start = time.perf_counter()
+        reference = [replay.energy(circuit, params) for circuit, params in steps]
+        replay_time = time.perf_counter() - start
+        energies = [cached.energy(circuit, params) for circuit, params in steps]
+        assert np.allclose(reference, energies, atol=1e-10), "Cached energies differ from full replay"
+
+        stats = cached.stats()
+        rows.append({"hamiltonian": name, "n_qubits": n_qubits,
+                     "replay_step_latency_s": replay_time / len(steps), **stats})
+    return rows
+
+def main():
+    print("Prefix-state cache vs full replay (random RL episodes, up to 20 gates)")
+    print("=" * 78)
+    print(f"{'hamiltonian':>12} {'qubits':>6} {'steps':>6} {'hit rate':>9} {'gate reuse':>11} "
+          f"{'replay us':>10} {'cached us':>10} {'speedup':>8}")
+    for row in benchmark():
+        replay, cached = row["replay_step_latency_s"], row["mean_step_latency_s"]
+        print(f"{row['hamiltonian']:>12} {row['n_qubits']:>6} {row['steps']:>6} {row['hit_rate']:9.1%} "
+              f"{row['gate_reuse_fraction']:11.1%} {replay * 1e6:10.1f} {cached * 1e6:10.1f} "
+              f"{replay / cached:7.1f}x")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,322 @@
+#!/usr/bin/env python
+"""
+Fermion-to-qubit mapping of the molecular Hamiltonian into packed Pauli strings.
+
+The electronic Hamiltonian over spin orbitals (interleaved: 2*i is orbital i
+alpha, 2*i+1 is orbital i beta)
+
+    H = E_nuc + sum_pq h_pq a+_p a_q + 1/2 sum_pqrs (pq|rs) a+_p a+_r a_s a_q
+
+is mapped with the Jordan-Wigner, parity or Bravyi-Kitaev encoding. Every
+encoding is described by its binary matrix beta (qubit bits = beta @ occupations
+mod 2), from which each Majorana operator becomes a single Pauli string. Ladder
+products are expanded into Majorana products for all terms at once, multiplied
+with bitwise operations on the packed masks, and equal strings are merged with
+np.unique, so no per-term Python objects are created.
+
+A PauliSum holds three arrays: x and z masks of shape (n_terms, n_words) as
+uint64 words (bit k of the mask is qubit k; x=1,z=0 is X, x=1,z=1 is Y, x=0,z=1
+is Z) and the real coefficients.
+
+Run this file directly to benchmark term generation on hydrogen chains:
+    python qubit_hamiltonian.py
+"""
+
+import itertools
+import sys
+import time
+import numpy as np
+from packed_eri import PackedERI
+
+MAPPINGS = ("jordan_wigner", "parity", "bravyi_kitaev")
+
+def popcount(words):
+    """Number of set bits summed over the last (word) axis."""
+    return np.bitwise_count(words).sum(axis=-1, dtype=np.int64)
+
+I_POWERS = np.array([1, 1j, -1, -1j])
+
+def pauli_product(x1, z1, x2, z2):
+    """Product of Pauli strings P1 P2 = i^k P3 on packed masks; returns (x3, z3, k mod 4).
+
+    A Pauli string with masks (x, z) equals i^|x&z| X^x Z^z, and
+    (X^x1 Z^z1)(X^x2 Z^z2) = (-1)^(z1.x2) X^(x1^x2) Z^(z1^z2).
+    """
+    x3, z3 = x1 ^ x2, z1 ^ z2
+    k = popcount(x1 & z1) + popcount(x2 & z2) + 2 * popcount(z1 & x2) - popcount(x3 & z3)
+    return x3, z3, k % 4
+
+def gf2_inverse(matrix):
+    """Inverse of a binary matrix over GF(2) by Gauss-Jordan elimination."""
+    n = matrix.shape[0]
+    aug = np.concatenate([matrix.astype(np.uint8) % 2, np.eye(n, dtype=np.uint8)], axis=1)
+    for col in range(n):
+        pivot = col + np.flatnonzero(aug[col:, col])[0]
+        aug[[col, pivot]] = aug[[pivot, col]]
+        rows = np.flatnonzero(aug[:, col])
+        rows = rows[rows != col]
+        aug[rows] ^= aug[col]
+    return aug[:, n:]
+
+def encoding_matrix(mapping, n_qubits):
+    """Binary matrix beta with qubit bits q = beta @ f (mod 2) for occupations f."""
+    if mapping == "jordan_wigner":
+        return np.eye(n_qubits, dtype=np.uint8)
+    if mapping == "parity":
+        return np.tril(np.ones((n_qubits, n_qubits), dtype=np.uint8))
+    if mapping == "bravyi_kitaev":
+        beta = np.ones((1, 1), dtype=np.uint8)
+        while beta.shape[0] < n_qubits:
+            size = beta.shape[0]
+            lower_left = np.zeros((size, size), dtype=np.uint8)
+            lower_left[-1, :] = 1
+            beta = np.block([[beta, np.zeros((size, size), dtype=np.uint8)],
+                             [lower_left, beta]])
+        return beta[:n_qubits, :n_qubits]
+    raise ValueError(f"Unknown mapping '{mapping}', expected one of {MAPPINGS}")
+
+def pack_bits(bits):
+    """Pack a (..., n_qubits) 0/1 array into (..., n_words) little-endian uint64 words."""
+    bits = np.asarray(bits, dtype=np.uint64)
+    n_words = (bits.shape[-1] + 63) // 64
+    padded = np.zeros(bits.shape[:-1] + (n_words * 64,), dtype=np.uint64)
+    padded[..., :bits.shape[-1]] = bits
+    shifts = np.arange(64, dtype=np.uint64)
+    return (padded.reshape(bits.shape[:-1] + (n_words, 64)) << shifts).sum(axis=-1, dtype=np.uint64)
+
+def unpack_bits(words, n_qubits):
+    """Inverse of pack_bits: (..., n_words) uint64 words to a (..., n_qubits) uint8 array."""
+    shifts = np.arange(64, dtype=np.uint64)
+    bits = (words[..., :, None] >> shifts) & np.uint64(1)
+    return bits.reshape(words.shape[:-1] + (-1,))[..., :n_qubits].astype(np.uint8)
+
+def majorana_operators(mapping, n_qubits):
+    """Pauli form i^phase * X^x Z^z of the 2n Majoranas c_j = gamma_2j, d_j = gamma_2j+1.
+
+    With update set U(j) = column j of beta, parity set P(j) = row j of
+    (strictly lower ones) @ beta^-1 and occupation set F(j) = row j of beta^-1:
+        c_j = X_U Z_P        d_j = i X_U Z_(P xor F)
+    """
+    beta = encoding_matrix(mapping, n_qubits)
+    beta_inv = gf2_inverse(beta)
+    strictly_lower = np.tril(np.ones((n_qubits, n_qubits), dtype=np.int64), -1)
+    parity_set = (strictly_lower @ beta_inv) % 2
+    update_set = beta.T
+
+    x_bits = np.repeat(update_set, 2, axis=0)
+    z_bits = np.empty_like(x_bits)
+    z_bits[0::2] = parity_set
+    z_bits[1::2] = parity_set ^ beta_inv
+    phase = np.tile(np.array([0, 1], dtype=np.int64), n_qubits)
+    return pack_bits(x_bits), pack_bits(z_bits), phase
+
+class PauliSum:
+    """Real-coefficient sum of Pauli strings stored as packed X/Z bit masks."""
+
+    def __init__(self, n_qubits, x, z, coeffs):
+        self.n_qubits = n_qubits
+        self.x = x
+        self.z = z
+        self.coeffs = coeffs
+
+    @classmethod
+    def from_terms(cls, n_qubits, x, z, coeffs, tol=1e-12):
+        """Build from possibly repeated strings, merging duplicates and dropping |c| <= tol."""
+        x, z, coeffs = _combine(x, z, np.asarray(coeffs, dtype=np.complex128), tol)
+        assert np.abs(coeffs.imag).max(initial=0.0) < 1e-8, "Non-Hermitian qubit Hamiltonian"
+        return cls(n_qubits, x, z, coeffs.real.copy())
+
+    @property
+    def n_terms(self):
+        return len(self.coeffs)
+
+    @property
+    def nbytes(self):
+        return self.x.nbytes + self.z.nbytes + self.coeffs.nbytes
+
+    def labels(self):
+        """Pauli strings as text, character k acting on qubit k (e.g. 'ZZII')."""
+        x = unpack_bits(self.x, self.n_qubits)
+        z = unpack_bits(self.z, self.n_qubits)
+        chars = np.array(["I", "Z", "X", "Y"])[2 * x + z]
+        return ["".join(row) for row in chars]
+
+    def to_sparse(self, basis_states=None):
+        """Matrix of H on the given computational basis states (default: all 2^n).
+
+        Only the block between the listed states is built, so passing the
+        determinants of one particle-number sector gives that sector's
+        Hamiltonian directly.
+        """
+        from scipy import sparse
+
+        if self.n_qubits > 63:
+            raise ValueError("Matrix construction is limited to 63 qubits")
+        if basis_states is None:
+            basis_states = np.arange(2**self.n_qubits, dtype=np.uint64)
+        basis_states = np.asarray(basis_states, dtype=np.uint64)
+        dim = len(basis_states)
+        order = np.argsort(basis_states)
+        y_phase = I_POWERS[np.bitwise_count(self.x[:, 0] & self.z[:, 0]) % 4]
+        weights = self.coeffs * y_phase
+        # Complex only if some term has an odd number of Y's (never for real-orbital H)
+        if np.abs(weights.imag).max(initial=0.0) < 1e-14:
+            weights = weights.real
+
+        # Terms sharing an X mask connect the same pairs of states, so the
+        # target lookup is done once per distinct mask and only the states that
+        # stay inside the basis are weighted by the group's Z signs
+        x_masks, group = np.unique(self.x[:, 0], return_inverse=True)
+        group = group.ravel()
+        by_group = np.argsort(group, kind="stable")
+        bounds = np.searchsorted(group[by_group], np.arange(len(x_masks) + 1))
+        rows, cols, values = [], [], []
+        for g, x in enumerate(x_masks):
+            targets = basis_states ^ x
+            pos = np.searchsorted(basis_states, targets, sorter=order)
+            pos = order[np.minimum(pos, dim - 1)]
+            inside = np.flatnonzero(basis_states[pos] == targets)
+            if len(inside) == 0:
+                continue
+            terms = by_group[bounds[g]:bounds[g + 1]]
+            parity = np.bitwise_count(basis_states[inside][None, :] & self.z[terms, 0][:, None]) & 1
+            rows.append(pos[inside])
+            cols.append(inside)
+            values.append(weights[terms] @ (1 - 2 * parity.astype(np.int8)))
+        if not rows:
+            return sparse.csr_matrix((dim, dim), dtype=weights.dtype)
+        return sparse.coo_matrix((np.concatenate(values), (np.concatenate(rows), np.concatenate(cols))),
+                                 shape=(dim, dim)).tocsr()
+
+    def save(self, path):
+        """Write the packed arrays to an .npz file."""
+        np.savez(path, n_qubits=self.n_qubits, x=self.x, z=self.z, coeffs=self.coeffs)
+
+    @classmethod
+    def load(cls, path):
+        data = np.load(path)
+        return cls(int(data["n_qubits"]), data["x"], data["z"], data["coeffs"])
+
+def _combine(x, z, coeffs, tol):
+    """Merge identical Pauli strings and drop coefficients below tol."""
+    keys = np.ascontiguousarray(np.concatenate([x, z], axis=1))
+    keys = keys.view(np.dtype((np.void, keys.dtype.itemsize * keys.shape[1]))).ravel()
+    _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+    inverse = inverse.ravel()
+    total = (np.bincount(inverse, weights=coeffs.real, minlength=len(first))
+             + 1j * np.bincount(inverse, weights=coeffs.imag, minlength=len(first)))
+    keep = np.abs(total) > tol
+    return x[first[keep]], z[first[keep]], total[keep]
+
+def _expand_ladder_products(indices, creation, coeffs, majoranas):
+    """Expand coeff * prod(a+/a) ladder products into Pauli strings, vectorized over terms.
+
+    indices is (n_terms, k) spin-orbital indices, creation a length-k tuple of
+    flags for a+ vs a. Each ladder operator is (gamma_2p -/+ i gamma_2p+1) / 2,
+    so a product of k ladders gives 2^k Majorana products per term.
+    """
+    maj_x, maj_z, maj_phase = majoranas
+    k = indices.shape[1]
+    xs, zs, cs = [], [], []
+    for choice in itertools.product((0, 1), repeat=k):
+        # a+ picks up -i = i^3 and a picks up +i = i^1 on its gamma_2p+1 component
+        phase = sum(b * (3 if dag else 1) for b, dag in zip(choice, creation))
+        phase = np.full(len(indices), phase, dtype=np.int64)
+        mj = 2 * indices[:, 0] + choice[0]
+        x, z = maj_x[mj].copy(), maj_z[mj].copy()
+        phase += maj_phase[mj]
+        for pos in range(1, k):
+            mj = 2 * indices[:, pos] + choice[pos]
+            # (X^x1 Z^z1)(X^x2 Z^z2) = (-1)^(z1.x2) X^(x1^x2) Z^(z1^z2)
+            phase += maj_phase[mj] + 2 * popcount(z & maj_x[mj])
+            x ^= maj_x[mj]
+            z ^= maj_z[mj]
+        # Convert X^x Z^z to the Pauli string with Y = i X Z on overlapping bits
+        phase -= popcount(x & z)
+        xs.append(x)
+        zs.append(z)
+        cs.append(coeffs * (0.5**k) * I_POWERS[phase % 4])
+    return np.concatenate(xs), np.concatenate(zs), np.concatenate(cs)
+
+def build_qubit_hamiltonian(h1_mo, eri_mo, constant=0.0, mapping="jordan_wigner", tol=1e-12):
+    """Map spatial-orbital integrals (h1_mo, 8-fold/4-fold/full eri_mo) to a PauliSum."""
+    norb = h1_mo.shape[0]
+    n_qubits = 2 * norb
+    eri = eri_mo if isinstance(eri_mo, PackedERI) else PackedERI.from_any(eri_mo, norb)
+    majoranas = majorana_operators(mapping, n_qubits)
+    n_words = majoranas[0].shape[1]
+
+    x = np.zeros((1, n_words), dtype=np.uint64)
+    z = np.zeros((1, n_words), dtype=np.uint64)
+    coeffs = np.array([constant], dtype=np.complex128)
+    spins = np.array([0, 1])
+
+    # One-body: sum_{pq,sigma} h_pq a+_{p sigma} a_{q sigma}
+    p, q = np.nonzero(np.abs(h1_mo) > tol)
+    sigma = np.repeat(spins, len(p))
+    idx = np.stack([2 * np.tile(p, 2) + sigma, 2 * np.tile(q, 2) + sigma], axis=1)
+    terms = _expand_ladder_products(idx, (True, False), np.tile(h1_mo[p, q], 2), majoranas)
+    x, z, coeffs = _combine(np.concatenate([x, terms[0]]), np.concatenate([z, terms[1]]),
+                            np.concatenate([coeffs, terms[2]]), tol)
+
+    # Two-body, one slab (p, :, :, :) at a time so only n^3 integrals are unpacked:
+    # 1/2 sum (pq|rs) a+_{p sigma} a+_{r tau} a_{s tau} a_{q sigma}
+    for p in range(norb):
+        slab = eri[p, :, :, :]
+        q, r, s = np.nonzero(np.abs(slab) > tol)
+        values = 0.5 * slab[q, r, s]
+        for sig, tau in itertools.product(spins, spins):
+            idx = np.stack([np.full_like(q, 2 * p + sig), 2 * r + tau, 2 * s + tau, 2 * q + sig], axis=1)
+            # a+_i a+_i and a_j a_j vanish identically
+            valid = (idx[:, 0] != idx[:, 1]) & (idx[:, 2] != idx[:, 3])
+            if not valid.any():
+                continue
+            terms = _expand_ladder_products(idx[valid], (True, True, False, False),
+                                            values[valid], majoranas)
+            x, z, coeffs = _combine(np.concatenate([x, terms[0]]), np.concatenate([z, terms[1]]),
+                                    np.concatenate([coeffs, terms[2]]), tol)
+
+    # H is Hermitian, so every Pauli coefficient is real up to round-off
+    return PauliSum.from_terms(n_qubits, x, z, coeffs, tol)
+
+def hydrogen_chain(n_atoms, spacing=0.74):
+    """Linear H_n chain in Å, used to grow the orbital count in benchmarks."""
+    return "; ".join(f"H 0 0 {i * spacing}" for i in range(n_atoms))
+
+def benchmark_mapping(chain_lengths=(2, 4, 6, 8, 10, 12), mappings=MAPPINGS):
+    """Time Pauli-term generation for H_n/STO-3G chains (n spatial orbitals, even n)."""
+    from pyscf import gto, scf, ao2mo
+
+    rows = []
+    for n_atoms in chain_lengths:
+        mol = gto.M(atom=hydrogen_chain(n_atoms), basis="sto-3g", unit="angstrom", verbose=0)
+        mf = scf.RHF(mol)
+        mf.kernel()
+        mo = mf.mo_coeff
+        h1_mo = mo.T @ mf.get_hcore() @ mo
+        eri = PackedERI.from_any(ao2mo.full(mol, mo), mo.shape[1])
+        for mapping in mappings:
+            start = time.perf_counter()
+            ham = build_qubit_hamiltonian(h1_mo, eri, mol.energy_nuc(), mapping)
+            rows.append({
+                "molecule": f"H{n_atoms}",
+                "n_orbitals": mo.shape[1],
+                "n_qubits": ham.n_qubits,
+                "mapping": mapping,
+                "n_terms": ham.n_terms,
+                "bytes": ham.nbytes,
+                "time_s": time.perf_counter() - start,
+            })
+    return rows
+
+def main():
+    print("Fermion-to-qubit mapping benchmark (H_n chains, STO-3G)")
+    print("=" * 72)
+    print(f"{'molecule':>8} {'norb':>5} {'qubits':>6} {'mapping':>14} {'terms':>7} {'KB':>8} {'time (s)':>9}")
+    for row in benchmark_mapping():
+        print(f"{row['molecule']:>8} {row['n_orbitals']:>5} {row['n_qubits']:>6} {row['mapping']:>14} "
+              f"{row['n_terms']:>7} {row['bytes'] / 1024:8.1f} {row['time_s']:9.3f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,248 @@
+#!/usr/bin/env python
+"""
+Shared-memory store of molecule data for scan and RL rollout worker processes.
+
+The parent publishes each molecule once into a POSIX shared-memory segment
+named after its integral-cache key: the MO integrals (h1_mo, 8-fold packed
+eri_mo), the packed Pauli terms of the qubit Hamiltonian, and the HF/FCI
+reference energies. A segment starts with a small JSON header (array names,
+dtypes, shapes, offsets and scalar metadata) followed by 64-byte aligned array
+data. Workers attach by key and get read-only NumPy views straight onto the
+shared pages, so N workers hold one copy of the data instead of N.
+
+Usage (parent):
+    store = SharedStore()
+    key = publish_molecule(store, mol)
+Usage (worker):
+    data = attach_molecule(key)
+    data["hamiltonian"], data["eri_mo"], data["fci_hartree"]
+
+Run this file directly for a per-worker resident-memory report
+(private copies vs shared attach):
+    python shared_store.py
+"""
+
+import json
+import os
+import struct
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+import numpy as np
+from integral_cache import IntegralCache, molecule_key
+from packed_eri import PackedERI
+from qubit_hamiltonian import PauliSum, build_qubit_hamiltonian
+
+SEGMENT_PREFIX = "rlqas_"
+ALIGNMENT = 64
+_HEADER_LENGTH = struct.Struct("<Q")
+
+def segment_name(key):
+    """Shared-memory segment name for a molecule key (POSIX names are length-limited)."""
+    return SEGMENT_PREFIX + key[:32]
+
+def _aligned(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+class SharedEntry:
+    """A published or attached segment: read-only array views plus scalar metadata."""
+
+    def __init__(self, shm):
+        self.shm = shm
+        (length,) = _HEADER_LENGTH.unpack_from(shm.buf, 0)
+        header = json.loads(bytes(shm.buf[_HEADER_LENGTH.size:_HEADER_LENGTH.size + length]))
+        self.meta = header["meta"]
+        self.arrays = {}
+        for name, spec in header["arrays"].items():
+            view = np.ndarray(spec["shape"], dtype=spec["dtype"], buffer=shm.buf, offset=spec["offset"])
+            view.flags.writeable = False
+            self.arrays[name] = view
+
+    @property
+    def nbytes(self):
+        return self.shm.size
+
+    def close(self):
+        """Drop the views and unmap the segment (the data stays published)."""
+        self.arrays = {}
+        self.shm.close()
+
+class SharedStore:
+    """Owner side: publishes molecule segments and unlinks them on close()."""
+
+    def __init__(self):
+        self.entries = {}
+
+    def publish(self, key, arrays, meta):
+        """Copy arrays into a new segment for key; returns the SharedEntry (attaches if already published)."""
+        if key in self.entries:
+            return self.entries[key]
+        specs = {}
+        header_size = 4096
+        offset = _aligned(header_size)
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            specs[name] = {"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset}
+            offset = _aligned(offset + array.nbytes)
+        header = json.dumps({"arrays": specs, "meta": meta}).encode()
+        if _HEADER_LENGTH.size + len(header) > header_size:
+            raise ValueError("Segment header too large; store fewer arrays or less metadata")
+
+        try:
+            shm = shared_memory.SharedMemory(name=segment_name(key), create=True, size=offset)
+        except FileExistsError:
+            return attach(key)
+        _HEADER_LENGTH.pack_into(shm.buf, 0, len(header))
+        shm.buf[_HEADER_LENGTH.size:_HEADER_LENGTH.size + len(header)] = header
+        for name, array in arrays.items():
+            spec = specs[name]
+            target = np.ndarray(spec["shape"], dtype=spec["dtype"], buffer=shm.buf, offset=spec["offset"])
+            target[...] = array
+        self.entries[key] = SharedEntry(shm)
+        return self.entries[key]
+
+    def close(self):
+        """Unlink every segment this store published."""
+        for entry in self.entries.values():
+            name = entry.shm.name
+            entry.close()
+            shared_memory.SharedMemory(name=name).unlink()
+        self.entries = {}
+
+def attach(key):
+    """Attach to a published segment without copying.
+
+    The attaching process must not unlink the segment when it exits, so it is
+    removed from this process's resource tracker (Python < 3.13 registers it).
+    """
+    shm = shared_memory.SharedMemory(name=segment_name(key))
+    try:
+        resource_tracker.unregister(shm._name, "shared_memory")
+    except Exception:
+        pass
+    return SharedEntry(shm)
+
+def molecule_arrays(mol, mapping="jordan_wigner", conv_tol=1e-12):
+    """(key, arrays, meta) for mol: cached MO integrals, Pauli terms and reference energies."""
+    data = IntegralCache().load_or_compute(mol, conv_tol=conv_tol)
+    norb = data["mo_coeff"].shape[1]
+    h1_mo = np.asarray(data["h1_mo"])
+    eri_mo = np.asarray(data["eri_mo"])
+    ham = build_qubit_hamiltonian(h1_mo, PackedERI(eri_mo, norb), data["nuclear_repulsion"], mapping)
+    arrays = {"h1_mo": h1_mo, "eri_mo": eri_mo, "pauli_x": ham.x, "pauli_z": ham.z, "pauli_coeffs": ham.coeffs}
+    meta = {name: data[name] for name in ("hf_hartree", "fci_hartree", "nuclear_repulsion",
+                                          "n_spatial_orbitals", "n_electrons")}
+    meta.update({"n_qubits": ham.n_qubits, "mapping": mapping})
+    return molecule_key(mol, conv_tol=conv_tol, mapping=mapping), arrays, meta
+
+def publish_molecule(store, mol, mapping="jordan_wigner", conv_tol=1e-12):
+    """Publish mol's integrals, Pauli terms and references; returns the key workers attach by."""
+    key, arrays, meta = molecule_arrays(mol, mapping, conv_tol)
+    store.publish(key, arrays, meta)
+    return key
+
+def molecule_view(arrays, meta):
+    """Pipeline objects over molecule arrays: PauliSum, PackedERI and the scalar metadata."""
+    return {
+        **meta,
+        "h1_mo": arrays["h1_mo"],
+        "eri_mo": PackedERI(arrays["eri_mo"], meta["n_spatial_orbitals"]),
+        "hamiltonian": PauliSum(meta["n_qubits"], arrays["pauli_x"], arrays["pauli_z"], arrays["pauli_coeffs"]),
+    }
+
+_ATTACHED = {}
+
+def attach_molecule(key):
+    """Zero-copy view of a published molecule, attached once per process."""
+    if key not in _ATTACHED:
+        _ATTACHED[key] = attach(key)
+    entry = _ATTACHED[key]
+    return molecule_view(entry.arrays, entry.meta)
+
+def memory_usage():
+    """Resident memory of this process in bytes: rss, pss, private and shared pages."""
+    usage = {}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                field, value = line.split(":", 1)
+                if value.strip().endswith("kB"):
+                    usage[field] = int(value.split()[0]) * 1024
+    except OSError:
+        import resource
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        return {"rss": rss, "pss": rss, "private": rss, "shared": 0}
+    return {
+        "rss": usage.get("Rss", 0),
+        "pss": usage.get("Pss", 0),
+        "private": usage.get("Private_Clean", 0) + usage.get("Private_Dirty", 0),
+        "shared": usage.get("Shared_Clean", 0) + usage.get("Shared_Dirty", 0),
+    }
+
+def _touch(data):
+    """Read every array once, as a worker using the Hamiltonian would."""
+    ham = data["hamiltonian"]
+    return float(np.abs(ham.coeffs).sum() + ham.x.sum() % 7 + ham.z.sum() % 7
+                 + data["eri_mo"].packed.sum() + data["h1_mo"].sum())
+
+def _private_worker(task):
+    """Baseline: each worker builds its own copy of the molecule data."""
+    from pyscf import gto
+    atom, basis, mapping = task
+    before = memory_usage()
+    _, arrays, meta = molecule_arrays(gto.M(atom=atom, basis=basis, verbose=0), mapping)
+    _touch(molecule_view(arrays, meta))
+    after = memory_usage()
+    return os.getpid(), before, after, sum(a.nbytes for a in arrays.values())
+
+def _shared_worker(key):
+    """Attach to the published molecule and read it."""
+    before = memory_usage()
+    data = attach_molecule(key)
+    _touch(data)
+    after = memory_usage()
+    return os.getpid(), before, after, _ATTACHED[key].nbytes
+
+def memory_report(atom, basis="sto-3g", mapping="jordan_wigner", n_workers=4):
+    """Per-worker memory growth when loading one molecule privately vs attaching to the shared store."""
+    from pyscf import gto
+
+    mol = gto.M(atom=atom, basis=basis, verbose=0)
+    store = SharedStore()
+    key = publish_molecule(store, mol, mapping)
+    report = {"molecule": atom, "basis": basis, "n_qubits": store.entries[key].meta["n_qubits"],
+              "segment_bytes": store.entries[key].nbytes, "workers": {}}
+    try:
+        # One fresh process per task so every worker starts from the same baseline
+        for mode, func, arg in (("private", _private_worker, (atom, basis, mapping)), ("shared", _shared_worker, key)):
+            rows = []
+            for _ in range(n_workers):
+                with ProcessPoolExecutor(max_workers=1) as pool:
+                    pid, before, after, data_bytes = pool.submit(func, arg).result()
+                rows.append({"pid": pid, "data_bytes": data_bytes,
+                             **{f"{k}_delta": after[k] - before[k] for k in after}})
+            report["workers"][mode] = rows
+    finally:
+        store.close()
+    return report
+
+def main():
+    from qubit_hamiltonian import hydrogen_chain
+
+    print("Per-worker resident memory: private copy vs shared-memory attach (4 workers)")
+    print("=" * 86)
+    print(f"{'molecule':>10} {'basis':>8} {'qubits':>6} {'segment MB':>11} {'mode':>8} "
+          f"{'RSS +MB':>8} {'PSS +MB':>8} {'private +MB':>12}")
+    molecules = [("H6 chain", hydrogen_chain(6), "6-31g"),
+                 ("LiH", "Li 0 0 0; H 0 0 1.6", "6-31g"),
+                 ("H2O", "O 0 0 0; H 0.757 0.586 0; H -0.757 0.586 0", "6-31g")]
+    for label, atom, basis in molecules:
+        report = memory_report(atom, basis)
+        for mode, rows in report["workers"].items():
+            mean = {k: np.mean([r[k] for r in rows]) / 1e6 for k in ("rss_delta", "pss_delta", "private_delta")}
+            print(f"{label:>10} {basis:>8} {report['n_qubits']:>6} {report['segment_bytes'] / 1e6:11.2f} "
+                  f"{mode:>8} {mean['rss_delta']:8.2f} {mean['pss_delta']:8.2f} {mean['private_delta']:12.2f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+"""
+Qubit-count reduction: frozen-core active spaces and Z2 symmetry tapering.
+
+Two independent stages shrink the qubit Hamiltonian before simulation:
+
+1. Active space: doubly occupied core orbitals are folded into an effective
+   one-electron operator and a constant, and only n_active orbitals are kept.
+2. Tapering: every Z-type Pauli string tau that commutes with all terms is a
+   Z2 symmetry. A Clifford U = (X_q + tau)/sqrt(2) per generator turns tau into
+   X_q, which is replaced by its eigenvalue in the Hartree-Fock sector, and
+   qubit q is dropped. By default the generators are the electron-number and
+   spin-alpha parities (2 qubits removed); symmetries="all" also uses any
+   point-group Z2 symmetries found in the Hamiltonian.
+
+Usage:
+    ham, info = reduce_hamiltonian(h1_mo, eri_mo, e_nuc, n_electrons)
+    info["n_qubits_original"], info["n_qubits_reduced"]
+"""
+
+import numpy as np
+from packed_eri import PackedERI
+from qubit_hamiltonian import (PauliSum, I_POWERS, build_qubit_hamiltonian, encoding_matrix,
+                               gf2_inverse, pack_bits, pauli_product, unpack_bits)
+
+def frozen_core_integrals(h1_mo, eri_mo, constant, n_frozen=0, n_active=None):
+    """Fold n_frozen doubly occupied orbitals into (h1_eff, eri_active, constant).
+
+    E_core = E_nuc + sum_c [2 h_cc + sum_d (2 (cc|dd) - (cd|dc))]
+    h_eff[p, q] = h_pq + sum_c [2 (pq|cc) - (pc|cq)]
+    """
+    norb = h1_mo.shape[0]
+    eri = eri_mo if isinstance(eri_mo, PackedERI) else PackedERI.from_any(eri_mo, norb)
+    n_active = norb - n_frozen if n_active is None else n_active
+    if n_frozen + n_active > norb:
+        raise ValueError(f"{n_frozen} frozen + {n_active} active orbitals exceed {norb} orbitals")
+
+    core = np.arange(n_frozen)
+    act = np.arange(n_frozen, n_frozen + n_active)
+    if n_frozen:
+        coulomb = eri[core, core, core, core]
+        constant = (constant + 2 * h1_mo[core, core].sum()
+                    + 2 * np.einsum("ccdd->", coulomb) - np.einsum("cddc->", coulomb))
+        h1_eff = (h1_mo[np.ix_(act, act)]
+                  + 2 * np.einsum("pqcc->pq", eri[act, act, core, core])
+                  - np.einsum("pccq->pq", eri[act, core, core, act]))
+    else:
+        h1_eff = h1_mo[np.ix_(act, act)]
+    eri_active = PackedERI.from_any(eri[act, act, act, act], n_active)
+    return h1_eff, eri_active, float(constant)
+
+def _gf2_rref(matrix):
+    """Reduced row echelon form over GF(2); returns (nonzero rows, pivot columns)."""
+    rows = matrix.astype(np.uint8) % 2
+    pivots = []
+    r = 0
+    for col in range(rows.shape[1]):
+        candidates = r + np.flatnonzero(rows[r:, col])
+        if len(candidates) == 0:
+            continue
+        rows[[r, candidates[0]]] = rows[[candidates[0], r]]
+        others = np.flatnonzero(rows[:, col])
+        others = others[others != r]
+        rows[others] ^= rows[r]
+        pivots.append(col)
+        r += 1
+        if r == rows.shape[0]:
+            break
+    return rows[:r], pivots
+
+def _gf2_nullspace(matrix):
+    """Basis of {a : matrix @ a = 0 (mod 2)} as rows."""
+    n = matrix.shape[1]
+    rref, pivots = _gf2_rref(matrix)
+    free = [c for c in range(n) if c not in pivots]
+    basis = np.zeros((len(free), n), dtype=np.uint8)
+    for i, f in enumerate(free):
+        basis[i, f] = 1
+        for row, p in zip(rref, pivots):
+            basis[i, p] = row[f]
+    return basis
+
+def parity_symmetries(mapping, n_qubits):
+    """Z masks (as bit rows) of the total and alpha electron-number parities.
+
+    The parity of the occupations in a set S of spin orbitals is Z^a with
+    a = sum of the rows of beta^-1 in S (mod 2).
+    """
+    beta_inv = gf2_inverse(encoding_matrix(mapping, n_qubits))
+    total = beta_inv.sum(axis=0) % 2
+    alpha = beta_inv[0::2].sum(axis=0) % 2
+    return np.stack([total, alpha]).astype(np.uint8)
+
+def z2_symmetries(ham):
+    """All independent Z-type strings commuting with every term (kernel of the X bits)."""
+    return _gf2_nullspace(unpack_bits(ham.x, ham.n_qubits))
+
+def hartree_fock_bits(mapping, n_qubits, n_electrons):
+    """Qubit bitstring of the interleaved-ordering HF determinant (lowest spin orbitals filled)."""
+    occupations = (np.arange(n_qubits) < n_electrons).astype(np.int64)
+    return (encoding_matrix(mapping, n_qubits).astype(np.int64) @ occupations) % 2
+
+def taper(ham, generators, eigenvalues):
+    """Remove one qubit per Z2 generator, fixing each symmetry to its eigenvalue (+1/-1)."""
+    generators, pivots = _gf2_rref(np.asarray(generators))
+    if len(pivots) != len(eigenvalues):
+        raise ValueError("Generators must be linearly independent, one eigenvalue each")
+
+    n = ham.n_qubits
+    x, z, coeffs = ham.x.copy(), ham.z.copy(), ham.coeffs.astype(np.complex128)
+    for gen, q, sign in zip(generators, pivots, eigenvalues):
+        tau_z = pack_bits(gen)[None, :]
+        x_q = pack_bits(np.eye(n, dtype=np.uint8)[q])[None, :]
+        zero = np.zeros_like(x_q)
+        # U P U = P if P commutes with X_q, else (X_q tau) P
+        u_x, u_z, u_k = pauli_product(x_q, zero, zero, tau_z)
+        flip = unpack_bits(z, n)[:, q].astype(bool)
+        new_x, new_z, k = pauli_product(u_x, u_z, x[flip], z[flip])
+        x[flip], z[flip] = new_x, new_z
+        coeffs[flip] *= I_POWERS[(k + u_k) % 4]
+
+    # Every term is now I or X on the pivot qubits; replace X_q by its eigenvalue
+    z_bits = unpack_bits(z, n)
+    x_bits = unpack_bits(x, n)
+    assert not z_bits[:, pivots].any(), "Generators do not commute with the Hamiltonian"
+    for q, sign in zip(pivots, eigenvalues):
+        coeffs[x_bits[:, q] == 1] *= sign
+
+    keep = np.setdiff1d(np.arange(n), pivots)
+    return PauliSum.from_terms(len(keep), pack_bits(x_bits[:, keep]), pack_bits(z_bits[:, keep]), coeffs)
+
+def ground_energy(ham):
+    """Lowest eigenvalue of a PauliSum over its full qubit space."""
+    matrix = ham.to_sparse()
+    if ham.n_qubits <= 10:
+        return float(np.linalg.eigvalsh(matrix.toarray())[0])
+    from scipy.sparse.linalg import eigsh
+    return float(eigsh(matrix, k=1, which="SA")[0][0])
+
+def reduce_hamiltonian(h1_mo, eri_mo, constant, n_electrons, mapping="jordan_wigner",
+                       n_frozen=0, n_active=None, symmetries="parity"):
+    """Active-space selection followed by Z2 tapering; returns (PauliSum, info)."""
+    norb = h1_mo.shape[0]
+    h1_act, eri_act, ecore = frozen_core_integrals(h1_mo, eri_mo, constant, n_frozen, n_active)
+    n_act_electrons = n_electrons - 2 * n_frozen
+    ham = build_qubit_hamiltonian(h1_act, eri_act, ecore, mapping)
+
+    if symmetries == "parity":
+        generators = parity_symmetries(mapping, ham.n_qubits)
+    elif symmetries == "all":
+        generators = z2_symmetries(ham)
+    else:
+        raise ValueError(f"Unknown symmetries '{symmetries}', expected 'parity' or 'all'")
+    generators, _ = _gf2_rref(generators)
+    hf_bits = hartree_fock_bits(mapping, ham.n_qubits, n_act_electrons)
+    eigenvalues = 1 - 2 * ((generators.astype(np.int64) @ hf_bits) % 2)
+
+    tapered = taper(ham, generators, eigenvalues)
+    info = {
+        "mapping": mapping,
+        "n_qubits_original": 2 * norb,
+        "n_qubits_active": ham.n_qubits,
+        "n_qubits_reduced": tapered.n_qubits,
+        "n_frozen_orbitals": n_frozen,
+        "n_active_orbitals": h1_act.shape[0],
+        "n_active_electrons": n_act_electrons,
+        "n_symmetries_tapered": len(generators),
+        "symmetry_sector": [int(s) for s in eigenvalues],
+        "n_terms_original": ham.n_terms,
+        "n_terms_reduced": tapered.n_terms,
+        "h1_active": h1_act,
+        "eri_active": eri_act,
+        "core_energy": ecore,
+    }
+    return tapered, info
+
+def active_space_fci_energy(info):
+    """FCI (CASCI) energy of the active-space problem in info, the reference for the reduced H."""
+    from pyscf import fci
+
+    n_act = info["n_active_orbitals"]
+    n_elec = info["n_active_electrons"]
+    solver = fci.direct_spin1.FCI()
+    energy, _ = solver.kernel(info["h1_active"], info["eri_active"].packed, n_act,
+                              (n_elec - n_elec // 2, n_elec // 2), ecore=info["core_energy"])
+    return float(energy)
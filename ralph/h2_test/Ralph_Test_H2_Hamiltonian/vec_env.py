@@ -0,0 +1,412 @@
+#!/usr/bin/env python
+"""
+Vectorized RLQAS circuit-construction environment for batched PPO rollouts.
+
+N circuits are advanced at once as one (N, 2^n) statevector batch over the
+qubit Hamiltonian from the generation step. Each step the environments are
+grouped by gate (kind and qubits); every group is gathered, updated with the
+in-place gate kernels of statevector.py and scattered back, so a step costs
+O(N 2^n) plus one batched <H> evaluation, with no per-environment Python loop.
+
+Actions (Discrete):
+    add_Rx / add_Ry / add_Rz on qubit q with an angle from `angles`,
+    add_CNOT on an ordered qubit pair of the coupling map, and terminate.
+Observation: gate counts per action, per-qubit depth, energy error relative
+to the reference and circuit size, as one float32 vector.
+Reward: score = -a (E - E_ref) - b depth - c n_CNOT, paid as the per-step
+change of the score, so an episode's return is final minus initial score.
+
+The classes follow the Stable-Baselines3 VecEnv interface (and subclass it
+when stable-baselines3 and gymnasium are installed): reset, step_async/step_wait,
+auto-reset with info["terminal_observation"], get_attr/set_attr/env_method.
+The environments share one object, so those three act per environment only
+where that is well defined: per-environment state (PER_ENV_ATTRS) is read and
+written row by row, settings shared by the batch are read for every index but
+only set for the whole batch, and env_method supports "reset" alone; other
+methods raise NotImplementedError.
+make_vec_env(..., n_workers=k) splits the batch over k subprocesses.
+
+Run this file directly for env steps/sec versus N and qubit count:
+    python vec_env.py
+"""
+
+import multiprocessing as mp
+import sys
+import time
+import numpy as np
+from statevector import StatevectorEvaluator, apply_cnot, apply_rotation
+
+try:
+    from gymnasium import spaces
+    from stable_baselines3.common.vec_env import VecEnv
+except ImportError:  # Same interface without the SB3 base class
+    spaces = None
+    VecEnv = object
+
+GATE_KINDS = ("rx", "ry", "rz", "cnot", "terminate")
+DEFAULT_ANGLES = (np.pi / 4, -np.pi / 4, np.pi / 2, -np.pi / 2)
+# Attributes holding one row per environment; everything else is shared by the batch
+PER_ENV_ATTRS = ("state", "counts", "qubit_depth", "n_gates", "n_cnot", "energy", "score", "episode_return")
+# env_method names with a per-environment meaning
+PER_ENV_METHODS = ("reset",)
+
+def linear_coupling(n_qubits):
+    """Nearest-neighbour CNOTs in both directions on a line."""
+    return [(q, q + 1) for q in range(n_qubits - 1)] + [(q + 1, q) for q in range(n_qubits - 1)]
+
+def action_table(n_qubits, angles=DEFAULT_ANGLES, coupling=None):
+    """Columns (kind index, qubit 0, qubit 1, angle) for every discrete action."""
+    coupling = linear_coupling(n_qubits) if coupling is None else coupling
+    rows = [(k, q, -1, a) for k in range(3) for q in range(n_qubits) for a in angles]
+    rows += [(3, c, t, 0.0) for c, t in coupling]
+    rows.append((4, -1, -1, 0.0))
+    table = np.array(rows, dtype=np.float64)
+    return table[:, 0].astype(np.int64), table[:, 1].astype(np.int64), table[:, 2].astype(np.int64), table[:, 3]
+
+class _CircuitVecEnvBase(VecEnv):
+    """Spaces and SB3 bookkeeping shared by the batched and subprocess environments."""
+
+    def _init_spaces(self, n_envs, n_qubits, n_actions):
+        self.n_actions = n_actions
+        self.obs_dim = n_actions + n_qubits + 3
+        if VecEnv is object:
+            self.num_envs = n_envs
+            self.observation_space = self.action_space = None
+            return
+        observation_space = spaces.Box(-np.inf, np.inf, (self.obs_dim,), dtype=np.float32)
+        super().__init__(n_envs, observation_space, spaces.Discrete(n_actions))
+
+    def _indices(self, indices):
+        if indices is None:
+            return range(self.num_envs)
+        return [indices] if isinstance(indices, (int, np.integer)) else indices
+
+    def _check_set_attr(self, attr_name, indices):
+        rows = np.asarray(list(self._indices(indices)), dtype=np.int64)
+        if attr_name not in PER_ENV_ATTRS and len(np.unique(rows)) != self.num_envs:
+            raise NotImplementedError(f"{attr_name!r} is shared by every environment of the batch "
+                                      f"and can only be set for all of them")
+        return rows
+
+    @staticmethod
+    def _check_env_method(method_name):
+        if method_name not in PER_ENV_METHODS:
+            raise NotImplementedError(f"env_method({method_name!r}) would act on the whole batch; "
+                                      f"per-environment methods are {PER_ENV_METHODS}")
+
+    def step(self, actions):
+        self.step_async(actions)
+        return self.step_wait()
+
+    def env_is_wrapped(self, wrapper_class, indices=None):
+        return [False for _ in self._indices(indices)]
+
+class BatchedCircuitVecEnv(_CircuitVecEnvBase):
+    """N circuit-construction environments sharing one (N, 2^n) statevector batch."""
+
+    def __init__(self, ham, n_envs, reference_energy, initial_bits=0, max_gates=20,
+                 angles=DEFAULT_ANGLES, coupling=None, accuracy_weight=1.0, depth_weight=0.01,
+                 cnot_weight=0.01, success_threshold=1.6e-3, seed=None):
+        self.n_qubits = ham.n_qubits
+        self.reference_energy = reference_energy
+        self.max_gates = max_gates
+        self.accuracy_weight = accuracy_weight
+        self.depth_weight = depth_weight
+        self.cnot_weight = cnot_weight
+        self.success_threshold = success_threshold
+        self.kind, self.q0, self.q1, self.angle = action_table(self.n_qubits, angles, coupling)
+        # Environments taking actions with the same group id get one batched gate call
+        self._group = np.where(self.kind < 3, self.kind * self.n_qubits + self.q0, -1)
+        self._group[self.kind == 3] = 3 * self.n_qubits + np.arange((self.kind == 3).sum())
+        self._init_spaces(n_envs, self.n_qubits, len(self.kind))
+
+        self.evaluator = StatevectorEvaluator(ham, initial_bits=initial_bits, max_batch=n_envs)
+        self.state = self.evaluator.reset(n_envs)
+        self._gather = np.empty_like(self.state)
+        self._scratch = self.evaluator._scratch
+        self._rng = np.random.default_rng(seed)
+        self._actions = None
+
+        self.counts = np.zeros((n_envs, self.n_actions), dtype=np.int32)
+        self.qubit_depth = np.zeros((n_envs, self.n_qubits), dtype=np.int32)
+        self.n_gates = np.zeros(n_envs, dtype=np.int32)
+        self.n_cnot = np.zeros(n_envs, dtype=np.int32)
+        self.energy = np.zeros(n_envs)
+        self.score = np.zeros(n_envs)
+        self.episode_return = np.zeros(n_envs)
+        self.initial_energy = float(self.evaluator.expectation(self.state[:1])[0])
+        self._reset_rows(np.arange(n_envs))
+
+    def _reset_rows(self, rows):
+        self.state[rows] = 0
+        self.state[rows, self.evaluator.initial_bits] = 1
+        for array in (self.counts, self.qubit_depth, self.n_gates, self.n_cnot, self.episode_return):
+            array[rows] = 0
+        self.energy[rows] = self.initial_energy
+        self.score[rows] = self._score(rows)
+
+    def _score(self, rows):
+        depth = self.qubit_depth[rows].max(axis=1)
+        return (-self.accuracy_weight * (self.energy[rows] - self.reference_energy)
+                - self.depth_weight * depth - self.cnot_weight * self.n_cnot[rows])
+
+    def _observations(self):
+        scale = 1.0 / self.max_gates
+        return np.concatenate([
+            self.counts * scale,
+            self.qubit_depth * scale,
+            (self.energy - self.reference_energy)[:, None],
+            self.n_gates[:, None] * scale,
+            self.qubit_depth.max(axis=1, keepdims=True) * scale,
+        ], axis=1).astype(np.float32)
+
+    def reset(self):
+        self._reset_rows(np.arange(self.num_envs))
+        return self._observations()
+
+    def seed(self, seed=None):
+        self._rng = np.random.default_rng(seed)
+        return [seed for _ in range(self.num_envs)]
+
+    def step_async(self, actions):
+        self._actions = np.asarray(actions, dtype=np.int64).reshape(self.num_envs)
+
+    def _apply_actions(self, actions):
+        """Apply every environment's gate, one batched kernel call per distinct gate."""
+        groups = self._group[actions]
+        order = np.argsort(groups, kind="stable")
+        starts = np.flatnonzero(np.r_[True, groups[order][1:] != groups[order][:-1]])
+        for start, stop in zip(starts, np.r_[starts[1:], len(order)]):
+            rows = order[start:stop]
+            action = actions[rows[0]]
+            if self.kind[action] == 4:
+                continue
+            whole = len(rows) == self.num_envs
+            block = self.state if whole else np.take(self.state, rows, axis=0, out=self._gather[:len(rows)])
+            if self.kind[action] == 3:
+                apply_cnot(block, self.q0[action], self.q1[action], self._scratch)
+            else:
+                apply_rotation(block, GATE_KINDS[self.kind[action]], self.q0[action],
+                               self.angle[actions[rows]], self._scratch)
+            if not whole:
+                self.state[rows] = block
+
+    def step_wait(self):
+        actions = self._actions
+        env = np.arange(self.num_envs)
+        gate = self.kind[actions] < 4
+        self._apply_actions(actions)
+
+        # Bookkeeping: gate counts and per-qubit ASAP depth
+        self.counts[env[gate], actions[gate]] += 1
+        self.n_gates += gate
+        rot = self.kind[actions] < 3
+        self.qubit_depth[env[rot], self.q0[actions[rot]]] += 1
+        cx = self.kind[actions] == 3
+        if cx.any():
+            c, t = self.q0[actions[cx]], self.q1[actions[cx]]
+            level = np.maximum(self.qubit_depth[env[cx], c], self.qubit_depth[env[cx], t]) + 1
+            self.qubit_depth[env[cx], c] = level
+            self.qubit_depth[env[cx], t] = level
+            self.n_cnot += cx
+
+        self.energy = self.evaluator.expectation(self.state)
+        score = self._score(env)
+        rewards = (score - self.score).astype(np.float32)
+        self.score = score
+        self.episode_return += rewards
+
+        success = self.energy - self.reference_energy < self.success_threshold
+        truncated = self.n_gates >= self.max_gates
+        dones = (self.kind[actions] == 4) | success | truncated
+        obs = self._observations()
+        infos = [{"energy": float(self.energy[i]), "depth": int(self.qubit_depth[i].max()),
+                  "n_gates": int(self.n_gates[i]), "n_cnot": int(self.n_cnot[i]),
+                  "is_success": bool(success[i])} for i in env]
+        done_rows = np.flatnonzero(dones)
+        for i in done_rows:
+            infos[i]["terminal_observation"] = obs[i].copy()
+            infos[i]["TimeLimit.truncated"] = bool(truncated[i] and not success[i] and self.kind[actions[i]] != 4)
+            infos[i]["episode"] = {"r": float(self.episode_return[i]), "l": int(self.n_gates[i])}
+        if len(done_rows):
+            self._reset_rows(done_rows)
+            obs[done_rows] = self._observations()[done_rows]
+        return obs, rewards, dones, infos
+
+    def sample_actions(self):
+        """Uniformly random actions, one per environment."""
+        return self._rng.integers(self.n_actions, size=self.num_envs)
+
+    def close(self):
+        pass
+
+    def get_attr(self, attr_name, indices=None):
+        """Row i of per-environment state, or the shared setting, for each index."""
+        value = getattr(self, attr_name)
+        if attr_name in PER_ENV_ATTRS:
+            return [value[i].copy() for i in self._indices(indices)]
+        return [value for _ in self._indices(indices)]
+
+    def set_attr(self, attr_name, value, indices=None):
+        """Set rows of per-environment state; shared settings only for the whole batch."""
+        rows = self._check_set_attr(attr_name, indices)
+        if attr_name in PER_ENV_ATTRS:
+            getattr(self, attr_name)[rows] = value
+        else:
+            setattr(self, attr_name, value)
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        """Per-environment methods: "reset" resets only the given environments."""
+        self._check_env_method(method_name)
+        rows = np.asarray(list(self._indices(indices)), dtype=np.int64)
+        self._reset_rows(rows)
+        return list(self._observations()[rows])
+
+def _subproc_worker(remote, ham, n_envs, env_kwargs):
+    """Serve one BatchedCircuitVecEnv shard over a pipe until 'close'."""
+    env = BatchedCircuitVecEnv(ham, n_envs, **env_kwargs)
+    while True:
+        cmd, data = remote.recv()
+        if cmd == "step":
+            remote.send(env.step(data))
+        elif cmd == "reset":
+            remote.send(env.reset())
+        elif cmd == "seed":
+            remote.send(env.seed(data))
+        elif cmd == "get_attr":
+            remote.send(env.get_attr(*data))
+        elif cmd == "set_attr":
+            remote.send(env.set_attr(*data))
+        elif cmd == "env_method":
+            name, args, kwargs, indices = data
+            remote.send(env.env_method(name, *args, indices=indices, **kwargs))
+        elif cmd == "close":
+            remote.close()
+            break
+
+class SubprocCircuitVecEnv(_CircuitVecEnvBase):
+    """The batched environment split into contiguous shards, one per worker process."""
+
+    def __init__(self, ham, n_envs, n_workers, reference_energy, seed=None, **env_kwargs):
+        n_workers = min(n_workers, n_envs)
+        self.shards = [len(s) for s in np.array_split(np.arange(n_envs), n_workers)]
+        ctx = mp.get_context("fork" if "fork" in mp.get_all_start_methods() else "spawn")
+        self.remotes, self.processes = [], []
+        for w, size in enumerate(self.shards):
+            parent, child = ctx.Pipe()
+            kwargs = {**env_kwargs, "reference_energy": reference_energy,
+                      "seed": None if seed is None else seed + w}
+            process = ctx.Process(target=_subproc_worker, args=(child, ham, size, kwargs), daemon=True)
+            process.start()
+            child.close()
+            self.remotes.append(parent)
+            self.processes.append(process)
+        self.remotes[0].send(("get_attr", ("n_actions", [0])))
+        self._init_spaces(n_envs, ham.n_qubits, self.remotes[0].recv()[0])
+        self._rng = np.random.default_rng(seed)
+        self.closed = False
+
+    def reset(self):
+        for remote in self.remotes:
+            remote.send(("reset", None))
+        return np.concatenate([remote.recv() for remote in self.remotes])
+
+    def seed(self, seed=None):
+        for w, remote in enumerate(self.remotes):
+            remote.send(("seed", None if seed is None else seed + w))
+        return [s for remote in self.remotes for s in remote.recv()]
+
+    def step_async(self, actions):
+        actions = np.asarray(actions, dtype=np.int64)
+        for remote, shard in zip(self.remotes, np.split(actions, np.cumsum(self.shards)[:-1])):
+            remote.send(("step", shard))
+
+    def step_wait(self):
+        results = [remote.recv() for remote in self.remotes]
+        obs, rewards, dones, infos = zip(*results)
+        return (np.concatenate(obs), np.concatenate(rewards), np.concatenate(dones),
+                [info for shard in infos for info in shard])
+
+    def sample_actions(self):
+        return self._rng.integers(self.n_actions, size=self.num_envs)
+
+    def close(self):
+        if self.closed:
+            return
+        for remote in self.remotes:
+            remote.send(("close", None))
+        for process in self.processes:
+            process.join()
+        self.closed = True
+
+    def _by_shard(self, indices):
+        """Global indices as {worker: local indices}, plus (worker, position) per requested index."""
+        offsets = np.cumsum([0] + self.shards)
+        local, order = {}, []
+        for i in self._indices(indices):
+            w = int(np.searchsorted(offsets, i, side="right") - 1)
+            order.append((w, len(local.setdefault(w, []))))
+            local[w].append(int(i - offsets[w]))
+        return local, order
+
+    def _dispatch(self, cmd, make_data, indices):
+        """Send cmd to the shards owning indices; results in the order of indices."""
+        local, order = self._by_shard(indices)
+        for w, rows in local.items():
+            self.remotes[w].send((cmd, make_data(rows)))
+        results = {w: self.remotes[w].recv() for w in local}
+        return [results[w][k] for w, k in order] if cmd != "set_attr" else None
+
+    def get_attr(self, attr_name, indices=None):
+        return self._dispatch("get_attr", lambda rows: (attr_name, rows), indices)
+
+    def set_attr(self, attr_name, value, indices=None):
+        self._check_set_attr(attr_name, indices)
+        self._dispatch("set_attr", lambda rows: (attr_name, value, rows), indices)
+
+    def env_method(self, method_name, *method_args, indices=None, **method_kwargs):
+        self._check_env_method(method_name)
+        return self._dispatch("env_method", lambda rows: (method_name, method_args, method_kwargs, rows), indices)
+
+def make_vec_env(ham, n_envs, reference_energy, n_workers=1, **env_kwargs):
+    """One batched NumPy environment, or n_workers subprocess shards of it."""
+    if n_workers <= 1:
+        return BatchedCircuitVecEnv(ham, n_envs, reference_energy, **env_kwargs)
+    return SubprocCircuitVecEnv(ham, n_envs, n_workers, reference_energy, **env_kwargs)
+
+def benchmark(env_counts=(1, 16, 64, 256), n_workers=(1, 2), min_time=0.5):
+    """Random-policy env steps/sec versus N, qubit count and worker count."""
+    from statevector import _benchmark_hamiltonians
+    from tapering import ground_energy
+
+    rows = []
+    for n_qubits, (name, ham) in _benchmark_hamiltonians().items():
+        reference = ground_energy(ham)
+        for workers in n_workers:
+            for n_envs in env_counts:
+                if workers > n_envs:
+                    continue
+                env = make_vec_env(ham, n_envs, reference, n_workers=workers, seed=0)
+                env.reset()
+                n_steps = 0
+                start = time.perf_counter()
+                while time.perf_counter() - start < min_time:
+                    env.step(env.sample_actions())
+                    n_steps += 1
+                elapsed = time.perf_counter() - start
+                env.close()
+                rows.append({"hamiltonian": name, "n_qubits": n_qubits, "n_envs": n_envs,
+                             "n_workers": workers, "env_steps_per_s": n_steps * n_envs / elapsed})
+    return rows
+
+def main():
+    print("Vectorized RLQAS environment throughput (random actions, max 20 gates)")
+    print("=" * 64)
+    print(f"{'hamiltonian':>12} {'qubits':>6} {'workers':>7} {'N':>5} {'env steps/s':>12}")
+    for row in benchmark():
+        print(f"{row['hamiltonian']:>12} {row['n_qubits']:>6} {row['n_workers']:>7} {row['n_envs']:>5} "
+              f"{row['env_steps_per_s']:12.0f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
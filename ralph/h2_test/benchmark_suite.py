@@ -0,0 +1,362 @@
+#!/usr/bin/env python
+"""
+Stage-by-stage performance benchmark of the Hamiltonian pipeline.
+
+Every (molecule, basis) case runs the pipeline stages in a fresh process:
+molecule build, RHF, AO->MO transform (np.einsum and ao2mo.full, timed
+separately), FCI (skipped above --max-fci-determinants), qubit mapping
+(Jordan-Wigner) and validation (results file written, reloaded and checked as
+validate_h2.py does). The validation reference comes from a separate RHF/FCI
+calculation (reference_energies), run once per case in its own process, so a
+regression that corrupts the pipeline's energies fails the suite. For each
+stage the suite records wall time, the stage's own peak RSS and the iteration
+count where the stage iterates (SCF cycles, Davidson steps). The kernel's RSS
+high-water mark is reset before every stage, as telemetry.py does. Memory
+regressions are judged on the stage's growth above its starting RSS. Where
+/proc does not allow the reset, both are recorded as None and not compared.
+
+Each run appends one JSON line to the history file with the environment
+(git commit, host, library versions, thread settings) and every case's stages;
+wall times are the median over --repeats fresh processes. A run can be stored
+as the baseline, and later runs are compared with it: a stage regresses when
+its wall time or RSS growth grows by more than --threshold (relative) and by more
+than a small absolute noise floor. Regressions make the exit status 1.
+
+Usage:
+    python benchmark_suite.py                          # run, append to history
+    python benchmark_suite.py --save-baseline          # ... and store as baseline
+    python benchmark_suite.py --threshold 0.25 --bases sto-3g,6-31g
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from telemetry import _reset_peak_rss, _status_kb
+
+PIPELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Ralph_Test_H2_Hamiltonian")
+
+MOLECULES = {
+    "H2": "H 0 0 0; H 0 0 0.74",
+    "LiH": "Li 0 0 0; H 0 0 1.6",
+    "BeH2": "Be 0 0 0; H 0 0 1.33; H 0 0 -1.33",
+}
+DEFAULT_BASES = ("sto-3g", "6-31g", "cc-pvdz")
+STAGES = ("molecule", "rhf", "ao2mo_einsum", "ao2mo_full", "fci", "qubit_mapping", "validation")
+HISTORY_FILE = "benchmark_history.jsonl"
+BASELINE_FILE = "benchmark_baseline.json"
+# Differences below these are treated as noise whatever the relative change
+MIN_WALL_DELTA_S = 0.05
+MIN_RSS_DELTA_MB = 5.0
+# BeH2/cc-pVDZ has 4.1M determinants and its FCI takes ~1000 s on one core
+DEFAULT_MAX_FCI_DETERMINANTS = 1_000_000
+# Pipeline and reference energies are both converged far below this
+ENERGY_TOLERANCE_HARTREE = 1e-6
+
+class StageTimer:
+    """Collects wall time, per-stage peak RSS and iterations per stage."""
+
+    def __init__(self):
+        self.stages = {}
+
+    def run(self, name, func, *args, **kwargs):
+        # ru_maxrss only ever grows, so every stage after FCI would report FCI's peak;
+        # resetting VmHWM first makes the peak the stage's own
+        reset = _reset_peak_rss()
+        start_kb = _status_kb("VmRSS")
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        wall_s = time.perf_counter() - start
+        peak_kb = _status_kb("VmHWM") if reset and start_kb is not None else None
+        self.stages[name] = {"wall_s": wall_s, "peak_rss_mb": None if peak_kb is None else peak_kb / 1024,
+                             # What the stage itself added on top of memory earlier stages still hold
+                             "rss_growth_mb": None if peak_kb is None else (peak_kb - start_kb) / 1024,
+                             "iterations": None}
+        return result
+
+def n_fci_determinants(mol, norb):
+    n_alpha, n_beta = mol.nelec
+    return math.comb(norb, n_alpha) * math.comb(norb, n_beta)
+
+def reference_energies(molecule, basis, max_fci_determinants=DEFAULT_MAX_FCI_DETERMINANTS):
+    """HF/FCI energies for the validation stage, computed independently of run_case.
+
+    A fresh RHF from the atomic guess, then FCI through fci.direct_spin1 on MO
+    integrals built from its own orbitals, so nothing is shared with the timed
+    stages. FCI is None where run_case skips it.
+    """
+    from pyscf import gto, scf, fci, ao2mo
+
+    mol = gto.M(atom=MOLECULES[molecule], basis=basis, unit="angstrom", verbose=0)
+    mf = scf.RHF(mol)
+    mf.init_guess = "atom"
+    mf.conv_tol = 1e-10
+    mf.kernel()
+    mo = mf.mo_coeff
+    norb = mo.shape[1]
+    fci_energy = None
+    if n_fci_determinants(mol, norb) <= max_fci_determinants:
+        h1 = mo.T @ mf.get_hcore() @ mo
+        fci_energy, _ = fci.direct_spin1.kernel(h1, ao2mo.kernel(mol, mo), norb, mol.nelec, ecore=mol.energy_nuc())
+    return {"hf_hartree": float(mf.e_tot), "fci_hartree": None if fci_energy is None else float(fci_energy),
+            "n_orbitals": norb}
+
+def run_case(molecule, basis, reference_energy, max_fci_determinants=DEFAULT_MAX_FCI_DETERMINANTS):
+    """All pipeline stages for one molecule/basis in this process; returns the stage records.
+
+    reference_energy is the reference_energies() result the validation stage
+    checks against. FCI is skipped (recorded with wall_s None) above
+    max_fci_determinants; validation then checks the HF energy only.
+    """
+    sys.path.insert(0, PIPELINE_DIR)
+    from pyscf import gto, scf, fci, ao2mo
+    from packed_eri import PackedERI
+    from qubit_hamiltonian import build_qubit_hamiltonian
+    from results_io import save_results
+    from validate_h2 import load_ralph_results, validate_implementation
+
+    timer = StageTimer()
+    mol = timer.run("molecule", gto.M, atom=MOLECULES[molecule], basis=basis, unit="angstrom", verbose=0)
+
+    mf = scf.RHF(mol)
+    mf.conv_tol = 1e-10
+    timer.run("rhf", mf.kernel)
+    timer.stages["rhf"]["iterations"] = int(mf.cycles)
+
+    mo = mf.mo_coeff
+    norb = mo.shape[1]
+
+    def einsum_transform():
+        eri_ao = mol.intor("int2e")
+        h1_mo = mo.T @ mf.get_hcore() @ mo
+        return h1_mo, np.einsum("pqrs,pi,qj,rk,sl->ijkl", eri_ao, mo, mo, mo, mo, optimize=True)
+
+    h1_mo, eri_full = timer.run("ao2mo_einsum", einsum_transform)
+    eri_packed = timer.run("ao2mo_full", ao2mo.full, mol, mo)
+    if not np.allclose(ao2mo.restore(1, eri_packed, norb), eri_full, atol=1e-8):
+        raise RuntimeError("np.einsum and ao2mo.full MO integrals disagree")
+    del eri_full
+
+    n_determinants = n_fci_determinants(mol, norb)
+    if n_determinants <= max_fci_determinants:
+        # Iterations are Davidson steps; 0 means the space was small enough to diagonalize directly
+        steps = []
+        solver = fci.FCI(mf)
+        fci_energy = float(timer.run("fci", solver.kernel, callback=lambda env: steps.append(1))[0])
+        timer.stages["fci"]["iterations"] = len(steps)
+    else:
+        fci_energy = None
+        timer.stages["fci"] = {"wall_s": None, "peak_rss_mb": None, "rss_growth_mb": None, "iterations": None,
+                               "skipped": f"{n_determinants} determinants > {max_fci_determinants}"}
+
+    ham = timer.run("qubit_mapping", build_qubit_hamiltonian, h1_mo, PackedERI.from_any(eri_packed, norb),
+                    mol.energy_nuc(), "jordan_wigner")
+
+    results = {
+        "molecule": {"formula": molecule, "basis_set": basis, "bond_length_angstrom": None},
+        "energies": {"hf_hartree": float(mf.e_tot), "fci_hartree": fci_energy,
+                     "correlation_energy": None if fci_energy is None else fci_energy - mf.e_tot},
+        "hamiltonian": {"n_qubits": ham.n_qubits, "n_pauli_terms": ham.n_terms,
+                        "h1_hermitian": bool(np.allclose(h1_mo, h1_mo.T))},
+    }
+    # Energies and qubit bounds come from the independent run; there is no bond length to check
+    n_spin_orbitals = 2 * reference_energy["n_orbitals"]
+    reference = {
+        "molecule": results["molecule"],
+        "energies": {"hf_hartree": reference_energy["hf_hartree"],
+                     "fci_hartree": reference_energy["fci_hartree"] if fci_energy is not None else None},
+        "hamiltonian": {"n_qubits_min": n_spin_orbitals - 2, "n_qubits_max": n_spin_orbitals},
+        "verification_tolerances": {"hf_energy_tolerance_hartree": ENERGY_TOLERANCE_HARTREE,
+                                    "fci_energy_tolerance_hartree": ENERGY_TOLERANCE_HARTREE,
+                                    "bond_length_tolerance_angstrom": 0.01},
+    }
+
+    def validate():
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "results.json")
+            save_results(path, results)
+            return validate_implementation(load_ralph_results(path), reference)
+
+    validation = timer.run("validation", validate)
+    if fci_energy is None:
+        # validate_energies needs both energies; with FCI skipped compare HF directly
+        hf_error = abs(mf.e_tot - reference_energy["hf_hartree"])
+        energies_ok = bool(hf_error <= ENERGY_TOLERANCE_HARTREE)
+        validation["energies"] = (energies_ok, "OK" if energies_ok else f"HF energy off by {hf_error:.2e} Hartree")
+    if not validation["hamiltonian"][0] or not validation["energies"][0]:
+        raise RuntimeError(f"Validation failed: {validation}")
+
+    return {"molecule": molecule, "basis": basis, "n_orbitals": norb, "n_electrons": mol.nelectron,
+            "n_determinants": n_determinants, "n_qubits": ham.n_qubits, "n_pauli_terms": ham.n_terms,
+            "hf_hartree": float(mf.e_tot), "fci_hartree": fci_energy, "stages": timer.stages}
+
+def run_case_repeated(molecule, basis, repeats, max_fci_determinants=DEFAULT_MAX_FCI_DETERMINANTS):
+    """Run a case in `repeats` fresh processes; median wall time, max peak RSS per stage.
+
+    The validation reference is computed once, in its own process, before the timed runs.
+    """
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        reference_energy = pool.submit(reference_energies, molecule, basis, max_fci_determinants).result()
+    runs = []
+    for _ in range(repeats):
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            runs.append(pool.submit(run_case, molecule, basis, reference_energy, max_fci_determinants).result())
+    case = dict(runs[0])
+    case["stages"] = {}
+    for stage in STAGES:
+        if "skipped" in runs[0]["stages"][stage]:
+            case["stages"][stage] = runs[0]["stages"][stage]
+            continue
+        walls = [run["stages"][stage]["wall_s"] for run in runs]
+        peaks = [run["stages"][stage]["peak_rss_mb"] for run in runs]
+        growths = [run["stages"][stage]["rss_growth_mb"] for run in runs]
+        case["stages"][stage] = {"wall_s": float(np.median(walls)), "wall_s_min": min(walls),
+                                 "peak_rss_mb": None if None in peaks else max(peaks),
+                                 "rss_growth_mb": None if None in growths else max(growths),
+                                 "iterations": runs[0]["stages"][stage]["iterations"]}
+    return case
+
+def environment():
+    """Where and with what a run was measured, so history entries are comparable."""
+    import pyscf
+    import scipy
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "git_commit": commit or None,
+        "host": platform.node(),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "scipy": scipy.__version__,
+        "pyscf": pyscf.__version__,
+        "cpu_count": os.cpu_count(),
+        "threads": {k: os.environ.get(k) for k in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS")},
+    }
+
+def case_key(case):
+    return f"{case['molecule']}/{case['basis']}"
+
+def find_regressions(run, baseline, threshold):
+    """Stages slower or larger than the baseline by more than threshold (and the noise floor)."""
+    reference = {case_key(case): case for case in baseline["cases"]}
+    regressions = []
+    for case in run["cases"]:
+        base = reference.get(case_key(case))
+        if base is None:
+            continue
+        for stage, record in case["stages"].items():
+            old = base["stages"].get(stage)
+            if old is None or "skipped" in old or "skipped" in record:
+                continue
+            # Memory is compared on each stage's own growth, so a larger FCI does not
+            # also flag every later stage that runs while its arrays are still held
+            for metric, floor in (("wall_s", MIN_WALL_DELTA_S), ("rss_growth_mb", MIN_RSS_DELTA_MB)):
+                if record.get(metric) is None or old.get(metric) is None:
+                    continue                             # Unavailable here, or a baseline from before it existed
+                delta = record[metric] - old[metric]
+                if delta > floor and record[metric] > old[metric] * (1 + threshold):
+                    regressions.append({"case": case_key(case), "stage": stage, "metric": metric,
+                                        "baseline": old[metric], "current": record[metric],
+                                        "ratio": record[metric] / old[metric]})
+    return regressions
+
+def append_history(path, run):
+    with open(path, "a") as f:
+        f.write(json.dumps(run) + "\n")
+
+def print_run(run):
+    print(f"\n{'case':>16} {'stage':>14} {'wall s':>9} {'peak RSS MB':>12} {'growth MB':>10} {'iterations':>10}")
+    for case in run["cases"]:
+        for stage, record in case["stages"].items():
+            if "skipped" in record:
+                print(f"{case_key(case):>16} {stage:>14} {'skipped':>9}  ({record['skipped']})")
+                continue
+            iterations = "" if record["iterations"] is None else record["iterations"]
+            peak = "-" if record["peak_rss_mb"] is None else f"{record['peak_rss_mb']:.1f}"
+            growth = "-" if record.get("rss_growth_mb") is None else f"{record['rss_growth_mb']:.1f}"
+            print(f"{case_key(case):>16} {stage:>14} {record['wall_s']:9.3f} {peak:>12} {growth:>10} "
+                  f"{iterations:>10}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Time every stage of the Hamiltonian pipeline.")
+    parser.add_argument("--molecules", default=",".join(MOLECULES),
+                        help=f"Comma-separated molecules (default: {','.join(MOLECULES)})")
+    parser.add_argument("--bases", default=",".join(DEFAULT_BASES),
+                        help=f"Comma-separated basis sets (default: {','.join(DEFAULT_BASES)})")
+    parser.add_argument("--repeats", type=int, default=3,
+                        help="Fresh-process runs per case; wall times are the median (default: 3)")
+    parser.add_argument("--max-fci-determinants", type=int, default=DEFAULT_MAX_FCI_DETERMINANTS,
+                        help=f"Skip FCI above this many determinants (default: {DEFAULT_MAX_FCI_DETERMINANTS})")
+    parser.add_argument("--history", default=HISTORY_FILE,
+                        help=f"JSON-lines history file to append to (default: {HISTORY_FILE})")
+    parser.add_argument("--baseline", default=BASELINE_FILE,
+                        help=f"Baseline run to compare against (default: {BASELINE_FILE})")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="Store this run as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Relative increase counted as a regression (default: 0.2 = 20%%)")
+    args = parser.parse_args()
+
+    molecules = [m.strip() for m in args.molecules.split(",")]
+    bases = [b.strip() for b in args.bases.split(",")]
+    unknown = [m for m in molecules if m not in MOLECULES]
+    if unknown:
+        print(f"✗ Unknown molecules {unknown}, expected some of {list(MOLECULES)}")
+        return 2
+
+    print(f"Benchmarking {len(molecules)} molecules x {len(bases)} basis sets, {args.repeats} repeats each...")
+    run = {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"), "environment": environment(),
+           "repeats": args.repeats, "cases": []}
+    for molecule in molecules:
+        for basis in bases:
+            start = time.perf_counter()
+            try:
+                case = run_case_repeated(molecule, basis, args.repeats, args.max_fci_determinants)
+            except Exception as e:
+                print(f"✗ {molecule}/{basis} failed: {e}")
+                return 1
+            run["cases"].append(case)
+            print(f"  ✓ {molecule}/{basis}: {case['n_orbitals']} orbitals, {case['n_pauli_terms']} Pauli terms "
+                  f"({time.perf_counter() - start:.1f} s)")
+    print_run(run)
+
+    status = 0
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = find_regressions(run, baseline, args.threshold)
+        run["baseline"] = {"path": args.baseline, "timestamp": baseline.get("timestamp"),
+                           "threshold": args.threshold, "regressions": regressions}
+        if regressions:
+            status = 1
+            print(f"\n✗ {len(regressions)} regression(s) beyond {args.threshold:.0%} vs baseline "
+                  f"{baseline.get('timestamp')}:")
+            for r in regressions:
+                print(f"  {r['case']:>16} {r['stage']:>14} {r['metric']:>12}: "
+                      f"{r['baseline']:.3f} -> {r['current']:.3f} ({r['ratio']:.2f}x)")
+        else:
+            print(f"\n✓ No regressions beyond {args.threshold:.0%} vs baseline {baseline.get('timestamp')}")
+    else:
+        print(f"\nNo baseline at {args.baseline}; use --save-baseline to store this run")
+
+    append_history(args.history, run)
+    print(f"✓ Appended run to {args.history}")
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(run, f, indent=2)
+        print(f"✓ Saved baseline to {args.baseline}")
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main())
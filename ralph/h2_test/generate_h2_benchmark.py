@@ -2,27 +2,91 @@
 """
 Generate benchmark values for H2 molecule at 0.5 Å bond length using PySCF.
 This script produces reference values that can be used to validate Ralph's implementation.
+
+With --scan it instead builds a potential-energy-surface reference: every
+(bond length, basis) point of the grid is computed in a process pool and the
+results are written to a single indexed benchmark file. With --warm-start each
+worker walks a contiguous stretch of the grid and seeds every RHF from the
+converged orbitals of the previous point.
+
+An --output path ending in .h5 writes the chunked HDF5 format of results_io.py
+instead of JSON, including each point's AO integrals and MO coefficients.
+
+PySCF is imported only where a calculation starts, so argument parsing and
+importers such as job_array.py do not pay for it.
 """
-import json
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
-from pyscf import gto, scf, fci
+from results_io import is_hdf5, save_results, save_scan
 
-def generate_h2_benchmark():
-    """Generate benchmark values for H2 at 0.5 Å bond length."""
-
-    # Define H2 molecule with 0.5 Å bond length
-    mol = gto.M(
-        atom='H 0 0 0; H 0 0 0.5',  # 0.5 Å along z-axis
-        basis='sto-3g',             # Minimal basis set
+def build_h2_molecule(bond_length=0.5, basis='sto-3g'):
+    """Build the H2 molecule along the z-axis."""
+    from pyscf import gto
+    return gto.M(
+        atom=f'H 0 0 0; H 0 0 {bond_length}',  # bond along z-axis
+        basis=basis,
         unit='angstrom',            # Explicitly specify angstrom units
         verbose=0                   # Suppress output
     )
 
-    # Hartree-Fock calculation
+def warm_start_guess(mol, mo_coeff, mo_occ):
+    """Density guess for mol from a neighbouring geometry's converged MOs.
+
+    The old MO coefficients are Löwdin-orthonormalized in the new AO overlap
+    metric, so the guess density integrates to the right electron count even
+    though the basis functions have moved with the nuclei.
+    """
+    s = mol.intor_symmetric("int1e_ovlp")
+    occ = mo_occ > 0
+    c_occ = mo_coeff[:, occ]
+    w, v = np.linalg.eigh(c_occ.T @ s @ c_occ)
+    c_occ = c_occ @ (v * w ** -0.5) @ v.T
+    return (c_occ * mo_occ[occ]) @ c_occ.T
+
+def run_rhf(mol, guess=None):
+    """Run RHF, seeded from a neighbouring point's (mo_coeff, mo_occ) if given.
+
+    Falls back to the default cold-start guess when the warm-started SCF does
+    not converge. Returns the mean-field object and a dict of SCF statistics.
+    """
+    from pyscf import scf
+    mf = scf.RHF(mol)
+    if guess is None:
+        mf.kernel()
+        return mf, {"scf_guess": "default", "scf_cycles": mf.cycles, "cold_start_fallback": False}
+
+    mf.kernel(dm0=warm_start_guess(mol, *guess))
+    if mf.converged:
+        return mf, {"scf_guess": "neighbour", "scf_cycles": mf.cycles, "cold_start_fallback": False}
+
+    warm_cycles = mf.cycles
     mf = scf.RHF(mol)
-    hf_energy = mf.kernel()
+    mf.kernel()
+    return mf, {"scf_guess": "default", "scf_cycles": warm_cycles + mf.cycles, "cold_start_fallback": True}
+
+def generate_h2_benchmark(bond_length=0.5, basis='sto-3g', guess=None, keep_integrals=False):
+    """Generate benchmark values for H2 (0.5 Å, STO-3G by default)."""
+    return _benchmark_point(bond_length, basis, guess, keep_integrals)[0]
+
+def _benchmark_point(bond_length, basis, guess=None, keep_integrals=False):
+    """Compute the benchmark entry for one point; also returns the converged RHF object.
+
+    With keep_integrals the entry also carries the arrays themselves under
+    "integrals" (only storable in the HDF5 format).
+    """
+
+    # Define H2 molecule
+    mol = build_h2_molecule(bond_length, basis)
+
+    # Hartree-Fock calculation
+    mf, scf_info = run_rhf(mol, guess)
+    hf_energy = mf.e_tot
 
     # Full Configuration Interaction (FCI) calculation
+    from pyscf import fci
     cisolver = fci.FCI(mf)
     fci_energy, fci_vec = cisolver.kernel()
 
@@ -32,8 +96,9 @@ def generate_h2_benchmark():
 
     # Calculate Hamiltonian properties
     # For H2 with STO-3G basis: 4 spin orbitals -> 2-4 qubits depending on mapping
-    n_qubits_min = 2   # Minimal mapping (e.g., parity with symmetry)
-    n_qubits_max = 4   # Jordan-Wigner mapping
+    n_spin_orbitals = 2 * mol.nao_nr()
+    n_qubits_min = n_spin_orbitals - 2  # Minimal mapping (e.g., parity with symmetry)
+    n_qubits_max = n_spin_orbitals      # Jordan-Wigner mapping
 
     # Check Hermiticity
     h1_hermitian = np.allclose(h1, h1.conj().T)
@@ -44,10 +109,10 @@ def generate_h2_benchmark():
             "formula": "H2",
             "atoms": [
                 {"symbol": "H", "position": [0.0, 0.0, 0.0]},
-                {"symbol": "H", "position": [0.0, 0.0, 0.5]}
+                {"symbol": "H", "position": [0.0, 0.0, bond_length]}
             ],
-            "bond_length_angstrom": 0.5,
-            "basis_set": "sto-3g"
+            "bond_length_angstrom": bond_length,
+            "basis_set": basis
         },
         "energies": {
             "hf_hartree": float(hf_energy),
@@ -55,11 +120,11 @@ def generate_h2_benchmark():
             "correlation_energy": float(fci_energy - hf_energy)
         },
         "hamiltonian": {
-            "n_spin_orbitals": 4,
+            "n_spin_orbitals": n_spin_orbitals,
             "n_qubits_min": n_qubits_min,
             "n_qubits_max": n_qubits_max,
             "one_electron_integrals_shape": list(h1.shape),
-            "two_electron_integrals_shape": [4, 4, 4, 4],  # STO-3G basis shape
+            "two_electron_integrals_shape": [n_spin_orbitals] * 4,  # Spin-orbital shape
             "h1_hermitian": h1_hermitian
         },
         "verification_tolerances": {
@@ -71,23 +136,190 @@ def generate_h2_benchmark():
         "computation_details": {
             "method": "PySCF RHF + FCI",
             "pyscf_version": "2.12.0",
-            "converged": mf.converged
+            "converged": mf.converged,
+            **scf_info
+        }
+    }
+    if keep_integrals:
+        benchmark["integrals"] = {"h1_ao": h1, "eri_ao": eri, "mo_coeff": mf.mo_coeff}
+
+    return benchmark, mf
+
+def _init_scan_worker():
+    """Pin each pool worker to one BLAS/OpenMP thread so points do not oversubscribe cores."""
+    from pyscf import lib
+    lib.num_threads(1)
+
+def _scan_segment(segment):
+    """Compute a contiguous run of bond lengths for one basis and time every point.
+
+    With warm_start each point is seeded from the previous point's converged
+    orbitals; with compare_cold each point is also re-run from the default
+    guess so the SCF iteration counts can be compared.
+    """
+    basis, bond_lengths, warm_start, compare_cold, keep_integrals = segment
+    entries = []
+    guess = None
+    for bond_length in bond_lengths:
+        start = time.perf_counter()
+        entry, mf = _benchmark_point(bond_length, basis, guess, keep_integrals)
+        entry["timing"] = {
+            "wall_time_s": time.perf_counter() - start,
+            "worker_pid": os.getpid()
         }
+        if compare_cold:
+            _, cold_info = run_rhf(mf.mol)
+            entry["computation_details"]["scf_cycles_cold"] = cold_info["scf_cycles"]
+        if warm_start:
+            guess = (mf.mo_coeff, mf.mo_occ)
+        entries.append(entry)
+    return entries
+
+def _split_segments(bond_lengths, n_segments):
+    """Split a sorted grid into at most n_segments contiguous, non-empty runs."""
+    return [list(chunk) for chunk in np.array_split(np.asarray(bond_lengths, dtype=float), n_segments)
+            if len(chunk)]
+
+def scan_key(basis, bond_length):
+    """Index key of a scan entry, e.g. 'sto-3g@0.7400'."""
+    return f"{basis}@{bond_length:.4f}"
+
+def generate_pes_scan(bond_lengths, bases, n_workers=None, warm_start=False, compare_cold=False,
+                      keep_integrals=False):
+    """Run RHF+FCI on every (bond length, basis) pair, spread over a process pool.
+
+    Cold scans dispatch single points. Warm-started scans dispatch one
+    contiguous stretch of the sorted grid per worker and basis, so that every
+    point but the first of each stretch has a converged neighbour to start from.
+    """
+    n_workers = n_workers or os.cpu_count() or 1
+    bond_lengths = sorted(float(r) for r in bond_lengths)
+    n_segments = n_workers if warm_start else len(bond_lengths)
+    segments = [(basis, seg, warm_start, compare_cold, keep_integrals)
+                for basis in bases for seg in _split_segments(bond_lengths, n_segments)]
+
+    start = time.perf_counter()
+    if n_workers == 1:
+        _init_scan_worker()
+        results = [_scan_segment(seg) for seg in segments]
+    else:
+        # Large chunks keep IPC overhead negligible against the per-point cost
+        chunksize = max(1, len(segments) // (4 * n_workers))
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_scan_worker) as pool:
+            results = list(pool.map(_scan_segment, segments, chunksize=chunksize))
+    entries = [entry for seg_entries in results for entry in seg_entries]
+    total_wall = time.perf_counter() - start
+
+    entries.sort(key=lambda e: (e["molecule"]["basis_set"], e["molecule"]["bond_length_angstrom"]))
+    point_times = np.array([e["timing"]["wall_time_s"] for e in entries])
+    scf_cycles = [e["computation_details"]["scf_cycles"] for e in entries]
+
+    scf_stats = {
+        "warm_start": warm_start,
+        "total_scf_cycles": int(sum(scf_cycles)),
+        "cold_start_fallbacks": sum(e["computation_details"]["cold_start_fallback"] for e in entries)
     }
+    if compare_cold:
+        scf_stats["total_scf_cycles_cold"] = int(sum(e["computation_details"]["scf_cycles_cold"]
+                                                     for e in entries))
 
-    return benchmark
+    return {
+        "scan": {
+            "formula": "H2",
+            "bases": list(bases),
+            "bond_lengths_angstrom": [float(r) for r in bond_lengths],
+            "n_points": len(entries),
+            "n_workers": n_workers,
+            "total_wall_time_s": total_wall,
+            "sum_point_wall_time_s": float(point_times.sum()),
+            "mean_point_wall_time_s": float(point_times.mean()),
+            "max_point_wall_time_s": float(point_times.max()),
+            # Ratio of serial work to elapsed time: ~n_workers for perfect scaling
+            "parallel_speedup": float(point_times.sum() / total_wall) if total_wall > 0 else 0.0,
+            **scf_stats
+        },
+        "index": {scan_key(e["molecule"]["basis_set"], e["molecule"]["bond_length_angstrom"]): i
+                  for i, e in enumerate(entries)},
+        "entries": entries
+    }
+
+def parse_bond_lengths(spec):
+    """Parse 'start:stop:num' (inclusive linspace) or a comma-separated list of bond lengths."""
+    if ":" in spec:
+        start, stop, num = spec.split(":")
+        return list(np.linspace(float(start), float(stop), int(num)))
+    return [float(r) for r in spec.split(",")]
+
+def run_scan(args):
+    """Run the PES scan mode and save the indexed benchmark file."""
+    bond_lengths = parse_bond_lengths(args.bond_lengths)
+    bases = [b.strip() for b in args.bases.split(",")]
+    print(f"Generating H2 PES benchmark: {len(bond_lengths)} bond lengths x {len(bases)} basis sets "
+          f"on {args.workers or os.cpu_count()} workers...")
+
+    scan = generate_pes_scan(bond_lengths, bases, args.workers, warm_start=args.warm_start,
+                             compare_cold=args.compare_cold, keep_integrals=is_hdf5(args.output))
+    save_scan(args.output, scan)
+
+    info = scan["scan"]
+    print(f"\n✓ PES benchmark generated successfully!")
+    print(f"  Output file: {args.output}")
+    print(f"  Points: {info['n_points']}")
+    print(f"\nTiming:")
+    print(f"  Total wall time: {info['total_wall_time_s']:.2f} s")
+    print(f"  Per point: mean {info['mean_point_wall_time_s']:.3f} s, max {info['max_point_wall_time_s']:.3f} s")
+    print(f"  Parallel speedup: {info['parallel_speedup']:.2f}x on {info['n_workers']} workers")
+
+    print(f"\nSCF iterations ({'warm start' if info['warm_start'] else 'default guess'}):")
+    if args.compare_cold:
+        print(f"  {'basis':>10} {'R (Å)':>8} {'cycles':>7} {'cold':>5}")
+        for e in scan["entries"]:
+            details = e["computation_details"]
+            flag = "  (fell back to cold start)" if details["cold_start_fallback"] else ""
+            print(f"  {e['molecule']['basis_set']:>10} {e['molecule']['bond_length_angstrom']:8.4f} "
+                  f"{details['scf_cycles']:7d} {details['scf_cycles_cold']:5d}{flag}")
+        print(f"  Total: {info['total_scf_cycles']} vs {info['total_scf_cycles_cold']} cold-start cycles")
+    else:
+        print(f"  Total: {info['total_scf_cycles']} cycles")
+    print(f"  Cold-start fallbacks: {info['cold_start_fallbacks']}")
+    return 0
 
 def main():
     """Generate and save benchmark data."""
+    parser = argparse.ArgumentParser(description="Generate H2 reference values with PySCF.")
+    parser.add_argument("--scan", action="store_true",
+                        help="Scan a bond-length grid over several basis sets in a process pool")
+    parser.add_argument("--bond-lengths", default="0.3:3.0:28",
+                        help="Scan grid as 'start:stop:num' or 'r1,r2,...' in Å (default: 0.3:3.0:28)")
+    parser.add_argument("--bases", default="sto-3g",
+                        help="Comma-separated basis sets for the scan (default: sto-3g)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Number of worker processes (default: all cores)")
+    parser.add_argument("--warm-start", action="store_true",
+                        help="Seed each scan point's RHF from the neighbouring point's converged orbitals")
+    parser.add_argument("--compare-cold", action="store_true",
+                        help="Also re-run every scan point from the default guess and report both iteration counts")
+    parser.add_argument("--output", default=None,
+                        help="Output file, .json or .h5 (default: h2_benchmark.json, or h2_pes_benchmark.json with --scan)")
+    args = parser.parse_args()
+
+    if args.scan:
+        args.output = args.output or "h2_pes_benchmark.json"
+        try:
+            return run_scan(args)
+        except Exception as e:
+            print(f"✗ Error generating PES benchmark: {e}")
+            import traceback
+            traceback.print_exc()
+            return 1
+
     print("Generating H2 benchmark values using PySCF...")
 
     try:
-        benchmark = generate_h2_benchmark()
-
-        # Save to JSON file
-        output_file = "h2_benchmark.json"
-        with open(output_file, 'w') as f:
-            json.dump(benchmark, f, indent=2)
+        # Save to JSON, or to HDF5 together with the integrals
+        output_file = args.output or "h2_benchmark.json"
+        benchmark = generate_h2_benchmark(keep_integrals=is_hdf5(output_file))
+        save_results(output_file, benchmark, kind="benchmark")
 
         print(f"\n✓ Benchmark generated successfully!")
         print(f"  Output file: {output_file}")
@@ -114,4 +346,4 @@ def main():
     return 0
 
 if __name__ == "__main__":
-    exit(main())
\ No newline at end of file
+    exit(main())
@@ -0,0 +1,533 @@
+#!/usr/bin/env python
+"""
+Job-array driver for scan and Ralph workloads on SLURM, with a local fallback.
+
+A manifest (JSON lines) lists tasks as (molecule, geometry, basis, task):
+geometry is a bond length in Å for diatomics or an atom string, and task is
+one of TASKS. The driver keeps all state in one output directory:
+
+    <out>/results/<task_id>.json      one per finished task (written atomically)
+    <out>/failed/<task_id>.json       last error of a failing task
+    <out>/packs/round-NN/pack-NNNN.json   tasks handed to one array element
+    <out>/state.json                  attempts per task and submitted rounds
+
+Completion is tracked only through result files. Every round packs the tasks
+that still have none into --pack-size groups, and submits one array element
+per pack: an sbatch --array job, or a fresh process per pack in a local pool.
+Each element runs its tasks one after another in a single interpreter, so
+imports and process start-up are paid once per pack rather than once per task.
+Failed or lost tasks (an element killed by the scheduler leaves no result
+file) are resubmitted in the next round, up to --max-attempts. Re-running the
+driver on the same directory resumes. Finished tasks are skipped, and a
+still-queued SLURM job from an interrupted driver is waited for instead of
+resubmitted.
+
+Usage:
+    python job_array.py manifest --molecules H2,LiH --bond-lengths 0.5:3.0:26 --bases sto-3g,6-31g \\
+        --tasks fci --output scan.jsonl
+    python job_array.py run scan.jsonl --out scan_jobs --backend slurm --pack-size 8
+    python job_array.py run scan.jsonl --out scan_jobs --backend local --workers 4
+    python job_array.py status scan_jobs
+    python job_array.py benchmark                 # throughput and per-task overhead, local backend
+"""
+import argparse
+import glob
+import hashlib
+import importlib
+import json
+import os
+import re
+import shlex
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+HARNESS_DIR = os.path.dirname(os.path.abspath(__file__))
+PIPELINE_DIR = os.path.join(HARNESS_DIR, "Ralph_Test_H2_Hamiltonian")
+TASKS = ("benchmark", "fci", "hamiltonian", "noop")
+# Imported once per array element before its tasks run, so task times are compute only
+TASK_MODULES = {"benchmark": ("generate_h2_benchmark",), "fci": ("integral_cache",),
+                "hamiltonian": ("integral_cache", "qubit_hamiltonian"), "noop": ()}
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_POLL_INTERVAL_S = 30.0
+SBATCH_TEMPLATE = """#!/bin/bash
+#SBATCH --job-name={job_name}
+#SBATCH --output={log_dir}/%A_%a.out
+#SBATCH --error={log_dir}/%A_%a.err
+#SBATCH --array=0-{last}{throttle}
+#SBATCH --nodes=1
+#SBATCH --ntasks=1
+#SBATCH --cpus-per-task={cpus}
+#SBATCH --mem={mem}
+#SBATCH --time={time_limit}
+#SBATCH --partition={partition}
+#SBATCH --mail-type=NONE
+
+export OMP_NUM_THREADS=$SLURM_CPUS_PER_TASK
+cd {harness_dir} || exit 1
+{python} job_array.py run-pack {out_dir} --round {round} --pack "$SLURM_ARRAY_TASK_ID"
+"""
+
+def task_id(task):
+    """Stable id of a manifest entry (the same task in two manifests shares its result file)."""
+    blob = json.dumps(task, sort_keys=True).encode()
+    return hashlib.sha1(blob).hexdigest()[:16]
+
+def load_manifest(path):
+    """Manifest tasks keyed by task id, in file order; duplicates collapse."""
+    tasks = {}
+    with open(path) as f:
+        for n, line in enumerate(f, 1):
+            if not line.strip() or line.lstrip().startswith("#"):
+                continue
+            task = json.loads(line)
+            if task.get("task") not in TASKS:
+                raise ValueError(f"{path}:{n}: unknown task {task.get('task')!r}, expected one of {TASKS}")
+            tasks[task_id(task)] = task
+    return tasks
+
+def write_json(path, data):
+    """Write JSON atomically, so a reader never sees a half-written result."""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+    with os.fdopen(fd, "w") as f:
+        json.dump(data, f, indent=2, default=str)
+    os.replace(tmp, path)
+
+def read_json(path, default=None):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return default
+
+# --- Tasks (run inside array elements) --------------------------------------
+
+def atom_string(molecule, geometry):
+    """Atom spec of a task: geometry itself, or a diatomic along z at bond length geometry."""
+    if isinstance(geometry, str):
+        return geometry
+    symbols = re.findall(r"([A-Z][a-z]?)(\d*)", molecule)
+    atoms = [s for s, count in symbols for _ in range(int(count or 1))]
+    if len(atoms) != 2:
+        raise ValueError(f"A bond length needs a diatomic molecule, got {molecule!r}")
+    return f"{atoms[0]} 0 0 0; {atoms[1]} 0 0 {float(geometry)}"
+
+def _build_molecule(task):
+    from pyscf import gto
+    return gto.M(atom=atom_string(task["molecule"], task["geometry"]), basis=task["basis"],
+                 unit="angstrom", verbose=0)
+
+def run_task(task, attempt=1):
+    """Execute one manifest task and return its JSON-serializable result."""
+    kind = task["task"]
+    if kind == "noop":
+        # Driver overhead measurements and failure-handling checks
+        time.sleep(float(task.get("duration", 0.0)))
+        if attempt <= int(task.get("fail_attempts", 0)):
+            raise RuntimeError(f"Requested failure on attempt {attempt}")
+        return {}
+    if kind == "benchmark":
+        from generate_h2_benchmark import generate_h2_benchmark
+        if task["molecule"] != "H2" or isinstance(task["geometry"], str):
+            raise ValueError("benchmark tasks take H2 with a bond length")
+        return generate_h2_benchmark(float(task["geometry"]), task["basis"])
+
+    from integral_cache import IntegralCache
+    mol = _build_molecule(task)
+    data = IntegralCache().load_or_compute(mol, conv_tol=1e-12)
+    result = {"hf_hartree": data["hf_hartree"], "fci_hartree": data["fci_hartree"],
+              "nuclear_repulsion": data["nuclear_repulsion"], "n_orbitals": int(data["mo_coeff"].shape[1]),
+              "cache_hit": data["cache_hit"]}
+    if kind == "hamiltonian":
+        import numpy as np
+        from packed_eri import PackedERI
+        from qubit_hamiltonian import build_qubit_hamiltonian
+        norb = data["mo_coeff"].shape[1]
+        ham = build_qubit_hamiltonian(np.asarray(data["h1_mo"]), PackedERI(np.asarray(data["eri_mo"]), norb),
+                                      data["nuclear_repulsion"], task.get("mapping", "jordan_wigner"))
+        result.update(n_qubits=ham.n_qubits, n_pauli_terms=ham.n_terms)
+    return result
+
+def run_pack(out_dir, round_index, pack_index):
+    """Array-element entry point: run every task of one pack, writing a result or failure file each."""
+    pack_path = os.path.join(out_dir, "packs", f"round-{round_index:02d}", f"pack-{pack_index:04d}.json")
+    pack = read_json(pack_path)
+    start_unix = time.time()
+    sys.path[:0] = [PIPELINE_DIR, HARNESS_DIR]
+    for module in sorted({m for _, task, _ in pack["tasks"] for m in TASK_MODULES[task["task"]]}):
+        importlib.import_module(module)
+    n_failed = 0
+    for tid, task, attempt in pack["tasks"]:
+        start = time.perf_counter()
+        record = {"task_id": tid, "task": task, "attempt": attempt, "round": round_index, "pack": pack_index,
+                  "host": socket.gethostname(), "pid": os.getpid(), "start_unix": time.time()}
+        try:
+            record["result"] = run_task(task, attempt)
+            record["wall_s"] = time.perf_counter() - start
+            write_json(os.path.join(out_dir, "results", f"{tid}.json"), record)
+        except Exception as e:
+            n_failed += 1
+            record.update(wall_s=time.perf_counter() - start, error=f"{type(e).__name__}: {e}",
+                          traceback=traceback.format_exc())
+            write_json(os.path.join(out_dir, "failed", f"{tid}.json"), record)
+    write_json(os.path.splitext(pack_path)[0] + ".done.json",
+               {"start_unix": start_unix, "end_unix": time.time(), "host": socket.gethostname(),
+                "pid": os.getpid(), "n_tasks": len(pack["tasks"]), "n_failed": n_failed})
+    return n_failed
+
+# --- Backends ---------------------------------------------------------------
+
+class LocalBackend:
+    """A process pool with one fresh process per pack, standing in for a job array."""
+
+    name = "local"
+
+    def __init__(self, workers=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.slots = self.workers
+
+    def submit(self, out_dir, round_index, n_packs):
+        # max_tasks_per_child=1 spawns a new interpreter per pack, as an array element would
+        pool = ProcessPoolExecutor(max_workers=self.workers, max_tasks_per_child=1)
+        futures = [pool.submit(run_pack, out_dir, round_index, i) for i in range(n_packs)]
+        return {"backend": self.name, "pool": pool, "futures": futures, "out_dir": out_dir, "round": round_index}
+
+    def active(self, job):
+        if "futures" not in job:
+            return False                                 # Pool of an interrupted driver died with it
+        if all(f.done() for f in job["futures"]):
+            job["pool"].shutdown()
+            job["errors"] = self._crashed_elements(job)
+            return False
+        return True
+
+    @staticmethod
+    def _crashed_elements(job):
+        """Write a log per pack whose run_pack raised, as SLURM leaves an .err file; returns the errors."""
+        log_dir = os.path.join(job["out_dir"], "logs")
+        errors = []
+        for pack_index, future in enumerate(job["futures"]):
+            if future.cancelled() or future.exception() is None:
+                continue
+            error = future.exception()
+            log_path = os.path.join(log_dir, f"local_{job['round']:02d}_{pack_index}.err")
+            os.makedirs(log_dir, exist_ok=True)
+            with open(log_path, "w") as f:
+                f.write("".join(traceback.format_exception(error)))
+            errors.append({"pack": pack_index, "error": f"{type(error).__name__}: {error}", "log": log_path})
+        return errors
+
+    def cancel(self, job):
+        if "pool" in job:
+            job["pool"].shutdown(wait=False, cancel_futures=True)
+
+class SlurmBackend:
+    """sbatch --array submission; element state is polled with squeue."""
+
+    name = "slurm"
+
+    def __init__(self, cpus=1, mem="4G", time_limit="1:00:00", partition="CPU", max_concurrent=None,
+                 sbatch_args=""):
+        self.cpus = cpus
+        self.mem = mem
+        self.time_limit = time_limit
+        self.partition = partition
+        self.max_concurrent = max_concurrent
+        self.slots = max_concurrent                      # Unknown without an array throttle
+        self.sbatch_args = shlex.split(sbatch_args)
+
+    def submit(self, out_dir, round_index, n_packs):
+        log_dir = os.path.join(out_dir, "logs")
+        os.makedirs(log_dir, exist_ok=True)
+        script = SBATCH_TEMPLATE.format(
+            job_name=f"rlqas-array-{os.path.basename(os.path.abspath(out_dir))}", log_dir=log_dir,
+            last=n_packs - 1, throttle=f"%{self.max_concurrent}" if self.max_concurrent else "",
+            cpus=self.cpus, mem=self.mem, time_limit=self.time_limit, partition=self.partition,
+            harness_dir=HARNESS_DIR, python=sys.executable, out_dir=os.path.abspath(out_dir), round=round_index)
+        script_path = os.path.join(out_dir, "packs", f"round-{round_index:02d}", "array.sbatch")
+        with open(script_path, "w") as f:
+            f.write(script)
+        output = subprocess.run(["sbatch", "--parsable", *self.sbatch_args, script_path],
+                                capture_output=True, text=True, check=True).stdout
+        return {"backend": self.name, "job_id": output.strip().split(";")[0]}
+
+    def active(self, job):
+        query = subprocess.run(["squeue", "-h", "-j", job["job_id"], "-o", "%T"], capture_output=True, text=True)
+        # squeue forgets finished jobs ("Invalid job id"), which also means done
+        return query.returncode == 0 and bool(query.stdout.strip())
+
+    def cancel(self, job):
+        subprocess.run(["scancel", job["job_id"]], capture_output=True)
+
+# --- Driver -----------------------------------------------------------------
+
+def completed_ids(out_dir):
+    return {os.path.basename(p)[:-5] for p in glob.glob(os.path.join(out_dir, "results", "*.json"))}
+
+def load_state(out_dir):
+    return read_json(os.path.join(out_dir, "state.json"), {"attempts": {}, "rounds": []})
+
+def save_state(out_dir, state):
+    write_json(os.path.join(out_dir, "state.json"), state)
+
+def make_packs(pending, pack_size):
+    """Split pending task ids into packs of at most pack_size, in manifest order."""
+    return [pending[i:i + pack_size] for i in range(0, len(pending), pack_size)]
+
+def run_manifest(tasks, out_dir, backend, pack_size=8, max_attempts=DEFAULT_MAX_ATTEMPTS,
+                 poll_interval=DEFAULT_POLL_INTERVAL_S, wait=True, log=print):
+    """Drive tasks to completion through rounds of array submissions; returns the run summary."""
+    for sub in ("results", "failed", "packs"):
+        os.makedirs(os.path.join(out_dir, sub), exist_ok=True)
+    state = load_state(out_dir)
+    state["max_attempts"] = max_attempts
+    slots = getattr(backend, "slots", None)
+    start = time.perf_counter()
+    start_unix = time.time()
+
+    # An interrupted driver may have left a job in the queue: let it finish instead of duplicating it
+    if state["rounds"] and not state["rounds"][-1].get("collected"):
+        last = state["rounds"][-1]
+        if last["job"].get("backend") == backend.name and backend.active(last["job"]):
+            log(f"⏳ Waiting for round {last['round']} from a previous driver (job {last['job'].get('job_id')})")
+            while backend.active(last["job"]):
+                time.sleep(poll_interval)
+        last["collected"] = True
+        save_state(out_dir, state)
+
+    while True:
+        done = completed_ids(out_dir)
+        pending = [tid for tid in tasks if tid not in done]
+        exhausted = [tid for tid in pending if state["attempts"].get(tid, 0) >= max_attempts]
+        pending = [tid for tid in pending if tid not in exhausted]
+        if not pending:
+            break
+
+        round_index = len(state["rounds"])
+        round_dir = os.path.join(out_dir, "packs", f"round-{round_index:02d}")
+        os.makedirs(round_dir, exist_ok=True)
+        packs = make_packs(pending, pack_size)
+        for i, pack in enumerate(packs):
+            entries = []
+            for tid in pack:
+                state["attempts"][tid] = state["attempts"].get(tid, 0) + 1
+                entries.append([tid, tasks[tid], state["attempts"][tid]])
+            write_json(os.path.join(round_dir, f"pack-{i:04d}.json"), {"tasks": entries})
+
+        # Record the round before submitting: a driver killed in between must not reuse its pack files
+        record = {"round": round_index, "n_tasks": len(pending), "n_packs": len(packs),
+                  "submit_unix": time.time(), "collected": False, "job": {}}
+        state["rounds"].append(record)
+        save_state(out_dir, state)
+        job = backend.submit(out_dir, round_index, len(packs))
+        record["job"] = {k: v for k, v in job.items() if k in ("backend", "job_id")}
+        save_state(out_dir, state)
+        log(f"🚀 Round {round_index}: {len(pending)} tasks in {len(packs)} packs "
+            f"({backend.name}{', job ' + job['job_id'] if 'job_id' in job else ''})")
+        if not wait:
+            return summarize(tasks, out_dir, state, time.perf_counter() - start, slots, start_unix)
+
+        try:
+            while backend.active(job):
+                time.sleep(poll_interval)
+        except KeyboardInterrupt:
+            log("✗ Interrupted; finished tasks are kept, rerun the same command to resume")
+            raise
+        record["collected"] = True
+        record["end_unix"] = time.time()
+        if job.get("errors"):
+            record["errors"] = job["errors"]
+            log(f"  ✗ {len(job['errors'])} array elements crashed (first: pack {job['errors'][0]['pack']}, "
+                f"{job['errors'][0]['error']}; log {job['errors'][0]['log']})")
+        n_done = len(completed_ids(out_dir) & set(pending))
+        save_state(out_dir, state)
+        log(f"  ✓ {n_done}/{len(pending)} finished, {len(pending) - n_done} to retry or give up")
+
+    return summarize(tasks, out_dir, state, time.perf_counter() - start, slots, start_unix)
+
+def summarize(tasks, out_dir, state, wall_s=None, slots=None, since_unix=0.0):
+    """Completion counts, throughput and per-task overhead from the result and pack files.
+
+    Rates count only work started after since_unix (a resumed driver's own
+    share). wall_s defaults to first submission until the last element
+    finished. With the number of concurrent slots known, the overhead per task
+    is the slot time not spent inside tasks: queueing, start-up, imports,
+    polling and retries.
+    """
+    max_attempts = state.get("max_attempts", DEFAULT_MAX_ATTEMPTS)
+    results = [read_json(os.path.join(out_dir, "results", f"{tid}.json")) for tid in tasks]
+    finished = [r for r in results if r]
+    failed = [tid for tid, r in zip(tasks, results)
+              if r is None and state["attempts"].get(tid, 0) >= max_attempts]
+    counted = [r for r in finished if r["start_unix"] >= since_unix]
+    task_time = sum(r["wall_s"] for r in counted)
+
+    # Queue wait: round submission until a pack's element starts running
+    waits, element_time, last_end, finished_packs = [], 0.0, None, set()
+    for record in state["rounds"]:
+        for path in glob.glob(os.path.join(out_dir, "packs", f"round-{record['round']:02d}", "pack-*.done.json")):
+            done = read_json(path)
+            if done and done["start_unix"] >= since_unix:
+                waits.append(done["start_unix"] - record["submit_unix"])
+                element_time += done["end_unix"] - done["start_unix"]
+                last_end = max(last_end or 0.0, done["end_unix"])
+                finished_packs.add((record["round"], int(os.path.basename(path)[5:9])))
+    # Elements that crashed wrote no .done.json; their tasks do not count against element time
+    element_tasks = [r for r in counted if (r["round"], r["pack"]) in finished_packs]
+    element_task_time = sum(r["wall_s"] for r in element_tasks)
+    if wall_s is None:
+        wall_s = last_end - state["rounds"][0]["submit_unix"] if last_end and state["rounds"] else 0.0
+    n = len(counted)
+    return {
+        "n_tasks": len(tasks), "finished": len(finished), "failed": len(failed),
+        "pending": len(tasks) - len(finished) - len(failed), "rounds": len(state["rounds"]),
+        "resubmitted": sum(max(0, a - 1) for a in state["attempts"].values()), "wall_s": wall_s,
+        "throughput_per_hour": 3600 * n / wall_s if wall_s > 0 else 0.0,
+        "mean_task_s": task_time / n if n else 0.0,
+        "mean_queue_wait_s": sum(waits) / len(waits) if waits else 0.0,
+        # Element time not spent inside tasks: imports and result writes
+        "element_overhead_per_task_s": ((element_time - element_task_time) / len(element_tasks)
+                                        if element_tasks else 0.0),
+        "overhead_per_task_s": (wall_s * slots - task_time) / n if slots and n else None,
+    }
+
+def print_summary(summary):
+    print(f"\n{'✓' if summary['failed'] == 0 and summary['pending'] == 0 else '✗'} "
+          f"{summary['finished']}/{summary['n_tasks']} tasks finished, {summary['failed']} failed, "
+          f"{summary['pending']} pending ({summary['rounds']} rounds, {summary['resubmitted']} resubmissions)")
+    print(f"  Throughput: {summary['throughput_per_hour']:.0f} tasks/hour over {summary['wall_s']:.1f} s")
+    print(f"  Per task: {summary['mean_task_s']:.3f} s compute, "
+          f"{summary['element_overhead_per_task_s']:.3f} s inside elements"
+          + ("" if summary["overhead_per_task_s"] is None else
+             f", {summary['overhead_per_task_s']:.3f} s total overhead") + "; "
+          f"mean queue wait {summary['mean_queue_wait_s']:.2f} s per pack")
+
+# --- Manifest generation and benchmark ----------------------------------------
+
+def build_manifest(molecules, bond_lengths, bases, tasks):
+    return [{"molecule": m, "geometry": round(float(r), 6), "basis": b, "task": t}
+            for t in tasks for m in molecules for b in bases for r in bond_lengths]
+
+def benchmark(pack_sizes=(1, 4, 16), n_points=32, workers=None):
+    """Local-backend throughput and overhead per task for several pack sizes, plus a retry check."""
+    from generate_h2_benchmark import parse_bond_lengths
+
+    rows = []
+    manifest = build_manifest(["H2"], parse_bond_lengths(f"0.5:2.5:{n_points}"), ["sto-3g"], ["benchmark"])
+    tasks = {task_id(t): t for t in manifest}
+    for pack_size in pack_sizes:
+        with tempfile.TemporaryDirectory() as out_dir:
+            summary = run_manifest(tasks, out_dir, LocalBackend(workers), pack_size, poll_interval=0.05,
+                                   log=lambda *_: None)
+            rows.append({"workload": "H2 benchmark", "pack_size": pack_size, **summary})
+
+    # Failure handling: every third task fails once and must come back in round 2
+    flaky = [{"molecule": "none", "geometry": i, "basis": "none", "task": "noop", "fail_attempts": int(i % 3 == 0)}
+             for i in range(n_points)]
+    with tempfile.TemporaryDirectory() as out_dir:
+        tasks = {task_id(t): t for t in flaky}
+        summary = run_manifest(tasks, out_dir, LocalBackend(workers), 8, poll_interval=0.05, log=lambda *_: None)
+        rows.append({"workload": "noop, 1/3 fail once", "pack_size": 8, **summary})
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Pack manifest tasks into job arrays on SLURM or locally.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("manifest", help="Write a manifest for a molecule x bond length x basis x task grid")
+    p.add_argument("--molecules", default="H2", help="Comma-separated diatomics (default: H2)")
+    p.add_argument("--bond-lengths", default="0.3:3.0:28", help="'start:stop:num' or 'r1,r2,...' in Å")
+    p.add_argument("--bases", default="sto-3g", help="Comma-separated basis sets (default: sto-3g)")
+    p.add_argument("--tasks", default="fci", help=f"Comma-separated tasks from {TASKS} (default: fci)")
+    p.add_argument("--output", default="manifest.jsonl", help="Manifest path (default: manifest.jsonl)")
+
+    p = sub.add_parser("run", help="Submit, track, resubmit and resume a manifest")
+    p.add_argument("manifest", help="JSON-lines manifest")
+    p.add_argument("--out", required=True, help="Output/state directory (rerun with the same one to resume)")
+    p.add_argument("--backend", choices=("local", "slurm"), default="local")
+    p.add_argument("--pack-size", type=int, default=8, help="Tasks per array element (default: 8)")
+    p.add_argument("--max-attempts", type=int, default=DEFAULT_MAX_ATTEMPTS,
+                   help=f"Submissions per task before giving up (default: {DEFAULT_MAX_ATTEMPTS})")
+    p.add_argument("--poll-interval", type=float, default=None,
+                   help="Seconds between completion checks (default: 30 on SLURM, 0.2 locally)")
+    p.add_argument("--no-wait", action="store_true", help="Submit one round and exit; rerun to collect")
+    p.add_argument("--workers", type=int, default=None, help="Local backend processes (default: all cores)")
+    p.add_argument("--max-concurrent", type=int, default=None, help="SLURM array throttle (%%N)")
+    p.add_argument("--cpus", type=int, default=1, help="SLURM cpus per array element (default: 1)")
+    p.add_argument("--mem", default="4G", help="SLURM memory per array element (default: 4G)")
+    p.add_argument("--time", default="1:00:00", help="SLURM time limit per array element (default: 1:00:00)")
+    p.add_argument("--partition", default="CPU", help="SLURM partition (default: CPU)")
+    p.add_argument("--sbatch-args", default="", help="Extra sbatch arguments, e.g. '--account=abc'")
+
+    p = sub.add_parser("run-pack", help="Run one pack (the command every array element executes)")
+    p.add_argument("out", help="Output/state directory")
+    p.add_argument("--round", type=int, required=True)
+    p.add_argument("--pack", type=int, required=True)
+
+    p = sub.add_parser("status", help="Summarize an output directory")
+    p.add_argument("out", help="Output/state directory")
+    p.add_argument("--manifest", default=None, help="Manifest, to count tasks never submitted")
+
+    p = sub.add_parser("benchmark", help="Throughput and per-task overhead on the local backend")
+    p.add_argument("--workers", type=int, default=None, help="Local backend processes (default: all cores)")
+    args = parser.parse_args()
+
+    if args.command == "manifest":
+        from generate_h2_benchmark import parse_bond_lengths
+        manifest = build_manifest([m.strip() for m in args.molecules.split(",")],
+                                  parse_bond_lengths(args.bond_lengths),
+                                  [b.strip() for b in args.bases.split(",")],
+                                  [t.strip() for t in args.tasks.split(",")])
+        unknown = sorted({t["task"] for t in manifest} - set(TASKS))
+        if unknown:
+            print(f"✗ Unknown tasks {unknown}, expected some of {list(TASKS)}")
+            return 2
+        with open(args.output, "w") as f:
+            for task in manifest:
+                f.write(json.dumps(task) + "\n")
+        print(f"✓ Wrote {len(manifest)} tasks to {args.output}")
+        return 0
+
+    if args.command == "run-pack":
+        return 1 if run_pack(args.out, args.round, args.pack) else 0
+
+    if args.command == "status":
+        state = load_state(args.out)
+        tasks = load_manifest(args.manifest) if args.manifest else {tid: None for tid in state["attempts"]}
+        print_summary(summarize(tasks, args.out, state))
+        return 0
+
+    if args.command == "benchmark":
+        print(f"Job-array driver, local backend ({args.workers or os.cpu_count()} workers)")
+        print("=" * 102)
+        print(f"{'workload':>22} {'pack':>4} {'tasks':>5} {'done':>4} {'rounds':>6} {'resub':>5} {'wall s':>7} "
+              f"{'tasks/h':>8} {'task s':>7} {'overhead/task s':>15} {'queue s':>8}")
+        for row in benchmark(workers=args.workers):
+            print(f"{row['workload']:>22} {row['pack_size']:>4} {row['n_tasks']:>5} {row['finished']:>4} "
+                  f"{row['rounds']:>6} {row['resubmitted']:>5} {row['wall_s']:7.2f} "
+                  f"{row['throughput_per_hour']:8.0f} {row['mean_task_s']:7.3f} "
+                  f"{row['overhead_per_task_s']:15.3f} {row['mean_queue_wait_s']:8.2f}")
+        return 0
+
+    tasks = load_manifest(args.manifest)
+    if args.backend == "slurm":
+        backend = SlurmBackend(args.cpus, args.mem, args.time, args.partition, args.max_concurrent,
+                               args.sbatch_args)
+    else:
+        backend = LocalBackend(args.workers)
+    poll_interval = args.poll_interval or (DEFAULT_POLL_INTERVAL_S if args.backend == "slurm" else 0.2)
+    print(f"📋 {len(tasks)} tasks from {args.manifest} -> {args.out}")
+    try:
+        summary = run_manifest(tasks, args.out, backend, args.pack_size, args.max_attempts, poll_interval,
+                               wait=not args.no_wait)
+    except KeyboardInterrupt:
+        return 130
+    print_summary(summary)
+    return 0 if summary["failed"] == 0 and summary["pending"] == 0 else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
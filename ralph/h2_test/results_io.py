@@ -0,0 +1,383 @@
+#!/usr/bin/env python
+"""
+Compact binary (HDF5) results format for benchmarks, scans and RL logs.
+
+One .h5 file holds any number of result records plus appendable tables:
+
+    attrs            format, version, kind and a JSON header (e.g. PES scan summary)
+    /records/json    one compact JSON document per record (scalars and its array paths)
+    /records/columns numeric leaves as float64 columns, e.g. energies/fci_hartree
+    /arrays/<row>/   NumPy arrays found in a record (h1/eri integrals, MO coefficients)
+    /tables/<name>/  chunked, resizable columns for millions of rows (energy logs)
+
+All datasets are chunked and resizable, so records and table rows are appended
+in place. Readers never load arrays eagerly: a record's dicts that contain
+arrays are LazyDicts which read each array from the file on first access, and
+tables are returned as h5py datasets. JSON stays available as an export format
+(save_results(..., "x.json") or export_json()).
+
+Run this file directly to compare file size and load time with the pretty
+printed JSON currently written by the generators:
+    python results_io.py
+"""
+import json
+import os
+import sys
+import time
+import numpy as np
+from typing import Any, Dict, List, Optional, Tuple
+
+FORMAT_NAME = "rlqas-results"
+FORMAT_VERSION = 1
+HDF5_EXTENSIONS = (".h5", ".hdf5")
+TABLE_CHUNK_ROWS = 65536
+RECORD_CHUNK_ROWS = 64
+# Record documents list the paths of their arrays under this key, so readers need no group walk
+ARRAY_PATHS_KEY = "__arrays__"
+
+def is_hdf5(path: str) -> bool:
+    """True if path names an HDF5 results file (by extension)."""
+    return str(path).lower().endswith(HDF5_EXTENSIONS)
+
+def _h5py():
+    try:
+        import h5py
+    except ImportError:
+        raise ImportError("HDF5 results need h5py (pip install h5py); write a .json path to export JSON instead")
+    return h5py
+
+def _json_default(value):
+    """JSON export of NumPy values (arrays become nested lists)."""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def split_record(record: Dict[str, Any], prefix: str = "") -> Tuple[Dict[str, Any], Dict[str, np.ndarray], Dict[str, float]]:
+    """Split a nested record into (JSON-able scalars, arrays by path, numeric leaves by path)."""
+    scalars, arrays, numbers = {}, {}, {}
+    for key, value in record.items():
+        if "/" in str(key):
+            raise ValueError(f"Record keys may not contain '/': {key!r}")
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            sub_scalars, sub_arrays, sub_numbers = split_record(value, path + "/")
+            scalars[key] = sub_scalars
+            arrays.update(sub_arrays)
+            numbers.update(sub_numbers)
+        elif isinstance(value, np.ndarray) and value.ndim > 0:
+            arrays[path] = value
+        else:
+            if isinstance(value, (bool, int, float, np.bool_, np.number)):
+                numbers[path] = float(value)
+            scalars[key] = value
+    return scalars, arrays, numbers
+
+class LazyDict(dict):
+    """Dict whose array entries are read from an HDF5 group on first access."""
+
+    def __init__(self, data: Dict[str, Any], path: str, group: str, array_names: List[str]):
+        super().__init__(data)
+        self.path = path
+        self.group = group
+        self.array_names = list(array_names)
+
+    def __missing__(self, key):
+        if key not in self.array_names:
+            raise KeyError(key)
+        with _h5py().File(self.path, "r") as f:
+            value = f[f"{self.group}/{key}"][()]
+        self[key] = value
+        return value
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+class ResultsWriter:
+    """Append records and table rows to an HDF5 results file (created if missing)."""
+
+    def __init__(self, path: str, kind: str = "results", header: Optional[Dict[str, Any]] = None,
+                 compression: Optional[str] = "gzip"):
+        h5py = _h5py()
+        self.path = path
+        self.compression = compression
+        self.file = h5py.File(path, "a", libver="latest")
+        attrs = self.file.attrs
+        if "format" not in attrs:
+            attrs["format"] = FORMAT_NAME
+            attrs["version"] = FORMAT_VERSION
+            attrs["kind"] = kind
+            attrs["header"] = "{}"
+            self.file.create_dataset("records/json", shape=(0,), maxshape=(None,),
+                                     chunks=(RECORD_CHUNK_ROWS,), dtype=h5py.string_dtype())
+        elif attrs["format"] != FORMAT_NAME:
+            raise ValueError(f"{path} is not a {FORMAT_NAME} file")
+        if header is not None:
+            self.set_header(header)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.file["records/json"])
+
+    def set_header(self, header: Dict[str, Any]):
+        """Replace the file-level JSON header (scan summary, index, ...)."""
+        self.file.attrs["header"] = json.dumps(header, default=_json_default)
+
+    def _resizable(self, name: str, dtype, fill):
+        """Dataset at name, created with fill values for all existing rows if missing."""
+        if name not in self.file:
+            self.file.create_dataset(name, shape=(len(self),), maxshape=(None,), dtype=dtype,
+                                     chunks=(RECORD_CHUNK_ROWS,), fillvalue=fill)
+        return self.file[name]
+
+    def append(self, record: Dict[str, Any]) -> int:
+        """Append one record; its NumPy arrays go to /arrays/<row>/. Returns the row index."""
+        scalars, arrays, numbers = split_record(record)
+        row = len(self)
+        if arrays:
+            scalars[ARRAY_PATHS_KEY] = list(arrays)
+        docs = self.file["records/json"]
+        docs.resize((row + 1,))
+        docs[row] = json.dumps(scalars, separators=(",", ":"), default=_json_default)
+
+        for path in numbers:
+            self._resizable(f"records/columns/{path}", np.float64, np.nan)
+        columns = self.file["records/columns"] if "records/columns" in self.file else None
+        if columns is not None:
+            def extend(name, obj):
+                if hasattr(obj, "resize"):
+                    obj.resize((row + 1,))
+                    obj[row] = numbers.get(name, np.nan)
+            columns.visititems(extend)
+
+        for path, array in arrays.items():
+            self.file.create_dataset(f"arrays/{row}/{path}", data=array, compression=self.compression,
+                                     shuffle=self.compression is not None)
+        return row
+
+    def append_rows(self, table: str, **columns):
+        """Append equal-length column arrays to /tables/<table>/ (an energy log, say)."""
+        lengths = {len(np.atleast_1d(v)) for v in columns.values()}
+        if len(lengths) != 1:
+            raise ValueError("All columns of an appended block must have the same length")
+        n = lengths.pop()
+        group = self.file.require_group(f"tables/{table}")
+        for name, values in columns.items():
+            values = np.atleast_1d(np.asarray(values))
+            if name not in group:
+                group.create_dataset(name, shape=(0,), maxshape=(None,), dtype=values.dtype,
+                                     chunks=(TABLE_CHUNK_ROWS,), compression=self.compression,
+                                     shuffle=self.compression is not None)
+            dataset = group[name]
+            start = len(dataset)
+            dataset.resize((start + n,))
+            dataset[start:] = values
+
+    def close(self):
+        if self.file:
+            self.file.close()
+            self.file = None
+
+class ResultsFile:
+    """Read-only, lazy view of an HDF5 results file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.file = _h5py().File(path, "r")
+        if self.file.attrs.get("format") != FORMAT_NAME:
+            raise ValueError(f"{path} is not a {FORMAT_NAME} file")
+        self.kind = self.file.attrs["kind"]
+        self.header = json.loads(self.file.attrs["header"])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.file["records/json"])
+
+    def record(self, row: int, doc: Optional[str] = None) -> Dict[str, Any]:
+        """One record as a dict; dicts that hold arrays are LazyDicts (arrays read on access)."""
+        record = json.loads(self.file["records/json"][row] if doc is None else doc)
+        by_parent: Dict[str, List[str]] = {}
+        for path in record.pop(ARRAY_PATHS_KEY, []):
+            parent, _, name = path.rpartition("/")
+            by_parent.setdefault(parent, []).append(name)
+
+        # Deepest parents first, so a LazyDict is never replaced by its ancestor's conversion
+        for parent in sorted(by_parent, key=lambda p: -p.count("/")):
+            keys = parent.split("/") if parent else []
+            container = record
+            for key in keys[:-1]:
+                container = container.setdefault(key, {})
+            group = f"arrays/{row}/{parent}" if parent else f"arrays/{row}"
+            if keys:
+                container[keys[-1]] = LazyDict(container.get(keys[-1], {}), self.path, group, by_parent[parent])
+            else:
+                record = LazyDict(record, self.path, group, by_parent[parent])
+        return record
+
+    def records(self) -> List[Dict[str, Any]]:
+        """Every record (arrays stay on disk)."""
+        docs = self.file["records/json"].asstr()[()]
+        return [self.record(row, doc) for row, doc in enumerate(docs)]
+
+    def column(self, path: str) -> np.ndarray:
+        """Numeric record field across all records, e.g. column('energies/fci_hartree')."""
+        return self.file[f"records/columns/{path}"][()]
+
+    def table(self, name: str):
+        """Columns of an appended table as h5py datasets (sliced lazily)."""
+        return dict(self.file[f"tables/{name}"].items())
+
+    def close(self):
+        self.file.close()
+
+def save_results(path: str, record: Dict[str, Any], kind: str = "results"):
+    """Write one record as HDF5 (.h5/.hdf5, replacing the file) or as pretty JSON export."""
+    if not is_hdf5(path):
+        with open(path, "w") as f:
+            json.dump(record, f, indent=2, default=_json_default)
+        return
+    if os.path.exists(path):
+        os.remove(path)
+    with ResultsWriter(path, kind) as writer:
+        writer.append(record)
+
+def save_scan(path: str, scan: Dict[str, Any]):
+    """Write a PES scan ({"scan", "index", "entries"}) as HDF5 or pretty JSON."""
+    if not is_hdf5(path):
+        with open(path, "w") as f:
+            json.dump(scan, f, indent=2, default=_json_default)
+        return
+    if os.path.exists(path):
+        os.remove(path)
+    header = {key: value for key, value in scan.items() if key != "entries"}
+    with ResultsWriter(path, "pes", header) as writer:
+        for entry in scan["entries"]:
+            writer.append(entry)
+
+def load_results(path: str) -> Dict[str, Any]:
+    """Load a results or benchmark file in either format.
+
+    Single-record HDF5 files return that record; multi-record files return the
+    header with the records under "entries" (the PES scan layout).
+    """
+    if not is_hdf5(path):
+        with open(path, "r") as f:
+            return json.load(f)
+    with ResultsFile(path) as results:
+        if results.kind != "pes" and len(results) == 1:
+            return results.record(0)
+        return {**results.header, "entries": results.records()}
+
+def export_json(h5_path: str, json_path: str, include_arrays: bool = False):
+    """Export an HDF5 results file to pretty JSON (arrays as nested lists if include_arrays)."""
+    data = load_results(h5_path)
+
+    def materialize(value):
+        if isinstance(value, LazyDict):
+            value = {**value, **({name: value[name] for name in value.array_names} if include_arrays else {})}
+        if isinstance(value, dict):
+            return {k: materialize(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [materialize(v) for v in value]
+        return value
+
+    with open(json_path, "w") as f:
+        json.dump(materialize(data), f, indent=2, default=_json_default)
+
+def _file_size(path: str) -> int:
+    return os.path.getsize(path)
+
+def _timed(func, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+def compare_formats(n_points: int = 200, n_log_rows: int = 1_000_000, basis: str = "cc-pvdz", workdir: str = "."):
+    """Size and load time of a PES scan with integrals and an energy log: JSON vs HDF5."""
+    from generate_h2_benchmark import _benchmark_point
+
+    entry, mf = _benchmark_point(0.74, basis)
+    integrals = {"h1_ao": mf.get_hcore(), "eri_ao": mf._eri, "mo_coeff": mf.mo_coeff}
+    bond_lengths = np.linspace(0.3, 3.0, n_points)
+    entries = []
+    for r in bond_lengths:
+        point = json.loads(json.dumps(entry, default=_json_default))
+        point["molecule"]["bond_length_angstrom"] = float(r)
+        point["integrals"] = {k: v * (1 + 1e-3 * r) for k, v in integrals.items()}
+        entries.append(point)
+    scan = {"scan": {"formula": "H2", "n_points": n_points}, "entries": entries}
+    rng = np.random.default_rng(0)
+    log = {"episode": np.repeat(np.arange(n_log_rows // 20), 20), "step": np.tile(np.arange(20), n_log_rows // 20),
+           "energy": -1.1 + 0.05 * rng.random(n_log_rows)}
+
+    paths = {name: os.path.join(workdir, f"format_compare_{name}") for name in
+             ("scan_no_arrays.json", "scan.json", "scan.h5", "log.json", "log.h5")}
+    no_arrays = {**scan, "entries": [{k: v for k, v in e.items() if k != "integrals"} for e in entries]}
+    save_scan(paths["scan_no_arrays.json"], no_arrays)
+    save_scan(paths["scan.json"], scan)
+    save_scan(paths["scan.h5"], scan)
+    with open(paths["log.json"], "w") as f:
+        json.dump([{"episode": int(e), "step": int(s), "energy": float(v)}
+                   for e, s, v in zip(log["episode"], log["step"], log["energy"])], f, indent=2)
+    with ResultsWriter(paths["log.h5"], "log") as writer:
+        for start in range(0, n_log_rows, 100_000):
+            writer.append_rows("energies", **{k: v[start:start + 100_000] for k, v in log.items()})
+
+    def json_load(path):
+        return lambda: json.load(open(path))
+
+    def h5_references():
+        with ResultsFile(paths["scan.h5"]) as f:
+            return f.column("molecule/bond_length_angstrom"), f.column("energies/fci_hartree")
+
+    def h5_one_point():
+        with ResultsFile(paths["scan.h5"]) as f:
+            return f.record(n_points // 2)["integrals"]["eri_ao"]
+
+    def h5_log():
+        with ResultsFile(paths["log.h5"]) as f:
+            return f.table("energies")["energy"][()]
+
+    rows = [
+        ("scan, JSON (today, no arrays)", paths["scan_no_arrays.json"], json_load(paths["scan_no_arrays.json"])),
+        ("scan, JSON with integrals", paths["scan.json"], json_load(paths["scan.json"])),
+        ("scan, HDF5: all records", paths["scan.h5"], lambda: load_results(paths["scan.h5"])),
+        ("scan, HDF5: reference columns", paths["scan.h5"], h5_references),
+        ("scan, HDF5: one point's ERIs", paths["scan.h5"], h5_one_point),
+        ("energy log, JSON", paths["log.json"], json_load(paths["log.json"])),
+        ("energy log, HDF5 column", paths["log.h5"], h5_log),
+    ]
+    report = [{"case": case, "size_bytes": _file_size(path), "load_time_s": _timed(load)[1]}
+              for case, path, load in rows]
+    for path in paths.values():
+        os.remove(path)
+    return report
+
+def main():
+    print("Results format comparison: pretty JSON vs chunked HDF5")
+    print("(H2/cc-pVDZ PES, 200 points with h1/eri/MO arrays; 1M-row energy log)")
+    print("=" * 66)
+    print(f"{'case':<34} {'size MB':>10} {'load s':>10}")
+    for row in compare_formats():
+        print(f"{row['case']:<34} {row['size_bytes'] / 1e6:10.2f} {row['load_time_s']:10.4f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
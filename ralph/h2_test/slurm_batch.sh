@@ -67,6 +67,11 @@ fi
 cd "$RALPH_TEST_DIR" || { echo "Failed to enter test directory"; exit 1; }
 echo "✓ Entered Ralph test directory: $(pwd)"
 
+# Opt-in stage telemetry for generate_h2_hamiltonian.py / validate_h2.py (see ../telemetry.py):
+# JSON lines per stage next to the job log, and a cProfile dump per stage
+# export RLQAS_TELEMETRY="$SLURM_SUBMIT_DIR/ralph_h2_test_${SLURM_JOB_ID}.telemetry.jsonl"
+# export RLQAS_PROFILE_DIR="$SLURM_SUBMIT_DIR/profiles_${SLURM_JOB_ID}"
+
 # Run Ralph
 echo "Starting Ralph at: $(date)"
 echo "========================================"
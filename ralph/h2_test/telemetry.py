@@ -0,0 +1,229 @@
+#!/usr/bin/env python
+"""
+Opt-in stage telemetry for the pipeline scripts, written as JSON lines.
+
+Nothing is recorded unless RLQAS_TELEMETRY is set, either to a file path
+(appended to, so array tasks can share one file) or to "stderr". Each run
+writes a "run_start" line (script, argv, host, pid, SLURM job/array ids,
+library versions), one "stage" line per named stage and a "run_end" line.
+A stage line holds wall and CPU time, current RSS, the peak RSS reached during
+the stage, any counters the caller records (SCF cycles, FCI iterations, cache
+hits, ...), and shape/dtype/bytes of the arrays it registers.
+
+The peak is per stage on Linux: the kernel's high-water mark (VmHWM) is reset
+through /proc/self/clear_refs when a stage starts. Elsewhere it falls back to
+the process-lifetime ru_maxrss, and "peak_rss_scope" says which was used.
+
+With RLQAS_PROFILE_DIR also set, every top-level stage runs under cProfile and
+is dumped to <dir>/<script>-<pid>-<nn>-<stage>.prof (pstats format, readable
+by snakeviz or gprof2dot). Stage lines carry Unix start/end timestamps and the
+pid, so a py-spy recording of the same process can be cut into stages too.
+
+Usage:
+    telemetry = Telemetry.from_env("generate_h2_hamiltonian")
+    with telemetry.stage("integrals") as stage:
+        data = cache.load_or_compute(mol)
+        stage.record(cache_hit=data["cache_hit"])
+        stage.arrays(h1_mo=data["h1_mo"])
+"""
+import atexit
+import cProfile
+import json
+import os
+import platform
+import resource
+import socket
+import sys
+import time
+
+TELEMETRY_ENV = "RLQAS_TELEMETRY"
+PROFILE_DIR_ENV = "RLQAS_PROFILE_DIR"
+SLURM_VARIABLES = ("SLURM_JOB_ID", "SLURM_ARRAY_JOB_ID", "SLURM_ARRAY_TASK_ID", "SLURM_CPUS_PER_TASK")
+
+def _status_kb(field):
+    """A memory field of /proc/self/status in KB, or None where /proc is unavailable."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+def _reset_peak_rss():
+    """Reset the kernel's RSS high-water mark; False if this platform cannot."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+def _jsonable(value):
+    if hasattr(value, "item") and getattr(value, "ndim", 1) == 0:
+        return value.item()
+    if hasattr(value, "tolist") and getattr(value, "size", 0) <= 16:
+        return value.tolist()
+    return str(value)
+
+def array_info(array):
+    """Shape, dtype and size of an array-like (including PackedERI and memory maps)."""
+    info = {"shape": list(getattr(array, "shape", ())), "dtype": str(getattr(array, "dtype", type(array).__name__))}
+    nbytes = getattr(array, "nbytes", None)
+    if nbytes is not None:
+        info["nbytes"] = int(nbytes)
+    return info
+
+class _NullStage:
+    """Stage handle of disabled telemetry: every call is a no-op."""
+
+    def record(self, **fields):
+        pass
+
+    def arrays(self, **arrays):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+class Stage:
+    """One named stage: times, memory, counters and array sizes, emitted as a JSON line on exit."""
+
+    def __init__(self, telemetry, name):
+        self.telemetry = telemetry
+        self.name = name
+        self.fields = {}
+        self.array_sizes = {}
+        self.child_peak_kb = 0
+        self.profiler = None
+
+    def record(self, **fields):
+        """Attach counters or other scalar facts to the stage record."""
+        self.fields.update(fields)
+
+    def arrays(self, **arrays):
+        """Record shape, dtype and bytes of named arrays."""
+        for name, array in arrays.items():
+            self.array_sizes[name] = array_info(array)
+
+    def __enter__(self):
+        t = self.telemetry
+        self.parent = t._stack[-1] if t._stack else None
+        t._stack.append(self)
+        t._n_stages += 1
+        self.index = t._n_stages
+        self.per_stage_peak = _reset_peak_rss()
+        if t.profile_dir and self.parent is None:
+            self.profiler = cProfile.Profile()
+        self.start_unix = time.time()
+        self.start_cpu = time.process_time()
+        self.start = time.perf_counter()
+        if self.profiler is not None:
+            self.profiler.enable()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        wall = time.perf_counter() - self.start
+        if self.profiler is not None:
+            self.profiler.disable()
+        t = self.telemetry
+        t._stack.pop()
+
+        rss_kb = _status_kb("VmRSS")
+        if self.per_stage_peak:
+            peak_kb = max(_status_kb("VmHWM") or 0, self.child_peak_kb)
+        else:
+            peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if self.parent is not None:
+            # The reset above cleared the parent's high-water mark too; hand ours up
+            self.parent.child_peak_kb = max(self.parent.child_peak_kb, peak_kb)
+
+        event = {
+            "event": "stage", "stage": self.name, "parent": self.parent.name if self.parent else None,
+            "index": self.index, "status": "ok" if exc_type is None else "error",
+            "start_unix": self.start_unix, "end_unix": time.time(), "wall_s": wall,
+            "cpu_s": time.process_time() - self.start_cpu,
+            "rss_mb": None if rss_kb is None else rss_kb / 1024, "peak_rss_mb": peak_kb / 1024,
+            "peak_rss_scope": "stage" if self.per_stage_peak else "process",
+            **self.fields,
+        }
+        if self.array_sizes:
+            event["arrays"] = self.array_sizes
+        if exc_type is not None:
+            event["error"] = f"{exc_type.__name__}: {exc}"
+        if self.profiler is not None:
+            path = os.path.join(t.profile_dir, f"{t.script}-{os.getpid()}-{self.index:02d}-{self.name}.prof")
+            self.profiler.dump_stats(path)
+            event["profile"] = path
+        t.emit(event)
+        return False
+
+class Telemetry:
+    """JSON-lines telemetry sink for one script run; disabled when sink is None."""
+
+    def __init__(self, script, sink=None, profile_dir=None):
+        self.script = script
+        self.sink = sink
+        self.profile_dir = profile_dir if sink is not None else None
+        self._stack = []
+        self._n_stages = 0
+        self._closed = False
+        if sink is None:
+            return
+        if self.profile_dir:
+            os.makedirs(self.profile_dir, exist_ok=True)
+        self._start = time.perf_counter()
+        self.emit({"event": "run_start", "argv": sys.argv, "host": socket.gethostname(),
+                   "python": platform.python_version(), "versions": self._versions(),
+                   "slurm": {k: os.environ[k] for k in SLURM_VARIABLES if k in os.environ}})
+        atexit.register(self.close)
+
+    @classmethod
+    def from_env(cls, script):
+        """Telemetry configured by RLQAS_TELEMETRY (path or 'stderr') and RLQAS_PROFILE_DIR."""
+        return cls(script, os.environ.get(TELEMETRY_ENV) or None, os.environ.get(PROFILE_DIR_ENV) or None)
+
+    @property
+    def enabled(self):
+        return self.sink is not None
+
+    @staticmethod
+    def _versions():
+        versions = {}
+        for name in ("numpy", "scipy", "pyscf", "h5py"):
+            module = sys.modules.get(name)
+            if module is not None:
+                versions[name] = getattr(module, "__version__", None)
+        return versions
+
+    def stage(self, name):
+        """Context manager timing one named stage (a no-op when telemetry is disabled)."""
+        if self.sink is None:
+            return _NullStage()
+        return Stage(self, name)
+
+    def emit(self, event):
+        """Write one event line, stamped with script, pid and time."""
+        if self.sink is None:
+            return
+        line = json.dumps({"script": self.script, "pid": os.getpid(), "time_unix": time.time(), **event},
+                          default=_jsonable)
+        if self.sink == "stderr":
+            print(line, file=sys.stderr, flush=True)
+        else:
+            # One append per line keeps concurrent writers (array tasks) from interleaving
+            with open(self.sink, "a") as f:
+                f.write(line + "\n")
+
+    def close(self, status=None):
+        """Write the run_end line (also called at interpreter exit)."""
+        if self.sink is None or self._closed:
+            return
+        self._closed = True
+        self.emit({"event": "run_end", "status": status, "wall_s": time.perf_counter() - self._start,
+                   "cpu_s": time.process_time(),
+                   "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024})
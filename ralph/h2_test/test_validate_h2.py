@@ -0,0 +1,67 @@
+"""Batch validation must survive malformed results files and skip non-results JSON."""
+
+import csv
+import json
+import os
+import shutil
+
+import pytest
+
+from validate_h2 import BenchmarkStore, batch_main, expand_result_paths, load_benchmark, validate_batch
+
+HARNESS_DIR = os.path.dirname(os.path.abspath(__file__))
+BENCHMARK = os.path.join(HARNESS_DIR, "h2_benchmark.json")
+GOOD_RESULTS = os.path.join(HARNESS_DIR, "Ralph_Test_H2_Hamiltonian", "h2_results.json")
+
+@pytest.fixture
+def batch_dir(tmp_path):
+    """A run directory mixing a good results file, two malformed ones and non-results JSON."""
+    (tmp_path / "run_good").mkdir()
+    shutil.copy(GOOD_RESULTS, tmp_path / "run_good" / "h2_results.json")
+    (tmp_path / "run_list").mkdir()
+    (tmp_path / "run_list" / "h2_results.json").write_text(json.dumps([1, 2]))
+    (tmp_path / "run_text").mkdir()
+    (tmp_path / "run_text" / "h2_results.json").write_text(json.dumps({"energies": {"hf_hartree": "x"}}))
+    (tmp_path / "prd.json").write_text(json.dumps({"tasks": []}))
+    shutil.copy(BENCHMARK, tmp_path / "h2_benchmark.json")
+    return tmp_path
+
+def test_directory_expansion_only_collects_results_files(batch_dir):
+    paths = expand_result_paths([str(batch_dir)])
+    assert [os.path.relpath(p, batch_dir) for p in paths] == [
+        os.path.join(run, "h2_results.json") for run in ("run_good", "run_list", "run_text")]
+
+def test_excluded_paths_are_skipped(batch_dir):
+    benchmark = str(batch_dir / "h2_benchmark.json")
+    assert expand_result_paths([str(batch_dir / "*.json")], exclude=[benchmark]) == [str(batch_dir / "prd.json")]
+
+@pytest.mark.parametrize("n_workers", [1, 2])
+def test_malformed_files_become_failed_rows(batch_dir, n_workers):
+    store = BenchmarkStore.from_benchmark(load_benchmark(BENCHMARK))
+    rows = validate_batch(expand_result_paths([str(batch_dir)]), store, n_workers)
+    by_run = {os.path.basename(os.path.dirname(row["path"])): row for row in rows}
+    assert by_run["run_good"]["overall"] is True
+    for run in ("run_list", "run_text"):
+        assert by_run[run]["overall"] is False
+        assert by_run[run]["messages"].startswith("Malformed results")
+
+def test_batch_writes_summary_despite_bad_files(batch_dir):
+    summary = batch_dir / "summary.csv"
+    status = batch_main([str(batch_dir), "--benchmark", BENCHMARK, "--output", str(summary), "--workers", "1"])
+    assert status == 1
+    with open(summary) as f:
+        rows = list(csv.DictReader(f))
+    assert [row["overall"] for row in rows] == ["True", "False", "False"]
+
+def test_duplicate_bond_lengths_keep_last_entry():
+    benchmark = load_benchmark(BENCHMARK)
+    entries = []
+    for i, r in enumerate([0.5, 0.6, 0.7, 0.7, 0.8, 0.9]):
+        entry = json.loads(json.dumps(benchmark))
+        entry["molecule"]["bond_length_angstrom"] = r
+        entry["energies"]["hf_hartree"] = entry["energies"]["fci_hartree"] = -1.0 - i
+        entries.append(entry)
+    store = BenchmarkStore(entries)
+    assert len(store) == 5
+    assert store.nearest("sto-3g", 0.7)["energies"]["fci_hartree"] == -4.0
+    assert store.reference_for("sto-3g", 0.65) is not None
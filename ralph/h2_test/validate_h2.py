@@ -2,21 +2,44 @@
 """
 Validate Ralph's H2 Hamiltonian implementation against benchmark values.
 This script compares Ralph's results with reference values and provides feedback.
+
+Batch mode validates many result files in one process: the benchmark is loaded
+once, the files are spread over a process pool, and one columnar summary
+(CSV or JSONL) is written with per-check pass/fail and energy deltas:
+    python validate_h2.py --batch 'runs/*/h2_results.json' --output summary.csv
+
+The benchmark may also be a multi-geometry PES file from
+`generate_h2_benchmark.py --scan`. Each result is then checked against the stored
+point at its (basis, bond length), found by binary search, or against a
+cubic-spline interpolation of the stored PES when it falls between grid points:
+    python validate_h2.py h2_results.json h2_pes_benchmark.json
+
+Results and benchmarks may be JSON or the HDF5 format of results_io.py
+(.h5/.hdf5); HDF5 files are read lazily, without loading stored integrals.
+
+Set RLQAS_TELEMETRY=<file>|stderr for per-stage JSON-lines timings and memory
+peaks (see telemetry.py).
 """
+import argparse
+import bisect
+import csv
+import glob
 import json
 import sys
 import os
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
-from typing import Dict, Any, Tuple
+from typing import Dict, Any, List, Tuple
+from results_io import load_results
+from telemetry import Telemetry
 
 def load_benchmark(benchmark_path: str = "h2_benchmark.json") -> Dict[str, Any]:
-    """Load benchmark values from JSON file."""
+    """Load benchmark values from a JSON or HDF5 file."""
     # First try the provided path
     if os.path.exists(benchmark_path):
         try:
-            with open(benchmark_path, 'r') as f:
-                return json.load(f)
-        except json.JSONDecodeError as e:
+            return load_results(benchmark_path)
+        except (OSError, ValueError) as e:
             print(f"✗ Error parsing benchmark file: {e}")
             sys.exit(1)
 
@@ -26,9 +49,8 @@ def load_benchmark(benchmark_path: str = "h2_benchmark.json") -> Dict[str, Any]:
 
     if os.path.exists(script_benchmark_path):
         try:
-            with open(script_benchmark_path, 'r') as f:
-                return json.load(f)
-        except json.JSONDecodeError as e:
+            return load_results(script_benchmark_path)
+        except (OSError, ValueError) as e:
             print(f"✗ Error parsing benchmark file: {e}")
             sys.exit(1)
 
@@ -39,17 +61,102 @@ def load_benchmark(benchmark_path: str = "h2_benchmark.json") -> Dict[str, Any]:
     sys.exit(1)
 
 def load_ralph_results(results_path: str) -> Dict[str, Any]:
-    """Load Ralph's results from JSON file."""
+    """Load Ralph's results from a JSON or HDF5 file (HDF5 arrays are read on access)."""
     try:
-        with open(results_path, 'r') as f:
-            return json.load(f)
+        return load_results(results_path)
     except FileNotFoundError:
         print(f"✗ Results file not found: {results_path}")
         sys.exit(1)
-    except json.JSONDecodeError as e:
+    except (OSError, ValueError) as e:
         print(f"✗ Error parsing results file: {e}")
         sys.exit(1)
 
+class BenchmarkStore:
+    """Benchmark entries indexed by (basis, bond length) for O(log n) reference lookup.
+
+    Accepts a single-geometry benchmark (h2_benchmark.json) or a PES scan
+    (h2_pes_benchmark.json). Off-grid bond lengths inside the scanned range get
+    HF/FCI references from a cubic spline over that basis' PES points.
+    """
+
+    # Bond lengths closer than this to a stored point use it directly
+    MATCH_TOLERANCE_ANGSTROM = 1e-4
+
+    def __init__(self, entries: List[Dict[str, Any]]):
+        # Later entries for the same (basis, bond length) replace earlier ones
+        by_basis: Dict[str, Dict[float, Dict[str, Any]]] = {}
+        for entry in entries:
+            molecule = entry["molecule"]
+            by_basis.setdefault(molecule["basis_set"].lower(), {})[molecule["bond_length_angstrom"]] = entry
+        self._bases = {}
+        for basis, by_length in by_basis.items():
+            group = [by_length[r] for r in sorted(by_length)]
+            self._bases[basis] = ([e["molecule"]["bond_length_angstrom"] for e in group], group)
+        self._default_basis = entries[0]["molecule"]["basis_set"].lower()
+        self._splines: Dict[str, Any] = {}
+
+    @classmethod
+    def from_benchmark(cls, benchmark: Dict[str, Any]) -> "BenchmarkStore":
+        """Build from either benchmark file format."""
+        return cls(benchmark["entries"] if "entries" in benchmark else [benchmark])
+
+    def __len__(self) -> int:
+        return sum(len(group) for _, group in self._bases.values())
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Fitted splines are cheap to rebuild and not always picklable; workers refit lazily
+        state = self.__dict__.copy()
+        state["_splines"] = {}
+        return state
+
+    def nearest(self, basis: str, bond_length: float) -> Dict[str, Any]:
+        """Stored entry closest in bond length (falls back to the default basis if unknown)."""
+        lengths, group = self._bases.get(str(basis).lower(), self._bases[self._default_basis])
+        i = bisect.bisect_left(lengths, bond_length)
+        if i == len(lengths) or (i > 0 and bond_length - lengths[i - 1] <= lengths[i] - bond_length):
+            i -= 1
+        return group[i]
+
+    def _spline(self, basis: str):
+        """Lazily fit HF/FCI curves for one basis (cubic spline, linear if SciPy is missing)."""
+        if basis not in self._splines:
+            lengths, group = self._bases[basis]
+            x = np.array(lengths)
+            y = np.array([[e["energies"]["hf_hartree"], e["energies"]["fci_hartree"]] for e in group])
+            try:
+                from scipy.interpolate import CubicSpline
+                self._splines[basis] = CubicSpline(x, y, axis=0) if len(x) >= 4 else None
+            except ImportError:
+                self._splines[basis] = None
+            if self._splines[basis] is None:
+                self._splines[basis] = lambda r: np.array([np.interp(r, x, y[:, 0]), np.interp(r, x, y[:, 1])])
+        return self._splines[basis]
+
+    def reference_for(self, basis: str, bond_length: float) -> Dict[str, Any]:
+        """Benchmark dict for (basis, bond length): stored, interpolated, or nearest."""
+        if bond_length is None or str(basis).lower() not in self._bases:
+            return self.nearest(self._default_basis if bond_length is None else basis, bond_length or 0.0)
+
+        key = str(basis).lower()
+        entry = self.nearest(key, bond_length)
+        lengths, _ = self._bases[key]
+        stored = entry["molecule"]["bond_length_angstrom"]
+        if abs(stored - bond_length) <= self.MATCH_TOLERANCE_ANGSTROM or not lengths[0] < bond_length < lengths[-1]:
+            return entry
+
+        hf, fci = (float(v) for v in self._spline(key)(bond_length))
+        reference = json.loads(json.dumps(entry))
+        reference["molecule"]["bond_length_angstrom"] = bond_length
+        reference["molecule"]["atoms"][1]["position"] = [0.0, 0.0, bond_length]
+        reference["energies"] = {"hf_hartree": hf, "fci_hartree": fci, "correlation_energy": fci - hf}
+        reference["computation_details"]["interpolated_from_pes"] = True
+        return reference
+
+    def reference_for_results(self, ralph_results: Dict[str, Any]) -> Dict[str, Any]:
+        """Reference matching the molecule described in a results dict."""
+        molecule = ralph_results.get("molecule", {})
+        return self.reference_for(molecule.get("basis_set"), molecule.get("bond_length_angstrom"))
+
 def validate_molecule(ralph_results: Dict[str, Any], benchmark: Dict[str, Any]) -> Tuple[bool, str]:
     """Validate molecule definition."""
     errors = []
@@ -175,6 +282,9 @@ def print_validation_report(validation: Dict[str, Any], ralph_results: Dict[str,
     print(f"    FCI: Ralph={ralph_results.get('energies', {}).get('fci_hartree', 'N/A'):.6f}, "
           f"Benchmark={benchmark['energies']['fci_hartree']:.6f}")
 
+    if benchmark.get("computation_details", {}).get("interpolated_from_pes"):
+        print("    (Benchmark energies interpolated from the stored PES)")
+
     print("\n📐 Molecular setup:")
     ralph_mol = ralph_results.get('molecule', {})
     print(f"    Bond length: Ralph={ralph_mol.get('bond_length_angstrom', 'N/A')} Å, "
@@ -217,26 +327,184 @@ def save_validation_summary(validation: Dict[str, Any], summary_path: str = "val
 
     print(f"\n📄 Validation summary saved to: {summary_path}")
 
+SUMMARY_COLUMNS = [
+    "path", "overall", "molecule", "energies", "hamiltonian",
+    "bond_length_angstrom", "basis_set", "n_qubits",
+    "hf_hartree", "fci_hartree", "hf_delta_hartree", "fci_delta_hartree", "messages"
+]
+
+def _energy_delta(value, reference):
+    return value - reference if isinstance(value, (int, float)) else None
+
+def validation_row(path: str, store: BenchmarkStore) -> Dict[str, Any]:
+    """Validate one results file and flatten the outcome into a summary row."""
+    row = dict.fromkeys(SUMMARY_COLUMNS)
+    row["path"] = path
+    try:
+        ralph_results = load_results(path)
+    except (OSError, ValueError) as e:
+        row.update(overall=False, messages=f"Could not read results: {e}")
+        return row
+    if not isinstance(ralph_results, dict):
+        row.update(overall=False,
+                   messages=f"Malformed results: expected an object, got {type(ralph_results).__name__}")
+        return row
+
+    # A malformed file (wrong section types, non-numeric energies) fails its own row, not the batch
+    try:
+        benchmark = store.reference_for_results(ralph_results)
+        validation = validate_implementation(ralph_results, benchmark)
+        molecule = ralph_results.get("molecule", {})
+        energies = ralph_results.get("energies", {})
+        n_qubits = ralph_results.get("hamiltonian", {}).get("n_qubits")
+    except (AttributeError, TypeError, KeyError) as e:
+        row.update(overall=False, messages=f"Malformed results: {type(e).__name__}: {e}")
+        return row
+    row.update(
+        overall=validation["overall"][0],
+        molecule=validation["molecule"][0],
+        energies=validation["energies"][0],
+        hamiltonian=validation["hamiltonian"][0],
+        bond_length_angstrom=molecule.get("bond_length_angstrom"),
+        basis_set=molecule.get("basis_set"),
+        n_qubits=n_qubits,
+        hf_hartree=energies.get("hf_hartree"),
+        fci_hartree=energies.get("fci_hartree"),
+        hf_delta_hartree=_energy_delta(energies.get("hf_hartree"), benchmark["energies"]["hf_hartree"]),
+        fci_delta_hartree=_energy_delta(energies.get("fci_hartree"), benchmark["energies"]["fci_hartree"]),
+        messages="; ".join(f"{name}: {msg}" for name, (passed, msg) in validation.items()
+                           if name != "overall" and not passed)
+    )
+    return row
+
+_worker_store = None
+
+def _init_batch_worker(store: BenchmarkStore):
+    """Receive the benchmark once per worker process instead of once per file."""
+    global _worker_store
+    _worker_store = store
+
+def _validate_chunk(paths: List[str]) -> List[Dict[str, Any]]:
+    return [validation_row(path, _worker_store) for path in paths]
+
+def expand_result_paths(patterns: List[str], name_pattern: str = "*results*",
+                        exclude: List[str] = ()) -> List[str]:
+    """Expand directories and glob patterns into a sorted file list.
+
+    Directories contribute only the .json/.h5 files below them whose name matches
+    name_pattern, so benchmarks, prd.json and earlier summaries are not picked up.
+    Paths in exclude (e.g. the benchmark itself) are always skipped.
+    """
+    paths = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            for extension in (".json", ".h5"):
+                paths.update(glob.glob(os.path.join(pattern, "**", name_pattern + extension), recursive=True))
+        else:
+            paths.update(glob.glob(pattern, recursive=True))
+    excluded = {os.path.abspath(path) for path in exclude}
+    return sorted(path for path in paths if os.path.abspath(path) not in excluded)
+
+def validate_batch(paths: List[str], store: BenchmarkStore, n_workers: int = None) -> List[Dict[str, Any]]:
+    """Validate many results files against one benchmark store, in a process pool."""
+    n_workers = n_workers or os.cpu_count() or 1
+    if n_workers == 1 or len(paths) < 2:
+        return [validation_row(path, store) for path in paths]
+
+    # A few chunks per worker balance load without paying IPC per file
+    n_chunks = min(len(paths), 4 * n_workers)
+    chunks = [paths[i::n_chunks] for i in range(n_chunks)]
+    with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_batch_worker,
+                             initargs=(store,)) as pool:
+        rows = [row for chunk_rows in pool.map(_validate_chunk, chunks) for row in chunk_rows]
+    return sorted(rows, key=lambda row: row["path"])
+
+def save_batch_summary(rows: List[Dict[str, Any]], summary_path: str):
+    """Write batch rows as CSV or JSON lines, chosen by the file extension."""
+    with open(summary_path, 'w', newline='') as f:
+        if summary_path.endswith(".jsonl"):
+            for row in rows:
+                f.write(json.dumps(row) + "\n")
+        else:
+            writer = csv.DictWriter(f, fieldnames=SUMMARY_COLUMNS)
+            writer.writeheader()
+            writer.writerows(rows)
+
+def batch_main(argv: List[str], telemetry: Telemetry = None) -> int:
+    """Batch validation entry point (python validate_h2.py --batch ...)."""
+    parser = argparse.ArgumentParser(prog="validate_h2.py --batch",
+                                     description="Validate many results files in one process.")
+    parser.add_argument("patterns", nargs="+", help="Result files, glob patterns or directories")
+    parser.add_argument("--benchmark", default="h2_benchmark.json",
+                        help="Benchmark file, single-geometry or PES scan (default: h2_benchmark.json)")
+    parser.add_argument("--output", default="validation_summary.csv",
+                        help="Summary file; .jsonl for JSON lines, anything else for CSV")
+    parser.add_argument("--pattern", default="*results*",
+                        help="File-name glob for results files inside directories (default: *results*)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    args = parser.parse_args(argv)
+
+    telemetry = telemetry or Telemetry(None)
+    # load_benchmark also looks next to this script, so skip both candidate locations
+    benchmark_paths = [args.benchmark, os.path.join(os.path.dirname(os.path.abspath(__file__)), args.benchmark)]
+    paths = expand_result_paths(args.patterns, args.pattern, exclude=benchmark_paths + [args.output])
+    if not paths:
+        print(f"✗ No results files matched: {' '.join(args.patterns)}")
+        return 1
+
+    with telemetry.stage("load_benchmark") as stage:
+        store = BenchmarkStore.from_benchmark(load_benchmark(args.benchmark))
+        stage.record(benchmark=args.benchmark, n_reference_points=len(store))
+    print(f"🔍 Validating {len(paths)} results files against {args.benchmark} ({len(store)} reference points)...")
+    with telemetry.stage("validate_batch") as stage:
+        rows = validate_batch(paths, store, args.workers)
+        stage.record(n_files=len(paths), n_workers=args.workers or os.cpu_count())
+    with telemetry.stage("save_summary") as stage:
+        save_batch_summary(rows, args.output)
+        stage.record(output=args.output)
+
+    n_passed = sum(1 for row in rows if row["overall"])
+    print(f"✓ {n_passed}/{len(rows)} passed")
+    for check in ("molecule", "energies", "hamiltonian"):
+        n_failed = sum(1 for row in rows if row[check] is False)
+        print(f"  {check.capitalize():12} {n_failed} failed")
+    print(f"\n📄 Batch summary saved to: {args.output}")
+    return 0 if n_passed == len(rows) else 1
+
 def main():
     """Main validation function."""
-    if len(sys.argv) != 2:
-        print("Usage: python validate_h2.py <ralph_results.json>")
+    # Opt-in stage timings/memory as JSON lines (RLQAS_TELEMETRY, RLQAS_PROFILE_DIR)
+    telemetry = Telemetry.from_env("validate_h2")
+    if len(sys.argv) >= 2 and sys.argv[1] == "--batch":
+        status = batch_main(sys.argv[2:], telemetry)
+        telemetry.close(status)
+        sys.exit(status)
+
+    if len(sys.argv) not in (2, 3):
+        print("Usage: python validate_h2.py <ralph_results.json> [benchmark.json]")
+        print("       python validate_h2.py --batch <glob|dir> [...] [--output summary.csv|.jsonl]")
         print("Example: python validate_h2.py ../Ralph_Test_H2_Hamiltonian/h2_results.json")
         sys.exit(1)
 
     results_path = sys.argv[1]
+    benchmark_path = sys.argv[2] if len(sys.argv) == 3 else "h2_benchmark.json"
 
     print("🔍 Validating Ralph's H2 Hamiltonian implementation...")
 
     # Load data
-    benchmark = load_benchmark()
-    ralph_results = load_ralph_results(results_path)
+    with telemetry.stage("load") as stage:
+        store = BenchmarkStore.from_benchmark(load_benchmark(benchmark_path))
+        ralph_results = load_ralph_results(results_path)
+        benchmark = store.reference_for_results(ralph_results)
+        stage.record(benchmark=benchmark_path, results=results_path, n_reference_points=len(store))
 
-    print(f"✓ Loaded benchmark from: h2_benchmark.json")
+    print(f"✓ Loaded benchmark from: {benchmark_path}")
     print(f"✓ Loaded Ralph's results from: {results_path}")
 
     # Run validation
-    validation = validate_implementation(ralph_results, benchmark)
+    with telemetry.stage("validate") as stage:
+        validation = validate_implementation(ralph_results, benchmark)
+        stage.record(**{check: bool(validation[check][0]) for check in validation})
 
     # Print report
     print_validation_report(validation, ralph_results, benchmark)
@@ -247,6 +515,7 @@ def main():
 
     # Exit code
     overall_passed, _ = validation["overall"]
+    telemetry.close(0 if overall_passed else 1)
     sys.exit(0 if overall_passed else 1)
 
 if __name__ == "__main__":
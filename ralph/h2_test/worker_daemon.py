@@ -0,0 +1,522 @@
+#!/usr/bin/env python
+"""
+Persistent local worker that keeps PySCF and the pipeline loaded between calls.
+
+Ralph's loop runs generate_h2_hamiltonian.py, generate_h2_benchmark.py,
+debug_fci.py and validate_h2.py over and over. For H2 each cold call spends
+more time on interpreter start-up and `import pyscf` than on compute. The
+worker imports everything once and answers JSON-RPC 2.0 requests, one JSON
+object per line, on a Unix socket or on stdin/stdout:
+
+    fci                {"molecule", "geometry", "basis"} -> HF/FCI energies
+    build_hamiltonian  {..., "mapping", "output"} -> qubit Hamiltonian (optionally saved as .npz)
+    validate           {"results", "benchmark"} -> validate_h2.py checks
+    run                {"script", "args", "cwd", "env"} -> runs a CLI as __main__, returns exit code and output
+    ping, stats, shutdown
+
+Molecules are given as in job_array.py manifests (a diatomic plus bond length
+in Å, or an atom string). Their integrals and energies are kept in memory on
+top of the on-disk IntegralCache, as are the qubit Hamiltonians and parsed
+benchmark files. Requests are executed one at a time, because `run` swaps
+process-global state (cwd, sys.argv, sys.path, stdout). Local modules are
+re-imported when any .py file of the harness or pipeline changes, so edits
+made between Ralph iterations are picked up without a restart. Settings that
+modules read at import time (e.g. RLQAS_CACHE_DIR) come from the worker's own
+environment. Only RLQAS_* variables are applied per `run` request, and
+atexit handlers a script registers run when that script finishes.
+
+This module imports only the standard library at top level, so the client
+side (`call`, `run`) starts in a few tens of milliseconds.
+
+Usage:
+    python worker_daemon.py serve &                  # socket: $RLQAS_DAEMON_SOCKET or /tmp/rlqas-daemon-<uid>.sock
+    python worker_daemon.py serve --stdio            # JSON-RPC on stdin/stdout
+    python worker_daemon.py call fci '{"molecule": "H2", "geometry": 0.74}'
+    python worker_daemon.py run --start validate_h2.py Ralph_Test_H2_Hamiltonian/h2_results.json
+    python worker_daemon.py benchmark                # cold CLI vs warm worker latency
+"""
+
+import argparse
+import contextlib
+import importlib
+import inspect
+import io
+import json
+import os
+import socket
+import socketserver
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import traceback
+from collections import OrderedDict
+
+HARNESS_DIR = os.path.dirname(os.path.abspath(__file__))
+PIPELINE_DIR = os.path.join(HARNESS_DIR, "Ralph_Test_H2_Hamiltonian")
+DEFAULT_SOCKET = os.environ.get(
+    "RLQAS_DAEMON_SOCKET", os.path.join(tempfile.gettempdir(), f"rlqas-daemon-{os.getuid()}.sock"))
+# Imported at start-up so the first request is as fast as the rest
+PRELOAD_MODULES = ("pyscf.gto", "pyscf.scf", "pyscf.fci", "pyscf.ao2mo", "scipy.sparse.linalg",
+                   "integral_cache", "qubit_hamiltonian", "tapering", "generate_h2_hamiltonian",
+                   "generate_h2_benchmark", "validate_h2", "job_array")
+MAX_MOLECULES = 256
+START_TIMEOUT_S = 60.0
+# JSON-RPC 2.0 error codes
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+SERVER_ERROR = -32000
+
+def local_sources():
+    """mtime of every .py file in the harness and pipeline directories."""
+    sources = {}
+    for directory in (HARNESS_DIR, PIPELINE_DIR):
+        for name in os.listdir(directory):
+            if name.endswith(".py"):
+                path = os.path.join(directory, name)
+                sources[path] = os.path.getmtime(path)
+    return sources
+
+class WorkerDaemon:
+    """Request handler state: warm modules plus in-memory molecule, Hamiltonian and benchmark memos."""
+
+    def __init__(self):
+        self.molecules = OrderedDict()      # (atom, basis) -> IntegralCache entry
+        self.hamiltonians = {}              # (atom, basis, mapping) -> PauliSum
+        self.benchmarks = {}                # (path, mtime) -> BenchmarkStore
+        self.started = time.time()
+        self.n_requests = 0
+        self.n_reloads = 0
+        self.lock = threading.Lock()
+        self.stop = threading.Event()
+        self.methods = {"ping": self.ping, "stats": self.stats, "shutdown": self.shutdown, "fci": self.fci,
+                        "build_hamiltonian": self.build_hamiltonian, "validate": self.validate, "run": self.run}
+        for directory in (HARNESS_DIR, PIPELINE_DIR):
+            if directory not in sys.path:
+                sys.path.insert(0, directory)
+        self._sources = local_sources()
+
+    def preload(self):
+        """Import PySCF and the pipeline, then run one H2 point so lazily loaded libraries are in."""
+        start = time.perf_counter()
+        for name in PRELOAD_MODULES:
+            importlib.import_module(name)
+        self.fci()
+        return time.perf_counter() - start
+
+    def _reload_if_changed(self):
+        """Forget local modules and memos when a local source file changed since the last request."""
+        sources = local_sources()
+        if sources == self._sources:
+            return
+        self._sources = sources
+        for name, module in list(sys.modules.items()):
+            path = getattr(module, "__file__", None)
+            if path and name != "__main__" and os.path.dirname(os.path.abspath(path)) in (HARNESS_DIR, PIPELINE_DIR):
+                del sys.modules[name]
+        self.molecules.clear()
+        self.hamiltonians.clear()
+        self.benchmarks.clear()
+        self.n_reloads += 1
+
+    def handle(self, request):
+        """Answer one JSON-RPC request dict with a response dict."""
+        if not isinstance(request, dict):
+            return {"jsonrpc": "2.0", "id": None, "error": {"code": INVALID_REQUEST, "message": "Expected an object"}}
+        request_id = request.get("id")
+        method = self.methods.get(request.get("method"))
+        if method is None:
+            return {"jsonrpc": "2.0", "id": request_id,
+                    "error": {"code": METHOD_NOT_FOUND, "message": f"Unknown method {request.get('method')!r}"}}
+        params = request.get("params") or {}
+        try:
+            inspect.signature(method).bind(**params)
+        except TypeError as e:
+            return {"jsonrpc": "2.0", "id": request_id, "error": {"code": INVALID_PARAMS, "message": str(e)}}
+        with self.lock:
+            self.n_requests += 1
+            self._reload_if_changed()
+            try:
+                result = method(**params)
+            except Exception as e:
+                return {"jsonrpc": "2.0", "id": request_id,
+                        "error": {"code": SERVER_ERROR, "message": f"{type(e).__name__}: {e}",
+                                  "data": traceback.format_exc()}}
+        return {"jsonrpc": "2.0", "id": request_id, "result": result}
+
+    # --- Methods ------------------------------------------------------------
+
+    def ping(self):
+        return {"pid": os.getpid()}
+
+    def stats(self):
+        return {"pid": os.getpid(), "uptime_s": time.time() - self.started, "requests": self.n_requests,
+                "reloads": self.n_reloads, "molecules": len(self.molecules),
+                "hamiltonians": len(self.hamiltonians), "benchmarks": len(self.benchmarks)}
+
+    def shutdown(self):
+        self.stop.set()
+        return {"pid": os.getpid()}
+
+    def _molecule(self, molecule, geometry, basis):
+        """Cached integrals/energies of one molecule: memory, then disk, then computed."""
+        from job_array import atom_string
+        atom = atom_string(molecule, geometry)
+        key = (atom, basis.lower())
+        if key in self.molecules:
+            self.molecules.move_to_end(key)
+            return key, self.molecules[key], "memory"
+
+        from pyscf import gto
+        from integral_cache import IntegralCache
+        mol = gto.M(atom=atom, basis=basis, unit="angstrom", verbose=0)
+        data = IntegralCache().load_or_compute(mol, conv_tol=1e-12)
+        self.molecules[key] = data
+        if len(self.molecules) > MAX_MOLECULES:
+            evicted, _ = self.molecules.popitem(last=False)
+            self.hamiltonians = {k: v for k, v in self.hamiltonians.items() if k[:2] != evicted}
+        return key, data, "disk" if data["cache_hit"] else "computed"
+
+    def fci(self, molecule="H2", geometry=0.5, basis="sto-3g"):
+        _, data, source = self._molecule(molecule, geometry, basis)
+        return {"hf_hartree": data["hf_hartree"], "fci_hartree": data["fci_hartree"],
+                "nuclear_repulsion": data["nuclear_repulsion"], "n_orbitals": int(data["mo_coeff"].shape[1]),
+                "source": source}
+
+    def build_hamiltonian(self, molecule="H2", geometry=0.5, basis="sto-3g", mapping="jordan_wigner", output=None):
+        key, data, source = self._molecule(molecule, geometry, basis)
+        ham = self.hamiltonians.get(key + (mapping,))
+        if ham is None:
+            import numpy as np
+            from packed_eri import PackedERI
+            from qubit_hamiltonian import build_qubit_hamiltonian
+            norb = data["mo_coeff"].shape[1]
+            ham = build_qubit_hamiltonian(np.asarray(data["h1_mo"]), PackedERI(np.asarray(data["eri_mo"]), norb),
+                                          data["nuclear_repulsion"], mapping)
+            self.hamiltonians[key + (mapping,)] = ham
+        if output:
+            ham.save(output)
+        return {"n_qubits": ham.n_qubits, "n_pauli_terms": ham.n_terms, "mapping": mapping,
+                "fci_hartree": data["fci_hartree"], "source": source, "output": output}
+
+    def validate(self, results, benchmark=os.path.join(HARNESS_DIR, "h2_benchmark.json")):
+        from results_io import load_results
+        from validate_h2 import BenchmarkStore, validate_implementation
+        store_key = (os.path.abspath(benchmark), os.path.getmtime(benchmark))
+        store = self.benchmarks.get(store_key)
+        if store is None:
+            store = self.benchmarks[store_key] = BenchmarkStore.from_benchmark(load_results(benchmark))
+        ralph_results = load_results(results)
+        validation = validate_implementation(ralph_results, store.reference_for_results(ralph_results))
+        return {"passed": bool(validation["overall"][0]),
+                "checks": {check: {"passed": bool(ok), "message": message}
+                           for check, (ok, message) in validation.items()}}
+
+    def run(self, script, args=(), cwd=None, env=None):
+        """Run a CLI script as __main__ in this process; returns its exit code, stdout and stderr.
+
+        Only RLQAS_* entries of env are applied. atexit handlers the script
+        registers (e.g. Telemetry.close) run when it finishes, as they would at
+        interpreter exit, instead of accumulating in the worker.
+        """
+        import atexit
+        import runpy
+        script = os.path.abspath(os.path.join(cwd or os.getcwd(), script))
+        env = {name: value for name, value in (env or {}).items() if name.startswith("RLQAS_")}
+        saved_argv, saved_path, saved_cwd = sys.argv, list(sys.path), os.getcwd()
+        saved_env = {name: os.environ.get(name) for name in env}
+        saved_register = atexit.register
+        exit_handlers = []
+
+        def register(func, *handler_args, **handler_kwargs):
+            exit_handlers.append((func, handler_args, handler_kwargs))
+            return func
+
+        stdout, stderr = io.StringIO(), io.StringIO()
+        exit_code = 0
+        try:
+            atexit.register = register
+            sys.argv = [script, *args]
+            sys.path.insert(0, os.path.dirname(script))
+            os.environ.update(env)
+            os.chdir(cwd or os.path.dirname(script))
+            with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+                try:
+                    runpy.run_path(script, run_name="__main__")
+                except SystemExit as e:
+                    # Same convention as the interpreter: None is 0, a message is printed with status 1
+                    if e.code is None or isinstance(e.code, int):
+                        exit_code = e.code or 0
+                    else:
+                        print(e.code, file=sys.stderr)
+                        exit_code = 1
+                except Exception:
+                    traceback.print_exc()
+                    exit_code = 1
+                for func, handler_args, handler_kwargs in reversed(exit_handlers):
+                    try:
+                        func(*handler_args, **handler_kwargs)
+                    except Exception:
+                        traceback.print_exc()
+        finally:
+            atexit.register = saved_register
+            sys.argv, sys.path[:] = saved_argv, saved_path
+            os.chdir(saved_cwd)
+            for name, value in saved_env.items():
+                if value is None:
+                    os.environ.pop(name, None)
+                else:
+                    os.environ[name] = value
+        return {"exit_code": exit_code, "stdout": stdout.getvalue(), "stderr": stderr.getvalue()}
+
+# --- Transports ---------------------------------------------------------------
+
+def _answer(daemon, line):
+    try:
+        request = json.loads(line)
+    except json.JSONDecodeError as e:
+        return {"jsonrpc": "2.0", "id": None, "error": {"code": PARSE_ERROR, "message": str(e)}}
+    return daemon.handle(request)
+
+def serve_stdio(daemon):
+    """Answer one request per stdin line until EOF or shutdown."""
+    out = sys.stdout
+    for line in sys.stdin:
+        if line.strip():
+            out.write(json.dumps(_answer(daemon, line), default=str) + "\n")
+            out.flush()
+        if daemon.stop.is_set():
+            break
+
+def serve_socket(daemon, path):
+    """Accept any number of clients on a Unix socket; requests still execute one at a time."""
+    if os.path.exists(path):
+        if DaemonClient.reachable(path):
+            raise RuntimeError(f"A worker is already listening on {path}")
+        os.unlink(path)
+
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for line in self.rfile:
+                if line.strip():
+                    response = _answer(daemon, line)
+                    self.wfile.write((json.dumps(response, default=str) + "\n").encode())
+                    self.wfile.flush()
+                if daemon.stop.is_set():
+                    break
+
+    server = socketserver.ThreadingUnixStreamServer(path, Handler)
+    server.daemon_threads = True
+    threading.Thread(target=lambda: (daemon.stop.wait(), server.shutdown()), daemon=True).start()
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(path)
+
+class DaemonClient:
+    """One connection to a worker; call() sends a request and waits for its response."""
+
+    def __init__(self, path=DEFAULT_SOCKET, timeout=None):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        self.sock.connect(path)
+        self.file = self.sock.makefile("rwb")
+        self.next_id = 0
+
+    @staticmethod
+    def reachable(path=DEFAULT_SOCKET):
+        try:
+            DaemonClient(path, timeout=1.0).close()
+            return True
+        except OSError:
+            return False
+
+    def call(self, method, **params):
+        """Result of method(**params); raises RuntimeError with the worker's message on failure."""
+        self.next_id += 1
+        request = {"jsonrpc": "2.0", "id": self.next_id, "method": method, "params": params}
+        self.file.write((json.dumps(request) + "\n").encode())
+        self.file.flush()
+        line = self.file.readline()
+        if not line:
+            raise ConnectionError("Worker closed the connection")
+        response = json.loads(line)
+        if "error" in response:
+            error = response["error"]
+            raise RuntimeError(f"{error['message']}\n{error.get('data', '')}".rstrip())
+        return response["result"]
+
+    def close(self):
+        self.file.close()
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def start_daemon(path=DEFAULT_SOCKET, log_path=None, timeout=START_TIMEOUT_S):
+    """Start a detached worker on path and wait until it answers; returns its Popen."""
+    log = open(log_path or os.devnull, "ab")
+    process = subprocess.Popen([sys.executable, os.path.abspath(__file__), "serve", "--socket", path],
+                               stdin=subprocess.DEVNULL, stdout=log, stderr=log, start_new_session=True)
+    log.close()
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Worker exited with status {process.returncode} during start-up")
+        # The socket exists once preloading has finished and the server is listening
+        if os.path.exists(path) and DaemonClient.reachable(path):
+            return process
+        time.sleep(0.05)
+    process.kill()
+    raise TimeoutError(f"Worker did not start listening on {path} within {timeout:.0f} s")
+
+def run_client(script, args, path=DEFAULT_SOCKET, start=False):
+    """CLI `run`: execute script in the worker, falling back to a cold run when none is reachable."""
+    if not DaemonClient.reachable(path):
+        if not start:
+            print(f"⚠️  No worker on {path}, running {script} cold", file=sys.stderr)
+            os.execv(sys.executable, [sys.executable, script, *args])
+        start_daemon(path, log_path=path + ".log")
+    env = {k: v for k, v in os.environ.items() if k.startswith("RLQAS_")}
+    with DaemonClient(path) as client:
+        result = client.call("run", script=script, args=list(args), cwd=os.getcwd(), env=env)
+    sys.stdout.write(result["stdout"])
+    sys.stderr.write(result["stderr"])
+    return result["exit_code"]
+
+# --- Benchmark ----------------------------------------------------------------
+
+def _time(fn, repeats):
+    """Median wall time of fn() over repeats, plus the last return value."""
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        value = fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), value
+
+def benchmark(repeats=5):
+    """Cold CLI latency vs the same call through a warm worker, plus the worker's native methods."""
+    rows = []
+    with tempfile.TemporaryDirectory() as work_dir:
+        path = os.path.join(work_dir, "daemon.sock")
+        start = time.perf_counter()
+        process = start_daemon(path, log_path=os.path.join(work_dir, "daemon.log"))
+        startup_s = time.perf_counter() - start
+
+        hamiltonian_script = os.path.join(PIPELINE_DIR, "generate_h2_hamiltonian.py")
+        cases = [
+            ("generate_h2_hamiltonian.py", hamiltonian_script, []),
+            ("generate_h2_benchmark.py", os.path.join(HARNESS_DIR, "generate_h2_benchmark.py"),
+             ["--output", os.path.join(work_dir, "h2_benchmark.json")]),
+            ("debug_fci.py", os.path.join(PIPELINE_DIR, "debug_fci.py"), []),
+            ("validate_h2.py", os.path.join(HARNESS_DIR, "validate_h2.py"),
+             [os.path.join(work_dir, "h2_results.json"), os.path.join(HARNESS_DIR, "h2_benchmark.json")]),
+        ]
+        # Fill the on-disk integral cache and h2_results.json first, so both paths only differ in start-up
+        subprocess.run([sys.executable, hamiltonian_script], cwd=work_dir, capture_output=True, check=True)
+
+        try:
+            with DaemonClient(path) as client:
+                for name, script, args in cases:
+                    cold_s, cold = _time(lambda: subprocess.run([sys.executable, script, *args], cwd=work_dir,
+                                                                capture_output=True), repeats)
+                    client_s, warm = _time(lambda: subprocess.run(
+                        [sys.executable, os.path.abspath(__file__), "run", "--socket", path, script, *args],
+                        cwd=work_dir, capture_output=True), repeats)
+                    call_s, _ = _time(lambda: client.call("run", script=script, args=args, cwd=work_dir), repeats)
+                    rows.append({"call": name, "cold_s": cold_s, "client_s": client_s, "call_s": call_s,
+                                 "same_exit": cold.returncode == warm.returncode})
+
+                h2 = {"molecule": "H2", "geometry": 0.5, "basis": "sto-3g"}
+                results = os.path.join(work_dir, "h2_results.json")
+                for name, method, params in [("fci", "fci", h2), ("build_hamiltonian", "build_hamiltonian", h2),
+                                             ("validate", "validate", {"results": results})]:
+                    call_s, _ = _time(lambda: client.call(method, **params), repeats)
+                    rows.append({"call": f"{name} (method)", "cold_s": None, "client_s": None, "call_s": call_s,
+                                 "same_exit": None})
+                client.call("shutdown")
+        finally:
+            with contextlib.suppress(subprocess.TimeoutExpired):
+                process.wait(timeout=10)
+            if process.poll() is None:
+                process.kill()
+    return startup_s, rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Persistent PySCF worker for the Ralph H2 pipeline.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("serve", help="Preload PySCF and the pipeline, then answer JSON-RPC requests")
+    p.add_argument("--socket", default=DEFAULT_SOCKET, help=f"Unix socket path (default: {DEFAULT_SOCKET})")
+    p.add_argument("--stdio", action="store_true", help="Read requests from stdin, write responses to stdout")
+
+    p = sub.add_parser("call", help="Send one request and print the JSON result")
+    p.add_argument("method", help="fci, build_hamiltonian, validate, run, ping, stats or shutdown")
+    p.add_argument("params", nargs="?", default="{}", help="JSON object of parameters")
+    p.add_argument("--socket", default=DEFAULT_SOCKET)
+
+    p = sub.add_parser("run", help="Run a CLI script inside the worker (cold fallback if none is running)")
+    p.add_argument("--socket", default=DEFAULT_SOCKET)
+    p.add_argument("--start", action="store_true", help="Start a worker first if none is running")
+    p.add_argument("script")
+    p.add_argument("args", nargs=argparse.REMAINDER)
+
+    p = sub.add_parser("benchmark", help="Cold CLI latency vs warm worker latency")
+    p.add_argument("--repeats", type=int, default=5, help="Calls per measurement, median reported (default: 5)")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        daemon = WorkerDaemon()
+        preload_s = daemon.preload()
+        print(f"✓ Worker {os.getpid()} ready in {preload_s:.2f} s "
+              f"({'stdio' if args.stdio else args.socket})", file=sys.stderr, flush=True)
+        try:
+            if args.stdio:
+                serve_stdio(daemon)
+            else:
+                serve_socket(daemon, args.socket)
+        except KeyboardInterrupt:
+            return 130
+        return 0
+
+    if args.command == "call":
+        try:
+            with DaemonClient(args.socket) as client:
+                result = client.call(args.method, **json.loads(args.params))
+        except OSError as e:
+            print(f"✗ No worker on {args.socket}: {e}")
+            return 1
+        except RuntimeError as e:
+            print(f"✗ {e}")
+            return 1
+        print(json.dumps(result, indent=2))
+        return 0
+
+    if args.command == "run":
+        return run_client(args.script, args.args, args.socket, args.start)
+
+    startup_s, rows = benchmark(args.repeats)
+    print(f"Worker start-up (imports + first H2 point): {startup_s:.2f} s")
+    print("=" * 88)
+    print(f"{'call':>28} {'cold CLI ms':>12} {'warm client ms':>15} {'warm call ms':>13} {'speedup':>8}  exit")
+    for row in rows:
+        cold = f"{1e3 * row['cold_s']:12.1f}" if row["cold_s"] is not None else f"{'-':>12}"
+        client = f"{1e3 * row['client_s']:15.1f}" if row["client_s"] is not None else f"{'-':>15}"
+        speedup = f"{row['cold_s'] / row['client_s']:7.1f}x" if row["cold_s"] is not None else f"{'-':>8}"
+        print(f"{row['call']:>28} {cold} {client} {1e3 * row['call_s']:13.2f} {speedup}  "
+              f"{'-' if row['same_exit'] is None else '✓' if row['same_exit'] else '✗'}")
+    print("warm client = `worker_daemon.py run` subprocess; warm call = request on an open connection")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())